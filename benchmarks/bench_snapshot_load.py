@@ -0,0 +1,82 @@
+"""
+Snapshot load time: pretty-printed JSON vs the FIEB binary format.
+
+For each size the same synthetic records are written in both formats and
+loaded three ways:
+
+    json      json.load + datetime parsing (current JsonTransactionStore)
+    binary    fie.storage.binary.load, full list of record dicts
+    columns   fie.storage.binary.read_columns, NumPy columns only
+
+Usage:
+    python benchmarks/bench_snapshot_load.py [N ...]
+"""
+
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from fie.storage import binary
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bench_transaction_memory import synthetic  # noqa: E402
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def load_json(path: Path):
+    with open(path) as f:
+        data = json.load(f)
+    for r in data["transactions"]:
+        r["datetime"] = datetime.fromisoformat(r["datetime"])
+    return data
+
+
+def load_binary(path: Path):
+    with open(path, "rb") as f:
+        return binary.load(f)
+
+
+def run(n: int, tmp: Path) -> None:
+    data = {"transactions": synthetic(n)}
+    json_path = tmp / f"{n}.json"
+    bin_path = tmp / f"{n}.fieb"
+
+    with open(json_path, "w") as f:
+        json.dump(data, f, indent=2)
+    with open(bin_path, "wb") as f:
+        binary.dump(data, f)
+    del data
+
+    repeat = 1 if n >= 1_000_000 else 3
+    t_json = best_of(lambda: load_json(json_path), repeat)
+    t_bin = best_of(lambda: load_binary(bin_path), repeat)
+    t_cols = best_of(lambda: binary.read_columns(bin_path), repeat)
+
+    mb = 1024 * 1024
+    print(
+        f"{n:>9} rows | json {json_path.stat().st_size / mb:7.1f} MB {t_json * 1000:9.1f} ms"
+        f" | binary {bin_path.stat().st_size / mb:7.1f} MB {t_bin * 1000:9.1f} ms"
+        f" | columns {t_cols * 1000:8.1f} ms"
+    )
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            run(n, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
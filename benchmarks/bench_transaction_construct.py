@@ -0,0 +1,66 @@
+"""
+Transaction construction rate: validated __init__ vs the trusted path.
+
+    init      Transaction(**fields), runs __post_init__ checks
+    trusted   Transaction.trusted(...), as the stores deserialize rows
+    replace   dataclasses.replace(t, scope=...), the old copy-on-edit
+    evolve    t.evolve(scope=...), what the rules and API now use
+
+Rows come from the shared synthetic generator with datetimes pre-parsed,
+so only object construction is timed.
+
+Usage:
+    python benchmarks/bench_transaction_construct.py [N]
+"""
+
+import gc
+import sys
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+from fie.core.transaction import Transaction
+
+sys.path.insert(0, str(Path(__file__).parent))
+from bench_transaction_memory import synthetic  # noqa: E402
+
+
+def timed(fn) -> float:
+    # Like timeit: keep cyclic GC passes over 1M live objects out of it.
+    gc.collect()
+    gc.disable()
+    try:
+        t0 = time.perf_counter()
+        fn()
+        return time.perf_counter() - t0
+    finally:
+        gc.enable()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = synthetic(n)
+    for r in rows:
+        r["datetime"] = datetime.fromisoformat(r["datetime"])
+
+    trusted = Transaction.trusted
+    results = {
+        "init": timed(lambda: [Transaction(**r) for r in rows]),
+        "trusted": timed(lambda: [
+            trusted(r["id"], r["datetime"], r["paise"], r["direction"], r["counterparty"],
+                    r["mode"], r["reviewed"], r["scope"], r["category"], r["extras"])
+            for r in rows
+        ]),
+    }
+    txns = [Transaction(**r) for r in rows]
+    del rows
+    results["replace"] = timed(lambda: [replace(t, scope="family") for t in txns])
+    results["evolve"] = timed(lambda: [t.evolve(scope="family") for t in txns])
+
+    for name, secs in results.items():
+        print(f"{name:>8}: {secs * 1000:9.1f} ms  {n / secs / 1e6:6.2f} M rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Bytes per Transaction: legacy dict-backed dataclass vs the slotted one.
+
+Records are round-tripped through JSON first so every string is a fresh
+object, the same as rows coming out of JsonTransactionStore.
+
+Usage:
+    python benchmarks/bench_transaction_memory.py [N] [path/to/transactions.json]
+"""
+
+import json
+import sys
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from fie.core.transaction import Transaction
+
+
+@dataclass(frozen=True)
+class LegacyTransaction:
+    """Layout of Transaction before the slots change."""
+    id: str
+    datetime: datetime
+    paise: int
+    direction: str
+    counterparty: str
+    mode: str
+    reviewed: bool = False
+    scope: str = "unknown"
+    category: List[str] = field(default_factory=list)
+    extras: Dict = field(default_factory=dict)
+
+
+def synthetic(n: int) -> List[dict]:
+    start = datetime(2024, 1, 1)
+    merchants = ["SWIGGY", "ZOMATO", "RAPIDO", "BESCOM", "AMAZON", "RAJESHKU"]
+    return [
+        {
+            "id": f"{i:064x}",
+            "datetime": (start + timedelta(minutes=37 * i)).isoformat(),
+            "paise": (10 + i % 900) * 100,
+            "direction": "debit" if i % 5 else "credit",
+            "counterparty": merchants[i % len(merchants)],
+            "mode": "UPI",
+            "reviewed": bool(i % 2),
+            "scope": "personal",
+            "category": ["food"],
+            "extras": {
+                "balance": 15000.0 - i,
+                "chq_id": str(800000000000 + i),
+                "raw": f"UPI/DR/{800000000000 + i}/{merchants[i % len(merchants)]}/YESB/PAYMENT",
+                "source_file": "/tmp/fie_upload/statement.pdf",
+            },
+        }
+        for i in range(n)
+    ]
+
+
+def measure(cls, blob: str) -> float:
+    """Memory still held after parsing and dropping the raw records."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+
+    records = json.loads(blob)
+    n = len(records)
+    txns = []
+    for r in records:
+        r["datetime"] = datetime.fromisoformat(r["datetime"])
+        txns.append(cls(**r))
+    del records, r
+
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del txns
+    return (retained - before) / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    if len(sys.argv) > 2:
+        with open(sys.argv[2]) as f:
+            records = json.load(f)["transactions"]
+    else:
+        records = synthetic(n)
+    blob = json.dumps(records)
+
+    legacy = measure(LegacyTransaction, blob)
+    slotted = measure(Transaction, blob)
+
+    print(f"records          : {len(records)}")
+    print(f"legacy dataclass : {legacy:8.1f} bytes/txn")
+    print(f"slotted          : {slotted:8.1f} bytes/txn")
+    print(f"saved            : {legacy - slotted:8.1f} bytes/txn ({(1 - slotted / legacy) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+# fie/app/archive.py
+
+from datetime import datetime
+
+from fie import config
+
+
+def run(args, store, archive):
+    keep = args.keep_years if args.keep_years is not None else int(config.get("archive.keep_years", 2))
+    before = datetime.now().year - max(1, keep)
+    moved = archive.archive(store, before)
+
+    for year, count in moved.items():
+        print(f"  {year}: {count} transactions → {archive.path(year)}")
+    print(f"✓ Archived {sum(moved.values())} transactions dated before {before}")
@@ -0,0 +1,21 @@
+# fie/app/backup.py
+
+from fie.storage.backup import BackupSet
+from fie.storage.factory import backup_dir, backup_files
+
+
+def run(args, store, data_path):
+    backups = BackupSet(backup_dir(data_path))
+    if args.list:
+        for p in backups.points():
+            print(
+                f"  #{p['seq']:<4} {p['created'][:19]}  store v{p['store_version']}  "
+                f"+{p['upserts']} -{p['removed']} rows  {len(p['files'])} files"
+            )
+        return
+
+    seq = backups.backup(store, backup_files(data_path))
+    if seq is None:
+        print("✓ Nothing changed since the last restore point")
+    else:
+        print(f"✓ Restore point #{seq} written to {backups.root}")
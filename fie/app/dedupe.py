@@ -0,0 +1,15 @@
+# fie/app/dedupe.py
+
+
+def run(args, store, fingerprints):
+    groups = fingerprints.collapse(store, dry_run=args.dry_run)
+
+    for keep, *repeats in groups:
+        print(f"  {keep.datetime:%Y-%m-%d %H:%M} ₹{keep.amount:,.2f} {keep.counterparty}: "
+              f"keep {keep.id[:8]}, trash {', '.join(t.id[:8] for t in repeats)}")
+
+    count = sum(len(g) - 1 for g in groups)
+    if args.dry_run:
+        print(f"✓ {count} repeated transactions would be moved to the trash")
+    else:
+        print(f"✓ Moved {count} repeated transactions to the trash")
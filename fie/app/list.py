@@ -26,20 +26,15 @@ def fmt_bool(v):
 
 
 def run(args, engine):
-    txns = engine.all()
-
-    # ---------- filters ----------
-    if args.scope:
-        txns = [t for t in txns if t.scope == args.scope]
-    if args.category:
-        txns = [t for t in txns if args.category in t.category]
-    if args.direction:
-        txns = [t for t in txns if t.direction == args.direction]
-
-    # ---------- sort & limit ----------
-    txns.sort(key=lambda t: getattr(t, args.sort))
-    if args.limit:
-        txns = txns[:args.limit]
+    # ---------- filters, sort & limit ----------
+    filters = {
+        "scope": args.scope,
+        "category": args.category,
+        "direction": args.direction,
+    }
+    txns, _ = engine.store.query(
+        filters, sort=args.sort, order="asc", limit=args.limit or None
+    )
 
     if not txns:
         print("No transactions to display.")
@@ -1,16 +1,17 @@
 # fie/app/load.py
 
 from pathlib import Path
-from fie.ingest.canara import parse_canara_pdf
+from fie.ingest.manifest import tally
+from fie.ingest.parallel import iter_many
 
 
-def run(args, engine):
+def run(args, engine, manifest):
     p = Path(args.path)
 
     if p.is_file():
         pdfs = [p]
     elif p.is_dir():
-        pdfs = list(p.glob("*.pdf"))
+        pdfs = sorted(p.glob("*.pdf"))
     else:
         print(f"✗ Invalid path: {p}")
         return
@@ -19,10 +20,19 @@ def run(args, engine):
         print("✗ No PDF files found.")
         return
 
-    total = 0
-    for pdf in pdfs:
-        txns = parse_canara_pdf(str(pdf))
-        engine.ingest(txns)
-        total += len(txns)
+    # Files already ingested by this parser version are skipped unread.
+    todo, done = manifest.select(pdfs, force=args.force)
+    for pdf, entry in done:
+        print(f"  = {pdf.name}: already loaded ({entry['count']} transactions, {entry['first']} → {entry['last']})")
+    if not todo:
+        print(f"✓ Nothing new in {len(pdfs)} file(s).")
+        return
+
+    # Parsed in parallel and merged in file order, streamed into the
+    # store in ingest.chunk_size batches.
+    stats = {}
+    added = engine.ingest(tally(iter_many(list(todo), args.jobs), stats))
+    manifest.record(todo, stats)
 
-    print(f"✓ Loaded {total} transactions from {len(pdfs)} file(s).")
+    count = sum(s["count"] for s in stats.values())
+    print(f"✓ Loaded {count} transactions from {len(todo)} file(s), {added} new.")
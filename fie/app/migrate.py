@@ -0,0 +1,21 @@
+# fie/app/migrate.py
+
+from pathlib import Path
+
+from fie.storage.factory import sqlite_path
+from fie.storage.sqlite_store import SqliteTransactionStore
+
+
+def run(args, data_path):
+    src = Path(args.source) if args.source else data_path
+
+    if not src.is_file():
+        print(f"✗ No JSON store found at: {src}")
+        return
+
+    dest = Path(args.dest) if args.dest else sqlite_path(data_path)
+    store = SqliteTransactionStore(dest)
+    count = store.migrate_from_json(src)
+
+    print(f"✓ Imported {count} transactions into {dest}")
+    print("  Set 'storage.backend: sqlite' in config.yaml to use it.")
@@ -0,0 +1,15 @@
+# fie/app/purge.py
+
+from datetime import datetime, timedelta
+
+from fie import config
+
+
+def run(args, store):
+    if args.all:
+        count = store.purge()
+    else:
+        days = args.days if args.days is not None else int(config.get("trash.retention_days", 30))
+        count = store.purge(before=datetime.now() - timedelta(days=days))
+
+    print(f"✓ Purged {count} deleted transactions")
@@ -0,0 +1,10 @@
+# fie/app/restore.py
+
+from fie.storage.backup import BackupSet
+from fie.storage.factory import backup_dir, backup_files
+
+
+def run(args, store, data_path):
+    backups = BackupSet(backup_dir(data_path))
+    seq = backups.restore(store, backup_files(data_path), args.seq)
+    print(f"✓ Restored restore point #{seq}")
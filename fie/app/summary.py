@@ -2,20 +2,21 @@
 
 from collections import defaultdict
 from fie import config
+from fie.core.money import rupees
 
 
-def signed_amount(txn):
-    return txn.amount if txn.direction == "credit" else -txn.amount
+def signed_paise(txn):
+    return txn.paise if txn.direction == "credit" else -txn.paise
 
 
-def fmt_amount_fixed(amount, width=14):
-    sign = "-" if amount < 0 else ""
-    return f"{sign}{abs(amount):,.2f}₹".rjust(width)
+def fmt_amount_fixed(paise, width=14):
+    sign = "-" if paise < 0 else ""
+    return f"{sign}{rupees(abs(paise)):,.2f}₹".rjust(width)
 
 
 def aggregate(txns, key, all_keys=None):
     counts = defaultdict(int)
-    totals = defaultdict(float)
+    totals = defaultdict(int)
 
     for txn in txns:
         value = getattr(txn, key)
@@ -23,12 +24,12 @@ def aggregate(txns, key, all_keys=None):
             value = value[0] if value else "unknown"
 
         counts[value] += 1
-        totals[value] += signed_amount(txn)
+        totals[value] += signed_paise(txn)
 
     if all_keys:
         for k in all_keys:
             counts.setdefault(k, 0)
-            totals.setdefault(k, 0.0)
+            totals.setdefault(k, 0)
 
     return counts, totals
 
@@ -39,7 +40,7 @@ def print_agg(title, counts, totals):
     print(f"{'Key':<12} {'Count':<8} {'Net Amount':>14}")
     print("-" * 36)
 
-    net = 0.0
+    net = 0
     for k in sorted(counts):
         net += totals[k]
         print(
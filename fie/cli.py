@@ -2,11 +2,23 @@ import argparse
 from pathlib import Path
 
 from fie.core.engine import FIEEngine
-from fie.storage.json_store import JsonTransactionStore
+from fie.core.merchants import MerchantDirectory
+from fie.ingest.manifest import IngestManifest
+from fie.storage.archive import TransactionArchive
+from fie.storage.factory import (
+    archive_dir, fingerprints_path, ingest_manifest_path, merchants_path, open_store,
+)
+from fie.storage.fingerprints import FingerprintIndex
 from fie import config
 
+from fie.app import archive as archive_cmd
+from fie.app import backup as backup_cmd
+from fie.app import dedupe as dedupe_cmd
 from fie.app import list as list_cmd
 from fie.app import load as load_cmd
+from fie.app import migrate as migrate_cmd
+from fie.app import purge as purge_cmd
+from fie.app import restore as restore_cmd
 from fie.app import summary as summary_cmd
 
 
@@ -22,12 +34,19 @@ def main():
 Examples:
   fie ld canara.pdf
   fie ld statements/
+  fie ld statements/ --jobs 4
   fie ls
   fie ls -a
   fie ls -s personal
   fie edit
   fie edit id:de223a7c
   fie sum
+  fie migrate
+  fie purge --days 7
+  fie archive --keep-years 2
+  fie dedupe --dry-run
+  fie backup
+  fie restore 3
 
 Tips:
 - Use 'fie ls -a' for full transaction details
@@ -45,6 +64,15 @@ Tips:
         help="Load bank statement PDFs"
     )
     load.add_argument("path", help="PDF file or directory containing PDFs")
+    load.add_argument(
+        "--force", action="store_true",
+        help="Re-parse files the ingest manifest says are already loaded"
+    )
+    load.add_argument(
+        "-j", "--jobs", type=int, metavar="N",
+        help="Parse with up to N processes: several PDFs at once, or page ranges\n"
+             "of a single PDF (default: ingest.jobs, 0 = one per CPU)"
+    )
 
     # -------- LIST --------
     ls = subparsers.add_parser(
@@ -116,21 +144,94 @@ Tips:
         help="Show spending summaries"
     )
 
+    # -------- MIGRATE --------
+    migrate = subparsers.add_parser(
+        "migrate",
+        help="Import transactions.json into the SQLite store"
+    )
+    migrate.add_argument(
+        "--from", dest="source", metavar="PATH",
+        help="JSON store to import (default: storage.data_path)"
+    )
+    migrate.add_argument(
+        "--to", dest="dest", metavar="PATH",
+        help="SQLite database to create (default: storage.sqlite_path)"
+    )
+
+    # -------- PURGE --------
+    purge = subparsers.add_parser(
+        "purge",
+        help="Permanently remove deleted transactions from the trash"
+    )
+    purge.add_argument(
+        "--days", type=int, metavar="N",
+        help="Only those deleted more than N days ago (default: trash.retention_days)"
+    )
+    purge.add_argument(
+        "--all", action="store_true",
+        help="Empty the whole trash"
+    )
+
+    # -------- ARCHIVE --------
+    archive = subparsers.add_parser(
+        "archive",
+        help="Move old years into compressed read-only yearly archives"
+    )
+    archive.add_argument(
+        "--keep-years", type=int, metavar="N",
+        help="Full years kept live besides the current one (default: archive.keep_years)"
+    )
+
+    # -------- DEDUPE --------
+    dedupe = subparsers.add_parser(
+        "dedupe",
+        help="Trash repeats of the same bank entry imported from overlapping statements"
+    )
+    dedupe.add_argument(
+        "--dry-run", action="store_true",
+        help="Only list the repeats"
+    )
+
+    # -------- BACKUP / RESTORE --------
+    backup = subparsers.add_parser(
+        "backup",
+        help="Write an incremental restore point of the data directory"
+    )
+    backup.add_argument(
+        "--list", action="store_true",
+        help="List restore points instead"
+    )
+
+    restore = subparsers.add_parser(
+        "restore",
+        help="Roll the data directory back to a restore point"
+    )
+    restore.add_argument(
+        "seq", nargs="?", type=int,
+        help="Restore point number (default: the newest; see 'fie backup --list')"
+    )
+
     args = parser.parse_args()
 
     if args.command is None:
         parser.print_help()
         return
 
-    store = JsonTransactionStore(DATA_PATH)
-    engine = FIEEngine(store)
+    if args.command == "migrate":
+        migrate_cmd.run(args, DATA_PATH)
+        return
+
+    store = open_store(DATA_PATH)
+    archives = TransactionArchive(archive_dir(DATA_PATH))
+    fingerprints = FingerprintIndex(fingerprints_path(DATA_PATH))
+    engine = FIEEngine(store, MerchantDirectory(merchants_path(DATA_PATH)), archives, fingerprints)
 
     # ==================================================
     # COMMAND DISPATCH
     # ==================================================
 
     if args.command in ("load", "ld"):
-        load_cmd.run(args, engine)
+        load_cmd.run(args, engine, IngestManifest(ingest_manifest_path(DATA_PATH)))
 
     elif args.command in ("list", "ls"):
         list_cmd.run(args, engine)
@@ -141,6 +242,21 @@ Tips:
     elif args.command in ("summary", "sum"):
         summary_cmd.run(args, engine)
 
+    elif args.command == "purge":
+        purge_cmd.run(args, store)
+
+    elif args.command == "archive":
+        archive_cmd.run(args, store, archives)
+
+    elif args.command == "dedupe":
+        dedupe_cmd.run(args, store, fingerprints)
+
+    elif args.command == "backup":
+        backup_cmd.run(args, store, DATA_PATH)
+
+    elif args.command == "restore":
+        restore_cmd.run(args, store, DATA_PATH)
+
 
 if __name__ == "__main__":
     main()
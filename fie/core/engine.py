@@ -1,19 +1,82 @@
-from typing import List
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+from fie import config
 from fie.core.transaction import Transaction
+from fie.core.merchants import MerchantDirectory
 from fie.core.rules import apply_micro_rules
+from fie.core.table import TransactionTable
+from fie.storage.archive import TransactionArchive
 from fie.storage.base import TransactionStore
+from fie.storage.fingerprints import FingerprintIndex
 
 
 class FIEEngine:
-    def __init__(self, store: TransactionStore):
+    def __init__(
+        self,
+        store: TransactionStore,
+        merchants: Optional[MerchantDirectory] = None,
+        archive: Optional[TransactionArchive] = None,
+        fingerprints: Optional[FingerprintIndex] = None,
+    ):
         self.store = store
+        self.merchants = merchants if merchants is not None else MerchantDirectory()
+        self.archive = archive
+        self.fingerprints = fingerprints
+        self._tables: Dict[tuple, TransactionTable] = {}
 
-    def ingest(self, txns: List[Transaction]) -> None:
-        processed = [apply_micro_rules(txn) for txn in txns]
-        self.store.add(processed)
+    def ingest(self, txns: Iterable[Transaction], chunk_size: Optional[int] = None) -> int:
+        """
+        Store new transactions from any iterable (a list, or a parser's
+        generator), committing every ``chunk_size`` rows (default:
+        ingest.chunk_size) so a huge statement is never held in full.
+        Returns how many were not already stored (or archived). With a
+        fingerprint index, entries already stored from another statement
+        are dropped as well.
+        """
+        size = chunk_size or int(config.get("ingest.chunk_size", 5000))
+        added = 0
+        it = iter(txns)
+        while True:
+            chunk = [apply_micro_rules(txn) for txn in islice(it, size)]
+            if not chunk:
+                return added
+            added += self._store_new(chunk)
+            # Merchant ids are assigned here, so reads never write the directory.
+            self.merchants.ids(dict.fromkeys(t.counterparty for t in chunk))
+
+    def _store_new(self, processed: List[Transaction]) -> int:
+        if self.archive is not None:
+            archived = self.archive.known(processed)
+            if archived:
+                processed = [t for t in processed if t.id not in archived]
+        if self.fingerprints is not None:
+            return self.fingerprints.add_many(self.store, processed)
+        return self.store.add_many(processed)
 
     def all(self) -> List[Transaction]:
         return self.store.list_all()
 
     def unreviewed(self) -> List[Transaction]:
         return [t for t in self.store.list_all() if not t.reviewed]
+
+    def table(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> TransactionTable:
+        """
+        Columnar view of the store, or of start <= datetime <= end only.
+        Each window is rebuilt only when the rows the store returns, or the
+        merchant directory, change.
+        """
+        rows = self.store.between(start, end) if start or end else self.store.snapshot()
+        key = (start, end)
+        table = self._tables.get(key)
+        if (
+            table is None
+            or table.txns is not rows
+            or table.merchant_revision != self.merchants.revision()
+        ):
+            if key not in self._tables and len(self._tables) >= 8:
+                self._tables.pop(next(iter(self._tables)))
+            table = self._tables[key] = TransactionTable(rows, self.merchants)
+        return table
@@ -0,0 +1,227 @@
+"""
+Merchant dimension: each counterparty gets a small integer merchant id.
+
+Spellings are keyed case- and whitespace-insensitively (merchant_key),
+so "Swiggy", "SWIGGY" and "swiggy " are one merchant. An alias maps a
+further spelling onto an existing merchant ("AMZN MKTP" → "Amazon"); the
+first spelling seen names the merchant.
+
+Ids are not written into the stored rows: the alias table can change
+after the rows were imported, so rows keep their counterparty and the
+directory resolves it. Every distinct counterparty string is resolved
+once and cached (counterparties are interned, so a cache hit costs one
+cached-hash dict lookup); TransactionTable gathers a ``merchant`` int32
+column from its counterparty codes, and grouping, top lists and exact
+rule matches compare those ints.
+
+The directory is persisted as ``<data>.merchants.json`` and reloaded
+when another process changes it; new ids are assigned under flock, by
+FIEEngine.ingest() for the rows it stores. Reads use lookup() and
+find_many(), which never write: a counterparty stored some other way
+gets a provisional id for that one call.
+"""
+
+import json
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from fie.storage.locking import file_lock
+
+
+def merchant_key(name: str) -> str:
+    """Spelling → lookup key: lowercased, whitespace collapsed."""
+    return " ".join(name.split()).lower()
+
+
+class MerchantDirectory:
+    """
+    ``names[id]`` is the merchant's display name; ``keys`` maps every
+    known spelling key (natural spellings and aliases) to its id.
+    ``path=None`` keeps the directory in memory only.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self.lock_path = path.with_suffix(".lock") if path else None
+        self._lock = threading.RLock()
+        self._file_key = None
+        self._revision = 0
+        self.names: List[str] = []
+        self.keys: Dict[str, int] = {}
+        # exact counterparty string → id; cleared when keys change
+        self._resolved: Dict[str, int] = {}
+        self._reload()
+
+    # ---------- lookups ----------
+
+    def id(self, counterparty: str) -> int:
+        """Merchant id of a counterparty, assigning a new id if unseen."""
+        mid = self._resolved.get(counterparty)
+        if mid is None:
+            mid = self.ids([counterparty])[0]
+        return mid
+
+    def ids(self, counterparties: Iterable[str]) -> List[int]:
+        """id() for many counterparties, saving any new ids once."""
+        counterparties = list(counterparties)
+        with self._lock:
+            self._reload()
+            if any(c not in self._resolved for c in counterparties):
+                self._assign(counterparties)
+            resolved = self._resolved
+            return [resolved[c] for c in counterparties]
+
+    def lookup(self, counterparties: Iterable[str]) -> Tuple[List[int], List[str]]:
+        """
+        Read-only ids(): (id per counterparty, display names by id).
+        Spellings the directory has not seen get provisional ids after the
+        known ones, one per spelling key, named as ids() would name them;
+        nothing is saved.
+        """
+        with self._lock:
+            self._reload()
+            names = list(self.names)
+            resolved, keys = self._resolved, self.keys
+            extra: Dict[str, int] = {}
+            out = []
+            for c in counterparties:
+                mid = resolved.get(c)
+                if mid is None:
+                    key = merchant_key(c)
+                    mid = keys.get(key)
+                    if mid is not None:
+                        resolved[c] = mid
+                    else:
+                        mid = extra.get(key)
+                        if mid is None:
+                            mid = extra[key] = len(names)
+                            names.append(" ".join(c.split()))
+                out.append(mid)
+            return out, names
+
+    def find(self, name: str) -> Optional[int]:
+        """Merchant id for a spelling, or None; never assigns (rule lookups)."""
+        mid = self._resolved.get(name)
+        if mid is None:
+            with self._lock:
+                self._reload()
+                mid = self.keys.get(merchant_key(name))
+        return mid
+
+    def find_many(self, names: Iterable[str]) -> Dict[str, Optional[int]]:
+        """find() for many spellings under one reload; never assigns."""
+        with self._lock:
+            self._reload()
+            return {
+                n: self._resolved.get(n, self.keys.get(merchant_key(n)))
+                for n in dict.fromkeys(names)
+            }
+
+    def revision(self) -> int:
+        """Changes whenever ids, names or aliases change (here or on disk)."""
+        with self._lock:
+            self._reload()
+            return self._revision
+
+    def name(self, merchant: int) -> str:
+        return self.names[merchant]
+
+    def key(self, merchant: int) -> str:
+        return merchant_key(self.names[merchant])
+
+    # ---------- aliases ----------
+
+    def alias(self, spelling: str, target: Union[str, int]) -> int:
+        """
+        Make ``spelling`` resolve to ``target`` (a merchant id or any known
+        spelling). If the spelling already was a merchant of its own, all of
+        that merchant's spellings move with it. Returns the target id.
+        """
+        with self._locked():
+            if isinstance(target, int):
+                if not 0 <= target < len(self.names):
+                    raise KeyError(f"Unknown merchant id: {target}")
+                to = target
+            else:
+                to = self.keys.get(merchant_key(target))
+                if to is None:
+                    raise KeyError(f"Unknown merchant: {target}")
+            key = merchant_key(spelling)
+            old = self.keys.get(key)
+            if old is not None and old != to:
+                for k, mid in self.keys.items():
+                    if mid == old:
+                        self.keys[k] = to
+            self.keys[key] = to
+            self._save()
+            return to
+
+    def aliases(self) -> Dict[str, List[str]]:
+        """Display name → other spelling keys that resolve to it."""
+        out: Dict[str, List[str]] = {}
+        for key, mid in self.keys.items():
+            if key != self.key(mid):
+                out.setdefault(self.names[mid], []).append(key)
+        return out
+
+    # ---------- persistence ----------
+
+    def _assign(self, counterparties: List[str]) -> None:
+        with self._locked():
+            fresh = False
+            for c in counterparties:
+                if c in self._resolved:
+                    continue
+                key = merchant_key(c)
+                mid = self.keys.get(key)
+                if mid is None:
+                    mid = self.keys[key] = len(self.names)
+                    self.names.append(" ".join(c.split()))
+                    fresh = True
+                self._resolved[c] = mid
+            if fresh:
+                self._save()
+
+    @contextmanager
+    def _locked(self):
+        """Write section: thread lock, flock, then a fresh read of the file."""
+        with self._lock, (file_lock(self.lock_path) if self.path else nullcontext()):
+            self._reload()
+            yield
+
+    def _stat_key(self):
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _reload(self) -> None:
+        if self.path is None:
+            return
+        key = self._stat_key()
+        if key == self._file_key:
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        self.names = list(data.get("merchants", []))
+        self.keys = dict(data.get("keys", {}))
+        self._resolved = {}
+        self._file_key = key
+        self._revision += 1
+
+    def _save(self) -> None:
+        self._resolved = {c: self.keys[merchant_key(c)] for c in self._resolved}
+        self._revision += 1
+        if self.path is None:
+            return
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"merchants": self.names, "keys": self.keys}, f, indent=2)
+        tmp.replace(self.path)
+        self._file_key = self._stat_key()
@@ -0,0 +1,27 @@
+"""
+Money is held as integer paise (1/100 rupee) everywhere below the API:
+Transaction.paise, the stores and TransactionTable. Sums are exact
+integer sums; rupees() turns a total back into the float the JSON API
+and CLI render.
+"""
+
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Union
+
+
+def to_paise(value: Union[str, int, float, Decimal]) -> int:
+    """
+    Rupees → paise, exactly: "1,234.50" → 123450, 99.99 → 9999.
+    Floats go through their shortest repr, so a float parsed from a
+    two-decimal string converts back without drift.
+    """
+    if isinstance(value, str):
+        value = value.replace(",", "").strip()
+    elif isinstance(value, float):
+        value = repr(value)
+    return int((Decimal(value) * 100).to_integral_value(ROUND_HALF_UP))
+
+
+def rupees(paise: int) -> float:
+    """Paise → rupees for display; the same float as parsing the decimal string."""
+    return paise / 100
@@ -75,15 +75,12 @@ def apply_micro_rules(txn: Transaction) -> Transaction:
 
     # Helper to create auto-tagged transaction
     def auto_tag(category: str) -> Transaction:
-        return Transaction(
-            **{
-                **txn.__dict__,
-                "counterparty": normalized_counterparty,
-                "scope": "personal",
-                "category": [category],
-                "reviewed": True,
-                "extras": extras,
-            }
+        return txn.evolve(
+            counterparty=normalized_counterparty,
+            scope="personal",
+            category=(category,),
+            reviewed=True,
+            extras=extras,
         )
 
     # ---- noise (0-10) ----
@@ -103,10 +100,7 @@ def apply_micro_rules(txn: Transaction) -> Transaction:
         return auto_tag("daily")
 
     # ---- default (>100) - no auto-tagging ----
-    return Transaction(
-        **{
-            **txn.__dict__,
-            "counterparty": normalized_counterparty,
-            "extras": extras,
-        }
+    return txn.evolve(
+        counterparty=normalized_counterparty,
+        extras=extras,
     )
@@ -0,0 +1,184 @@
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from fie.core.merchants import MerchantDirectory
+from fie.core.money import rupees
+from fie.core.transaction import Transaction
+
+
+US_PER_DAY = 86_400 * 1_000_000
+EPOCH_DATE = date(1970, 1, 1)
+
+# encoded column → attribute holding its labels
+LABELS = {
+    "scope": "scopes",
+    "category": "categories",
+    "counterparty": "counterparties",
+    "mode": "modes",
+    "merchant": "merchants",
+}
+
+
+def to_us(dt: datetime) -> int:
+    """Naive datetime → microseconds since 1970-01-01 (no timezone shift)."""
+    return int(np.datetime64(dt, "us").astype(np.int64))
+
+
+def day_label(day: int, fmt: str = "%Y-%m-%d") -> str:
+    return (EPOCH_DATE + timedelta(days=int(day))).strftime(fmt)
+
+
+def month_label(month: int) -> str:
+    return f"{1970 + month // 12:04d}-{month % 12 + 1:02d}"
+
+
+def _encode(values: Iterable) -> Tuple[np.ndarray, List]:
+    """Dictionary-encode values into int32 codes (first-seen order)."""
+    lookup: Dict = {}
+    codes = np.fromiter(
+        (lookup.setdefault(v, len(lookup)) for v in values), dtype=np.int32
+    )
+    return codes, list(lookup)
+
+
+class TransactionTable:
+    """
+    Read-only columnar view over a sequence of transactions.
+
+    Numeric fields are NumPy arrays, amounts as int64 paise (``paise``,
+    and ``signed``: negative for debits); scope, first category, counterparty
+    and mode are dictionary-encoded int32 columns whose labels live in
+    ``scopes``, ``categories``, ``counterparties`` and ``modes``.
+    Untagged transactions have category label ``None``.
+
+    ``merchant`` holds each row's merchant id from the MerchantDirectory
+    (an in-memory one if none is given, see MerchantDirectory.lookup);
+    its labels, ``merchants``, are the display names indexed by id.
+
+    Reductions add paise exactly and return rupees. Per-group sums go
+    through np.bincount, whose float64 accumulator is exact for integers
+    below 2**53 paise.
+    """
+
+    def __init__(self, txns: Sequence[Transaction], merchants: Optional[MerchantDirectory] = None):
+        self.txns = txns
+        n = len(txns)
+
+        self.paise = np.fromiter((t.paise for t in txns), dtype=np.int64, count=n)
+        self.ts = np.array([t.datetime for t in txns], dtype="datetime64[us]").astype(np.int64)
+        self.is_debit = np.fromiter((t.direction == "debit" for t in txns), dtype=bool, count=n)
+        self.reviewed = np.fromiter((t.reviewed for t in txns), dtype=bool, count=n)
+
+        self.scope, self.scopes = _encode(t.scope for t in txns)
+        self.category, self.categories = _encode(
+            t.category[0] if t.category else None for t in txns
+        )
+        self.counterparty, self.counterparties = _encode(t.counterparty for t in txns)
+        self.mode, self.modes = _encode(t.mode for t in txns)
+
+        # One directory lookup per distinct counterparty, then a gather.
+        directory = merchants if merchants is not None else MerchantDirectory()
+        ids, self.merchants = directory.lookup(self.counterparties)
+        self.merchant = np.array(ids, dtype=np.int32)[self.counterparty]
+        self.merchant_revision = directory.revision()
+
+        self.signed = np.where(self.is_debit, -self.paise, self.paise)
+        self.day = self.ts // US_PER_DAY
+        self.month = (
+            self.ts.astype("datetime64[us]").astype("datetime64[M]").astype(np.int64)
+        )
+
+    def __len__(self) -> int:
+        return len(self.txns)
+
+    # ---------- masks ----------
+
+    def all(self) -> np.ndarray:
+        return np.ones(len(self), dtype=bool)
+
+    def since(self, start: datetime) -> np.ndarray:
+        return self.ts >= to_us(start)
+
+    def between(self, start: datetime, end: datetime) -> np.ndarray:
+        return (self.ts >= to_us(start)) & (self.ts <= to_us(end))
+
+    def in_month(self, year: int, month: int) -> np.ndarray:
+        return self.month == (year - 1970) * 12 + (month - 1)
+
+    def in_year(self, year: int) -> np.ndarray:
+        return self.month // 12 == year - 1970
+
+    def scope_is(self, *names: str) -> np.ndarray:
+        codes = [self.scopes.index(s) for s in names if s in self.scopes]
+        return np.isin(self.scope, codes)
+
+    # ---------- reductions ----------
+
+    def sum(self, mask: np.ndarray) -> float:
+        return rupees(int(self.paise[mask].sum()))
+
+    def totals_by(
+        self, column: str, mask: np.ndarray, default: Optional[str] = None
+    ) -> Dict[str, float]:
+        """Sum of amount per label of a dictionary-encoded column, present labels only."""
+        return {label: rupees(p) for label, p in self.paise_by(column, mask, default).items()}
+
+    def paise_by(
+        self, column: str, mask: np.ndarray, default: Optional[str] = None
+    ) -> Dict[str, int]:
+        """totals_by() in paise, for adding to other paise totals before display."""
+        codes = getattr(self, column)[mask]
+        labels = getattr(self, LABELS[column])
+        sums = np.bincount(codes, weights=self.paise[mask], minlength=len(labels))
+        counts = np.bincount(codes, minlength=len(labels))
+
+        paise: Dict[str, int] = {}
+        for code in np.flatnonzero(counts):
+            label = labels[code]
+            label = default if label is None else label
+            paise[label] = paise.get(label, 0) + int(sums[code])
+        return paise
+
+    def totals_by_day(
+        self, mask: np.ndarray, fmt: str = "%Y-%m-%d", weights: Optional[np.ndarray] = None
+    ) -> Dict[str, float]:
+        """
+        Sum per date label, in ascending date order. ``fmt`` may group
+        several days into one label ("%Y-%m", "%Y-W%W"). ``weights`` are
+        paise (default ``paise``; ``signed`` for net flow).
+        """
+        paise = self.paise_by_day(mask, fmt, weights)
+        return {label: rupees(p) for label, p in paise.items()}
+
+    def cumulative_by_day(self, mask: np.ndarray, fmt: str = "%Y-%m-%d") -> Dict[str, float]:
+        """Running total of totals_by_day(mask, fmt), accumulated in paise."""
+        paise = self.paise_by_day(mask, fmt)
+        return {label: rupees(p) for label, p in zip(paise, accumulate(paise.values()))}
+
+    def paise_by_day(
+        self, mask: np.ndarray, fmt: str = "%Y-%m-%d", weights: Optional[np.ndarray] = None
+    ) -> Dict[str, int]:
+        """totals_by_day() in paise."""
+        weights = self.paise if weights is None else weights
+        days, inverse = np.unique(self.day[mask], return_inverse=True)
+        sums = np.bincount(inverse, weights=weights[mask], minlength=len(days))
+
+        paise: Dict[str, int] = {}
+        for day, total in zip(days, sums):
+            label = day_label(day, fmt)
+            paise[label] = paise.get(label, 0) + int(total)
+        return paise
+
+    def argmax(self, mask: np.ndarray) -> Optional[int]:
+        """Row index of the first largest amount under mask."""
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return None
+        return int(rows[np.argmax(self.paise[rows])])
+
+
+def top(totals: Dict[str, float], n: int) -> List[Tuple[str, float]]:
+    return sorted(totals.items(), key=lambda x: -x[1])[:n]
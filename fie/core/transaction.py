@@ -1,15 +1,16 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Tuple
 import hashlib
+import sys
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Transaction:
     # ---------------- KEY FIELDS ----------------
     id: str
     datetime: datetime
-    amount: float
+    paise: int                  # amount in paise (1/100 rupee), always > 0
     direction: str              # "credit" | "debit"
     counterparty: str
     mode: str                   # UPI | IMPS | CASH | INTERNAL | UNKNOWN
@@ -19,16 +20,87 @@ class Transaction:
 
     # ---------------- CLASSIFICATION ----------------
     scope: str = "unknown"
-    category: List[str] = field(default_factory=list)
+    category: Tuple[str, ...] = ()
 
     # ---------------- EXTRA METADATA ----------------
     extras: Dict = field(default_factory=dict)
 
     def __post_init__(self):
-        if self.amount <= 0:
-            raise ValueError("Amount must be positive")
-        if self.direction not in ("credit", "debit"):
-            raise ValueError("Invalid direction")
+        _check(self.paise, self.direction)
+
+        # Low-cardinality strings repeat across every record: share one
+        # copy per value instead of one per parsed row.
+        setattr_ = object.__setattr__
+        setattr_(self, "direction", sys.intern(self.direction))
+        setattr_(self, "mode", sys.intern(self.mode))
+        setattr_(self, "scope", sys.intern(self.scope))
+        setattr_(self, "counterparty", sys.intern(self.counterparty))
+        category = self.category or ()
+        if isinstance(category, str):
+            category = (category,)
+        setattr_(self, "category", tuple(sys.intern(c) for c in category))
+
+    @classmethod
+    def trusted(
+        cls,
+        id: str,
+        datetime: datetime,
+        paise: int,
+        direction: str,
+        counterparty: str,
+        mode: str,
+        reviewed: bool = False,
+        scope: str = "unknown",
+        category=(),
+        extras: Dict = None,
+    ) -> "Transaction":
+        """
+        Build from fields already known to be valid (store rows, copies of
+        a validated Transaction): skips __init__ and the paise/direction
+        checks. Strings are still interned; category must be a list/tuple.
+        """
+        t = _new(cls)
+        _set_id(t, id)
+        _set_datetime(t, datetime)
+        _set_paise(t, paise)
+        _set_direction(t, _intern(direction))
+        _set_counterparty(t, _intern(counterparty))
+        _set_mode(t, _intern(mode))
+        _set_reviewed(t, reviewed)
+        _set_scope(t, _intern(scope))
+        _set_category(t, tuple(map(_intern, category or ())))
+        _set_extras(t, {} if extras is None else extras)
+        return t
+
+    def evolve(self, **changes) -> "Transaction":
+        """
+        dataclasses.replace() through trusted(): only a changed paise or
+        direction is re-checked.
+        """
+        unknown = changes.keys() - _FIELDS
+        if unknown:
+            raise TypeError(f"Unknown Transaction fields: {sorted(unknown)}")
+        if "paise" in changes or "direction" in changes:
+            _check(changes.get("paise", self.paise), changes.get("direction", self.direction))
+        get = changes.get
+        category = get("category", self.category)
+        return Transaction.trusted(
+            get("id", self.id),
+            get("datetime", self.datetime),
+            get("paise", self.paise),
+            get("direction", self.direction),
+            get("counterparty", self.counterparty),
+            get("mode", self.mode),
+            get("reviewed", self.reviewed),
+            get("scope", self.scope),
+            (category,) if isinstance(category, str) else category,
+            get("extras", self.extras),
+        )
+
+    @property
+    def amount(self) -> float:
+        """Rupees, for display and rupee thresholds; sum paise, not this."""
+        return self.paise / 100
 
     @staticmethod
     def compute_id(
@@ -40,6 +112,8 @@ class Transaction:
         raw_txn: str,
         source_file: str,
     ) -> str:
+        # ``amount`` is rupees (rupees(paise)): ids predate integer paise
+        # and must not change for re-imported statements.
         raw = (
             f"{datetime.isoformat()}|"
             f"{amount}|"
@@ -51,16 +125,54 @@ class Transaction:
         )
         return hashlib.sha256(raw.encode()).hexdigest()
 
+    def fingerprint(self) -> str:
+        """
+        Content-only key of the bank entry: date and time, amount,
+        direction, cheque/UPI reference and running balance. Unlike the id
+        it leaves out the source file and the parsed counterparty, so the
+        same entry read from another statement gets the same fingerprint.
+        Needs the cold extras (balance, chq_id) to be present.
+        """
+        balance = self.extras.get("balance")
+        raw = (
+            f"{self.datetime.isoformat()}|"
+            f"{self.paise}|"
+            f"{self.direction}|"
+            f"{self.extras.get('chq_id') or ''}|"
+            f"{'' if balance is None else round(balance * 100)}"
+        )
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
     def to_dict(self) -> dict:
         return {
             "id": self.id,
             "datetime": self.datetime.isoformat(),
-            "amount": self.amount,
+            "paise": self.paise,
             "direction": self.direction,
             "counterparty": self.counterparty,
             "mode": self.mode,
             "reviewed": self.reviewed,
             "scope": self.scope,
-            "category": self.category,
+            "category": list(self.category),
             "extras": self.extras,
         }
+
+
+def _check(paise: int, direction: str) -> None:
+    if not isinstance(paise, int) or isinstance(paise, bool):
+        raise TypeError("Amount must be integer paise")
+    if paise <= 0:
+        raise ValueError("Amount must be positive")
+    if direction not in ("credit", "debit"):
+        raise ValueError("Invalid direction")
+
+
+_FIELDS = tuple(Transaction.__dataclass_fields__)
+_new = object.__new__
+_intern = sys.intern
+# Slot descriptors' setters, bound once: several times cheaper than the
+# frozen dataclass __init__ or object.__setattr__ by name.
+(
+    _set_id, _set_datetime, _set_paise, _set_direction, _set_counterparty,
+    _set_mode, _set_reviewed, _set_scope, _set_category, _set_extras,
+) = (Transaction.__dict__[f].__set__ for f in _FIELDS)
@@ -1,16 +1,23 @@
 # fie/ingest/canara.py
 
 import json
+import multiprocessing
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, time
 from pathlib import Path
 import pdfplumber
 
+from fie.core.money import rupees, to_paise
 from fie.core.transaction import Transaction
 
 
 # ================= CONFIG =================
 
+# Bump whenever a change to this module changes what a statement parses
+# to: the ingest manifest then lets already-imported files be re-parsed.
+PARSER_VERSION = 1
+
 COLS = {
     "DATE":        (20,  90),
     "PART":        (100, 300),
@@ -177,7 +184,7 @@ def build_transaction(words, source_file: str) -> Transaction | None:
     counterparty = parse_counterparty(raw_txn, mode)
     direction = "credit" if dep else "debit"
 
-    amount = float((dep or wd).replace(",", ""))
+    paise = to_paise(dep or wd)
     balance = float(bal.replace(",", "")) if bal else None
 
     # ---- datetime with time ----
@@ -187,7 +194,7 @@ def build_transaction(words, source_file: str) -> Transaction | None:
 
     txn_id = Transaction.compute_id(
         datetime=txn_dt,
-        amount=amount,
+        amount=rupees(paise),
         direction=direction,
         counterparty=counterparty,
         mode=mode,
@@ -206,7 +213,7 @@ def build_transaction(words, source_file: str) -> Transaction | None:
     return Transaction(
         id=txn_id,
         datetime=txn_dt,
-        amount=amount,
+        paise=paise,
         direction=direction,
         counterparty=counterparty,
         mode=mode,
@@ -216,66 +223,136 @@ def build_transaction(words, source_file: str) -> Transaction | None:
 
 # ================= MAIN PARSER =================
 
-def parse_canara_pdf(pdf_path: str) -> list[Transaction]:
-    transactions: list[Transaction] = []
+# Pages per task when words are extracted in worker processes
+PAGES_PER_TASK = 8
+
+
+def page_words(page) -> list[dict]:
+    """
+    A page's words in reading order (by ``top``), trimmed to the keys the
+    parser reads so they are cheap to send back from a worker process.
+    The page's layout caches are released afterwards.
+    """
+    words = page.extract_words(use_text_flow=True)
+    page.close()
+    words.sort(key=lambda w: w["top"])
+    return [{"text": w["text"], "x0": w["x0"], "x1": w["x1"], "top": w["top"]} for w in words]
+
 
+def _iter_pages(pdf_path: str, start: int = 0, stop: int = None):
+    """page_words() for pages[start:stop], one page at a time."""
     with pdfplumber.open(pdf_path) as pdf:
-        state = "PRE_TABLE"
-        seen_headers = set()
-        current_txn = []
-        waiting_for_chq = False
+        for page in pdf.pages[start:stop]:
+            yield page_words(page)
 
-        for page in pdf.pages:
-            words = page.extract_words(use_text_flow=True)
-            words.sort(key=lambda w: w["top"])
 
-            for w in words:
-                txt = w["text"]
-                column = col(w)
+def _extract_pages(pdf_path: str, start: int, stop: int) -> list[list[dict]]:
+    """page_words() for pages[start:stop] (worker task)."""
+    return list(_iter_pages(pdf_path, start, stop))
 
-                # footer
-                if txt.lower() == "page":
-                    continue
-                if txt.isdigit() and column != "PART":
-                    continue
 
-                # header detection
-                if state == "PRE_TABLE":
-                    if txt in {"Date","Particulars","Deposits","Withdrawals","Balance"}:
-                        seen_headers.add(txt)
-                        if len(seen_headers) == 5:
-                            state = "READY"
-                    continue
+def page_count(pdf_path: str) -> int:
+    """Number of pages, without extracting any text."""
+    with pdfplumber.open(pdf_path) as pdf:
+        return len(pdf.pages)
 
-                if txt.lower() in {"date","particulars","deposits","withdrawals","balance"}:
-                    continue
 
-                # start txn
-                if state == "READY":
-                    if txt == "Chq:":
-                        continue
-                    state = "IN_TXN"
-                    current_txn = []
+def _parallel_pages(pdf_path: str, jobs: int):
+    """Per-page words in page order, extracted in page ranges by ``jobs`` processes."""
+    n = page_count(pdf_path)
+    ranges = [(i, min(i + PAGES_PER_TASK, n)) for i in range(0, n, PAGES_PER_TASK)]
+    if len(ranges) <= 1:
+        # One task: a pool would only add its start-up to the same work.
+        yield from _iter_pages(pdf_path)
+        return
+    with ProcessPoolExecutor(max_workers=min(jobs, len(ranges))) as pool:
+        chunks = pool.map(_extract_pages, [pdf_path] * len(ranges), *zip(*ranges))
+        for chunk in chunks:
+            yield from chunk
+
+
+def parse_canara_pdf(pdf_path: str, jobs: int = 1) -> list[Transaction]:
+    """All transactions of a Canara statement (see iter_canara_pdf)."""
+    return list(iter_canara_pdf(pdf_path, jobs))
 
-                # chq marker
-                if state == "IN_TXN" and txt == "Chq:":
-                    waiting_for_chq = True
-                    continue
 
-                # chq id → END TXN
-                if state == "IN_TXN" and waiting_for_chq:
-                    current_txn.append(w)
+def iter_canara_pdf(pdf_path: str, jobs: int = 1):
+    """
+    Yield a Canara statement's transactions as its pages are read; each
+    page's words are dropped once parsed and its pdfplumber caches right
+    after extraction, so memory does not grow with the page count.
+
+    With ``jobs`` > 1 the page text is extracted by that many worker
+    processes; the state machine still runs once over the pages in order,
+    so a transaction split across a page break is stitched exactly as in
+    the sequential parse. Called from a worker process it always parses
+    sequentially.
+    """
+    # In a worker of a file pool the CPUs are taken already: no nested pool.
+    if jobs > 1 and multiprocessing.parent_process() is None:
+        pages = _parallel_pages(pdf_path, jobs)
+    else:
+        pages = _iter_pages(pdf_path)
+    return parse_pages(pages, pdf_path)
 
-                    txn = build_transaction(current_txn, pdf_path)
-                    if txn:
-                        transactions.append(txn)
 
-                    current_txn = []
-                    waiting_for_chq = False
-                    state = "READY"
+def parse_pages(pages, pdf_path: str):
+    """
+    Yield transactions from per-page word lists (page_words() output, in
+    page order). The state carries across pages: a transaction runs until
+    its "Chq:" id, wherever the page breaks.
+    """
+    state = "PRE_TABLE"
+    seen_headers = set()
+    current_txn = []
+    waiting_for_chq = False
+
+    for words in pages:
+        for w in words:
+            txt = w["text"]
+            column = col(w)
+
+            # footer
+            if txt.lower() == "page":
+                continue
+            if txt.isdigit() and column != "PART":
+                continue
+
+            # header detection
+            if state == "PRE_TABLE":
+                if txt in {"Date","Particulars","Deposits","Withdrawals","Balance"}:
+                    seen_headers.add(txt)
+                    if len(seen_headers) == 5:
+                        state = "READY"
+                continue
+
+            if txt.lower() in {"date","particulars","deposits","withdrawals","balance"}:
+                continue
+
+            # start txn
+            if state == "READY":
+                if txt == "Chq:":
                     continue
+                state = "IN_TXN"
+                current_txn = []
+
+            # chq marker
+            if state == "IN_TXN" and txt == "Chq:":
+                waiting_for_chq = True
+                continue
+
+            # chq id → END TXN
+            if state == "IN_TXN" and waiting_for_chq:
+                current_txn.append(w)
+
+                txn = build_transaction(current_txn, pdf_path)
+                if txn:
+                    yield txn
 
-                if state == "IN_TXN":
-                    current_txn.append(w)
+                current_txn = []
+                waiting_for_chq = False
+                state = "READY"
+                continue
 
-    return transactions
+            if state == "IN_TXN":
+                current_txn.append(w)
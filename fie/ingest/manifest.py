@@ -0,0 +1,136 @@
+"""
+Ingest manifest: which statement files have already been imported.
+
+Entries are keyed by the SHA-256 of the file bytes, so a renamed or
+re-uploaded copy of a statement is recognised too:
+
+    {"files": {sha256: {"name", "parser", "count", "first", "last", "ingested_at"}},
+     "paths": {path: [size, mtime_ns, sha256]}}
+
+A file whose entry was written by the current PARSER_VERSION is skipped
+before pdfplumber opens it; a parser change makes every file eligible
+again. ``paths`` caches the digest per path by (size, mtime), so an
+unchanged directory is checked without reading the files at all.
+"""
+
+import hashlib
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fie.core.transaction import Transaction
+from fie.ingest.canara import PARSER_VERSION
+from fie.storage.locking import file_lock
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class IngestManifest:
+    """The manifest file at ``path`` (see the module docstring)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock_path = path.with_suffix(".lock")
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        data.setdefault("files", {})
+        data.setdefault("paths", {})
+        return data
+
+    def _write(self, data: dict) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        tmp.replace(self.path)
+
+    def seen(self, sha: str) -> Optional[dict]:
+        """The entry for these bytes if the current parser already ingested them."""
+        entry = self._read()["files"].get(sha)
+        return entry if entry and entry.get("parser") == PARSER_VERSION else None
+
+    def select(
+        self, paths: Iterable[Path], force: bool = False
+    ) -> Tuple[Dict[str, str], List[Tuple[Path, dict]]]:
+        """
+        Split ``paths`` into ({path: sha256} still to ingest, [(path, entry)]
+        already ingested; empty with ``force``). Digests of files unchanged
+        since the last check come from the path cache; new ones are cached
+        for next time.
+        """
+        with self._lock, file_lock(self.lock_path):
+            data = self._read()
+            cache = data["paths"]
+            todo, done, shas = {}, [], set()
+            dirty = False
+            for path in paths:
+                st = path.stat()
+                key = str(path.resolve())
+                cached = cache.get(key)
+                if cached and cached[:2] == [st.st_size, st.st_mtime_ns]:
+                    sha = cached[2]
+                else:
+                    sha = file_sha256(path)
+                    cache[key] = [st.st_size, st.st_mtime_ns, sha]
+                    dirty = True
+                entry = data["files"].get(sha)
+                if entry and entry.get("parser") == PARSER_VERSION and not force:
+                    done.append((path, entry))
+                elif sha not in shas:  # a second copy in the same batch is not parsed again
+                    todo[str(path)] = sha
+                    shas.add(sha)
+            if dirty:
+                self._write(data)
+        return todo, done
+
+    def record(self, files: Dict[str, str], stats: Dict[str, dict]) -> None:
+        """
+        Mark ``files`` ({path: sha256}) as ingested by the current parser,
+        with the per-path ``stats`` gathered by tally().
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self._lock, file_lock(self.lock_path):
+            data = self._read()
+            for path, sha in files.items():
+                s = stats.get(path, {})
+                data["files"][sha] = {
+                    "name": Path(path).name,
+                    "parser": PARSER_VERSION,
+                    "count": s.get("count", 0),
+                    "first": s.get("first"),
+                    "last": s.get("last"),
+                    "ingested_at": now,
+                }
+            self._write(data)
+
+
+def tally(txns: Iterable[Transaction], stats: Dict[str, dict]) -> Iterator[Transaction]:
+    """
+    Pass ``txns`` through, counting them and their date range per source
+    file into ``stats`` (path → {"count", "first", "last"}).
+    """
+    for t in txns:
+        source = t.extras.get("source_file")
+        s = stats.get(source)
+        if s is None:
+            s = stats[source] = {"count": 0, "first": None, "last": None}
+        s["count"] += 1
+        day = t.datetime.date().isoformat()
+        if s["first"] is None or day < s["first"]:
+            s["first"] = day
+        if s["last"] is None or day > s["last"]:
+            s["last"] = day
+        yield t
@@ -0,0 +1,81 @@
+"""
+Parse many statements at once in a process pool.
+
+PDF text extraction is CPU-bound pure Python (pdfplumber), so threads do
+not help; each file is parsed in a worker process and the Transactions
+are pickled back. Results are concatenated in the order of ``paths``
+whatever order the workers finish in, so a batch always ingests the same
+way. A single file is instead split into page ranges (iter_canara_pdf
+with ``jobs``); a file pool's workers parse their file sequentially, so
+the two never nest, and neither starts more workers than there are CPUs.
+engine.ingest() takes iter_many() directly and stores
+the stream in chunks.
+
+Starting a pool costs more than parsing a statement or two, so a batch
+of few files and pages (inline_jobs()) is parsed in-process unless
+``jobs`` is given explicitly.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Sequence
+
+from fie import config
+from fie.core.transaction import Transaction
+from fie.ingest.canara import iter_canara_pdf, page_count, parse_canara_pdf
+
+
+def default_jobs() -> int:
+    """ingest.jobs from config; 0 or unset means one per CPU."""
+    jobs = int(config.get("ingest.jobs", 0) or 0)
+    return jobs if jobs > 0 else os.cpu_count() or 1
+
+
+def _cap(jobs: int) -> int:
+    """No more worker processes than CPUs, whatever was asked for."""
+    return max(1, min(jobs, os.cpu_count() or 1))
+
+
+def inline_jobs(paths: Sequence[str]) -> Optional[int]:
+    """
+    1 (parse in this process) when ``paths`` has at most ingest.inline_files
+    files and ingest.inline_pages pages in all, else None (default_jobs()).
+    """
+    if len(paths) > int(config.get("ingest.inline_files", 4)):
+        return None
+    limit = int(config.get("ingest.inline_pages", 40))
+    pages = 0
+    for p in paths:
+        pages += page_count(str(p))
+        if pages > limit:
+            return None
+    return 1
+
+
+def parse_many(paths: Sequence[str], jobs: Optional[int] = None) -> List[Transaction]:
+    """Parse every PDF in ``paths`` with up to ``jobs`` processes (see iter_many)."""
+    return list(iter_many(paths, jobs))
+
+
+def iter_many(paths: Sequence[str], jobs: Optional[int] = None) -> Iterator[Transaction]:
+    """
+    parse_many() as a generator for engine.ingest(). Parsed in-process
+    (one file, or one job) it streams page by page; from a pool it yields
+    each file's transactions as that file, in order, is done. Without
+    ``jobs``, a batch inline_jobs() finds small is parsed in-process.
+    """
+    paths = [str(p) for p in paths]
+    if jobs is None:
+        jobs = inline_jobs(paths)
+    jobs = _cap(jobs or default_jobs())
+    if len(paths) == 1:
+        yield from iter_canara_pdf(paths[0], jobs)
+        return
+    jobs = min(jobs, len(paths))
+    if jobs <= 1:
+        for p in paths:
+            yield from iter_canara_pdf(p)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for txns in pool.map(parse_canara_pdf, paths):
+            yield from txns
@@ -2089,9 +2089,10 @@ function hideUpload() {
   document.getElementById('uploadProgress').style.display = 'none';
 }
 
-async function handleUpload(file) {
-  if (!file || !file.name.endsWith('.pdf')) {
-    showToast('Please select a PDF file', 'error');
+async function handleUpload(files) {
+  files = Array.from(files || []);
+  if (!files.length || !files.every(f => f.name.endsWith('.pdf'))) {
+    showToast('Please select PDF files only', 'error');
     return;
   }
   
@@ -2100,7 +2101,7 @@ async function handleUpload(file) {
   document.getElementById('progressText').textContent = 'Uploading...';
   
   const fd = new FormData();
-  fd.append('file', file);
+  files.forEach(f => fd.append('file', f));
   
   try {
     document.getElementById('progressFill').style.width = '60%';
@@ -2110,7 +2111,9 @@ async function handleUpload(file) {
     document.getElementById('progressFill').style.width = '100%';
     
     if (j.ok) {
-      const autoTagMsg = j.auto_tagged > 0 ? ` (${j.auto_tagged} auto-tagged)` : '';
+      const skipped = (j.skipped || []).length;
+      const autoTagMsg = (j.auto_tagged > 0 ? ` (${j.auto_tagged} auto-tagged)` : '') +
+        (skipped ? ` · ${skipped} file(s) already imported` : '');
       document.getElementById('progressText').textContent = `✓ Uploaded ${j.count} transactions${autoTagMsg}`;
       showToast(`Imported ${j.count} transactions${autoTagMsg}`, 'success');
       setTimeout(() => {
@@ -2319,7 +2322,7 @@ document.addEventListener('DOMContentLoaded', () => {
   document.getElementById('showUploadModal').addEventListener('click', showUpload);
   document.getElementById('closeUpload').addEventListener('click', hideUpload);
   document.getElementById('fileInput').addEventListener('change', (e) => {
-    if (e.target.files[0]) handleUpload(e.target.files[0]);
+    if (e.target.files.length) handleUpload(e.target.files);
   });
   
   // Drag and drop
@@ -2334,7 +2337,7 @@ document.addEventListener('DOMContentLoaded', () => {
   uploadZone.addEventListener('drop', (e) => {
     e.preventDefault();
     uploadZone.classList.remove('dragover');
-    if (e.dataTransfer.files[0]) handleUpload(e.dataTransfer.files[0]);
+    if (e.dataTransfer.files.length) handleUpload(e.dataTransfer.files);
   });
   
   // Export
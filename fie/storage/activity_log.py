@@ -0,0 +1,226 @@
+"""
+Append-only activity log split into size-rotated JSONL segments.
+
+Each segment ``log-NNNNNN.jsonl`` has a sidecar ``log-NNNNNN.idx`` with
+one ``timestamp<TAB>action<TAB>offset`` line per entry. Appending writes
+one line to each (no read-back, no rewrite). Queries load the indexes,
+incrementally for the active segment, then bisect on timestamp, pick
+positions by action, and seek straight to the matching entries.
+"""
+
+import bisect
+import json
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from fie.storage.locking import file_lock
+
+
+class _SegmentIndex:
+    """Parsed .idx for one segment; extended in place as it grows."""
+
+    __slots__ = ("size", "ts", "actions", "offsets", "by_action")
+
+    def __init__(self):
+        self.size = 0
+        self.ts: List[str] = []
+        self.actions: List[str] = []
+        self.offsets: List[int] = []
+        self.by_action: Dict[str, List[int]] = {}
+
+    def extend(self, blob: bytes) -> None:
+        # Only whole lines; a half-written tail is picked up next time.
+        end = blob.rfind(b"\n") + 1
+        for line in blob[:end].decode().splitlines():
+            ts, action, offset = line.split("\t")
+            self.by_action.setdefault(action, []).append(len(self.ts))
+            self.ts.append(ts)
+            self.actions.append(action)
+            self.offsets.append(int(offset))
+        self.size += end
+
+
+class ActivityLog:
+    """
+    Newest-first activity log under ``directory``.
+
+    A segment is sealed once it reaches ``segment_bytes``; only the newest
+    ``max_segments`` are kept. An old single-file ``activity_logs.json``
+    at ``legacy_path`` is imported once and renamed to ``*.imported``.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        segment_bytes: int = 1024 * 1024,
+        max_segments: int = 20,
+        legacy_path: Optional[Path] = None,
+    ):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        self.lock_path = directory / ".lock"
+        self._indexes: Dict[int, _SegmentIndex] = {}
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if legacy_path is not None and legacy_path.exists():
+            self._import(legacy_path)
+
+    # ---------- segments ----------
+
+    def _segments(self) -> List[int]:
+        return sorted(int(p.stem[4:]) for p in self.directory.glob("log-*.jsonl"))
+
+    def _log_path(self, seg: int) -> Path:
+        return self.directory / f"log-{seg:06d}.jsonl"
+
+    def _idx_path(self, seg: int) -> Path:
+        return self.directory / f"log-{seg:06d}.idx"
+
+    def _index(self, seg: int) -> _SegmentIndex:
+        ix = self._indexes.get(seg)
+        try:
+            with open(self._idx_path(seg), "rb") as f:
+                f.seek(0, 2)
+                if ix is None or f.tell() < ix.size:
+                    # New, or cleared and restarted by another process.
+                    ix = self._indexes[seg] = _SegmentIndex()
+                f.seek(ix.size)
+                blob = f.read()
+        except FileNotFoundError:
+            ix, blob = _SegmentIndex(), b""
+        if blob:
+            ix.extend(blob)
+        return ix
+
+    # ---------- write ----------
+
+    def append(self, action: str, details, user: str = "admin") -> dict:
+        entry = {
+            "id": f"log_{uuid.uuid4().hex[:8]}",
+            "timestamp": datetime.now().isoformat(),
+            "action": action,
+            "details": details,
+            "user": user,
+        }
+        self._write([entry])
+        return entry
+
+    def _write(self, entries: List[dict]) -> None:
+        with self._lock, file_lock(self.lock_path):
+            segments = self._segments()
+            seg = segments[-1] if segments else 1
+            path = self._log_path(seg)
+            offset = path.stat().st_size if path.exists() else 0
+
+            lines, idx_lines = [], []
+            for e in entries:
+                if offset >= self.segment_bytes:
+                    self._flush(seg, lines, idx_lines)
+                    lines, idx_lines = [], []
+                    seg, offset = seg + 1, 0
+                    segments.append(seg)
+                line = json.dumps(e) + "\n"
+                lines.append(line)
+                idx_lines.append(f"{e['timestamp']}\t{e['action']}\t{offset}\n")
+                offset += len(line.encode())
+            self._flush(seg, lines, idx_lines)
+
+            for old in segments[:-self.max_segments]:
+                self._drop(old)
+
+    def _flush(self, seg: int, lines: List[str], idx_lines: List[str]) -> None:
+        if not lines:
+            return
+        # Entry first: an index line never points past the end of its segment.
+        with open(self._log_path(seg), "a") as f:
+            f.write("".join(lines))
+        with open(self._idx_path(seg), "a") as f:
+            f.write("".join(idx_lines))
+
+    def _drop(self, seg: int) -> None:
+        self._log_path(seg).unlink(missing_ok=True)
+        self._idx_path(seg).unlink(missing_ok=True)
+        self._indexes.pop(seg, None)
+
+    def clear(self) -> None:
+        with self._lock, file_lock(self.lock_path):
+            for seg in self._segments():
+                self._drop(seg)
+
+    def _import(self, legacy_path: Path) -> None:
+        try:
+            with open(legacy_path) as f:
+                entries = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            entries = []
+        if entries and not self._segments():
+            self._write(list(reversed(entries)))  # stored newest first
+        legacy_path.rename(legacy_path.with_name(legacy_path.name + ".imported"))
+
+    # ---------- read ----------
+
+    def query(
+        self,
+        action: Optional[str] = None,
+        search: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        limit: Optional[int] = 100,
+    ) -> Tuple[List[dict], int]:
+        """
+        Newest-first (entries, total matches). ``start``/``end`` are ISO
+        timestamps (inclusive, prefix match, so "2025-06-01" works for end
+        of day too). ``search`` is a case-insensitive substring of the
+        action or details.
+        """
+        search = (search or "").lower()
+        end_key = end + "\uffff" if end else None
+        page: List[dict] = []
+        total = 0
+
+        for seg in reversed(self._segments()):
+            ix = self._index(seg)
+            if not ix.ts:
+                continue
+            lo = bisect.bisect_left(ix.ts, start) if start else 0
+            hi = bisect.bisect_right(ix.ts, end_key) if end_key else len(ix.ts)
+            if lo >= hi:
+                continue
+
+            if action:
+                positions = ix.by_action.get(action, [])
+                positions = positions[bisect.bisect_left(positions, lo):bisect.bisect_left(positions, hi)]
+            else:
+                positions = range(lo, hi)
+            positions = positions[::-1]
+
+            if not search:
+                total += len(positions)
+                want = len(positions) if limit is None else max(0, limit - len(page))
+                page += self._read(seg, [ix.offsets[p] for p in positions[:want]])
+                continue
+
+            for entry in self._read(seg, [ix.offsets[p] for p in positions]):
+                if search in str(entry.get("details", "")).lower() or search in entry.get("action", "").lower():
+                    total += 1
+                    if limit is None or len(page) < limit:
+                        page.append(entry)
+
+        return page, total
+
+    def _read(self, seg: int, offsets: List[int]) -> List[dict]:
+        if not offsets:
+            return []
+        with open(self._log_path(seg), "rb") as f:
+            if len(offsets) > 64:
+                blob = f.read()
+                return [json.loads(blob[o:blob.index(b"\n", o)]) for o in offsets]
+            out = []
+            for o in offsets:
+                f.seek(o)
+                out.append(json.loads(f.readline()))
+            return out
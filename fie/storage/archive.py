@@ -0,0 +1,303 @@
+"""
+Cold archive tier: whole calendar years moved out of the live store.
+
+``fie archive`` moves every transaction dated before a cutoff year into
+``<root>/<year>.json.gz`` (gzip JSON, full rows including cold extras,
+written read-only) and deletes them from the store. ``<root>/index.json``
+holds one precomputed summary per archived year, all amounts in paise:
+
+    count, debits, spent, income
+    merchants    counterparty → debit paise
+    categories   first category ("unknown" if untagged) → debit paise
+    monthly      "YYYY-MM" → {"spent", "income"}
+    largest_expense, largest_income   the row (to_dict()) or None
+    scopes       scope → the per-scope breakdown the scope-filtered views use:
+        count, spent, income
+        categories      first category → {"count", "spent", "income"}
+        credit_tags     "cat1|cat2" (all categories) → credit paise
+        merchants       counterparty → debit paise
+        days            "YYYY-MM-DD" → {"spent", "income"}
+        day_categories  "YYYY-MM-DD" → {first category → debit paise}
+
+"All time" views add summary() to what the live table computes, so the
+archived rows themselves are only read back by rows() or, for the years
+a new import touches, by known() when ingest drops already-archived ids.
+"""
+
+import gzip
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from fie.core.transaction import Transaction
+from fie.storage.base import TransactionStore
+from fie.storage.cold import split_extras
+from fie.storage.locking import file_lock
+
+
+INDEX = "index.json"
+
+
+def empty_summary() -> dict:
+    return {
+        "count": 0,
+        "debits": 0,
+        "spent": 0,
+        "income": 0,
+        "merchants": {},
+        "categories": {},
+        "monthly": {},
+        "largest_expense": None,
+        "largest_income": None,
+        "scopes": {},
+    }
+
+
+def _empty_scope() -> dict:
+    return {
+        "count": 0,
+        "spent": 0,
+        "income": 0,
+        "categories": {},
+        "credit_tags": {},
+        "merchants": {},
+        "days": {},
+        "day_categories": {},
+    }
+
+
+def summarize(txns: Iterable[Transaction]) -> dict:
+    """Summary of one year's rows (see the module docstring)."""
+    s = empty_summary()
+    for t in txns:
+        s["count"] += 1
+        month = s["monthly"].setdefault(t.datetime.strftime("%Y-%m"), {"spent": 0, "income": 0})
+        cat = t.category[0] if t.category else "unknown"
+        sc = s["scopes"].setdefault(t.scope, _empty_scope())
+        sc["count"] += 1
+        day_key = t.datetime.strftime("%Y-%m-%d")
+        day = sc["days"].setdefault(day_key, {"spent": 0, "income": 0})
+        by_cat = sc["categories"].setdefault(cat, {"count": 0, "spent": 0, "income": 0})
+        by_cat["count"] += 1
+        if t.direction == "debit":
+            s["debits"] += 1
+            s["spent"] += t.paise
+            month["spent"] += t.paise
+            _add(s["merchants"], t.counterparty, t.paise)
+            _add(s["categories"], cat, t.paise)
+            for totals in (sc, day, by_cat):
+                totals["spent"] += t.paise
+            _add(sc["merchants"], t.counterparty, t.paise)
+            _add(sc["day_categories"].setdefault(day_key, {}), cat, t.paise)
+            largest = "largest_expense"
+        else:
+            s["income"] += t.paise
+            month["income"] += t.paise
+            for totals in (sc, day, by_cat):
+                totals["income"] += t.paise
+            _add(sc["credit_tags"], "|".join(t.category), t.paise)
+            largest = "largest_income"
+        if s[largest] is None or t.paise > s[largest]["paise"]:
+            s[largest] = _hot_dict(t)
+    s["monthly"] = dict(sorted(s["monthly"].items()))
+    return s
+
+
+def combine(summaries: Iterable[dict]) -> dict:
+    """One summary for several years."""
+    out = empty_summary()
+    for s in summaries:
+        for key in ("count", "debits", "spent", "income"):
+            out[key] += s[key]
+        for key in ("merchants", "categories"):
+            for label, paise in s[key].items():
+                _add(out[key], label, paise)
+        for month, sums in s["monthly"].items():
+            m = out["monthly"].setdefault(month, {"spent": 0, "income": 0})
+            m["spent"] += sums["spent"]
+            m["income"] += sums["income"]
+        for key in ("largest_expense", "largest_income"):
+            row = s[key]
+            if row is not None and (out[key] is None or row["paise"] > out[key]["paise"]):
+                out[key] = row
+        _merge(out["scopes"], s["scopes"])
+    out["monthly"] = dict(sorted(out["monthly"].items()))
+    return out
+
+
+def row_to_txn(d: dict) -> Transaction:
+    """Archived to_dict() row → Transaction (stored rows were validated)."""
+    return Transaction.trusted(
+        d["id"],
+        datetime.fromisoformat(d["datetime"]),
+        d["paise"],
+        d["direction"],
+        d["counterparty"],
+        d["mode"],
+        d["reviewed"],
+        d["scope"],
+        d["category"],
+        d["extras"],
+    )
+
+
+class TransactionArchive:
+    """Read-only yearly archives under ``root`` (see the module docstring)."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.lock_path = root / ".lock"
+        self._lock = threading.Lock()
+        self._index: Optional[Dict[str, dict]] = None
+        self._index_key = None
+        self._summary: Optional[dict] = None
+        # year → (file stat key, ids in that year's archive)
+        self._ids: Dict[int, tuple] = {}
+
+    def path(self, year: int) -> Path:
+        return self.root / f"{year:04d}.json.gz"
+
+    # ---------- reading ----------
+
+    def years(self) -> List[int]:
+        return sorted(int(y) for y in self._read_index())
+
+    def summary(self) -> dict:
+        """Combined summary of every archived year."""
+        index = self._read_index()
+        with self._lock:
+            if self._summary is None:
+                self._summary = combine(index.values())
+            return self._summary
+
+    def rows(self, year: int) -> List[Transaction]:
+        """Every archived transaction of ``year``, full extras included."""
+        return [row_to_txn(d) for d in self._read_year(year)]
+
+    def known(self, txns: Iterable[Transaction]) -> Set[str]:
+        """Ids among ``txns`` that are already archived."""
+        by_year: Dict[int, List[str]] = {}
+        for t in txns:
+            by_year.setdefault(t.datetime.year, []).append(t.id)
+        archived = set(self.years())
+        found = set()
+        for year, ids in by_year.items():
+            if year in archived:
+                found.update(self._year_ids(year).intersection(ids))
+        return found
+
+    def _year_ids(self, year: int) -> Set[str]:
+        path = self.path(year)
+        st = path.stat()
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._ids.get(year)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+        ids = {d["id"] for d in self._read_year(year)}
+        with self._lock:
+            self._ids[year] = (key, ids)
+        return ids
+
+    def _read_year(self, year: int) -> List[dict]:
+        try:
+            with gzip.open(self.path(year), "rt") as f:
+                return json.load(f)["transactions"]
+        except FileNotFoundError:
+            return []
+
+    def _read_index(self) -> Dict[str, dict]:
+        path = self.root / INDEX
+        try:
+            st = path.stat()
+            key = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            key = None
+        with self._lock:
+            if self._index is None or key != self._index_key:
+                try:
+                    with open(path) as f:
+                        self._index = json.load(f)["years"]
+                except (FileNotFoundError, json.JSONDecodeError):
+                    self._index = {}
+                self._index_key = key
+                self._summary = None
+            return self._index
+
+    # ---------- archiving ----------
+
+    def archive(self, store: TransactionStore, before_year: int) -> Dict[int, int]:
+        """
+        Move every live transaction dated before ``before_year`` out of
+        ``store`` into its year's archive. A year archived earlier is
+        rewritten with the new rows merged in. Returns year → rows moved.
+
+        The archive is written before the rows are deleted from the store,
+        so an interrupted run leaves rows in both places; the next run finds
+        them already archived and only deletes them.
+        """
+        old = store.between(None, datetime(before_year, 1, 1) - timedelta(microseconds=1))
+        if not old:
+            return {}
+
+        by_year: Dict[int, List[str]] = {}
+        for t in old:
+            by_year.setdefault(t.datetime.year, []).append(t.id)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        moved = {}
+        with file_lock(self.lock_path):
+            index = dict(self._read_index())
+            for year, ids in sorted(by_year.items()):
+                rows = {d["id"]: d for d in self._read_year(year)}
+                fresh = [tid for tid in ids if tid not in rows]
+                for t in store.detail_many(fresh).values():
+                    rows[t.id] = t.to_dict()
+                ordered = sorted(rows.values(), key=lambda d: (d["datetime"], d["id"]))
+                if fresh:
+                    self._write_year(year, ordered)
+                index[f"{year:04d}"] = summarize(row_to_txn(d) for d in ordered)
+                moved[year] = len(fresh)
+            self._write_index(index)
+            store.delete([tid for ids in by_year.values() for tid in ids])
+        return moved
+
+    def _write_year(self, year: int, rows: List[dict]) -> None:
+        path = self.path(year)
+        tmp = path.with_name(path.name + ".tmp")
+        with gzip.open(tmp, "wt") as f:
+            json.dump({"year": year, "transactions": rows}, f)
+        os.chmod(tmp, 0o444)
+        tmp.replace(path)
+
+    def _write_index(self, years: Dict[str, dict]) -> None:
+        path = self.root / INDEX
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"years": dict(sorted(years.items()))}, f, indent=2)
+        tmp.replace(path)
+        with self._lock:
+            self._index = None
+
+
+def _add(totals: dict, label: str, paise: int) -> None:
+    totals[label] = totals.get(label, 0) + paise
+
+
+def _merge(into: dict, other: dict) -> None:
+    """Add nested paise/count dicts of ``other`` into ``into``."""
+    for key, value in other.items():
+        if isinstance(value, dict):
+            _merge(into.setdefault(key, {}), value)
+        else:
+            into[key] = into.get(key, 0) + value
+
+
+def _hot_dict(t: Transaction) -> dict:
+    """to_dict() without the cold extras the archive file already keeps."""
+    d = t.to_dict()
+    d["extras"] = split_extras(d["extras"])[0]
+    return d
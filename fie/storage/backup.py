@@ -0,0 +1,299 @@
+"""
+Incremental restore points for the data directory.
+
+Each ``BackupSet.backup()`` writes one numbered restore point under
+``root`` holding only what changed since the previous one:
+
+    <root>/<seq>/delta.json.gz   transactions added or changed (full rows,
+                                 cold extras included; trashed rows carry
+                                 "deleted_at"), ids that went away, and
+                                 which side files changed or went away
+    <root>/<seq>/files/...       copies of the side files that changed
+
+``<root>/state.json`` remembers what the newest restore point captured:
+the store version and (size, mtime, sha256) per side file, and
+``<root>/rows.log`` a short digest per transaction, appended to with
+only the rows each point changed (``<id> <digest>`` or ``-<id>``).
+A backup with no store writes since the last one (same
+``store.version()``) skips the transactions entirely; otherwise only
+rows that are not the very objects (or equal to the rows) this process
+digested last time are re-serialized. Side files whose size and mtime
+are unchanged are not re-hashed. So taking a restore point after every
+upload costs little.
+
+``restore(seq)`` replays points 1..seq into one store.replace_all() and
+puts the side files back as they were at that point, including ones
+deleted since (each point records where its copies came from) and
+removing ones created since.
+"""
+
+import gzip
+import hashlib
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from fie.storage.archive import row_to_txn
+from fie.storage.base import TransactionStore
+from fie.storage.locking import file_lock
+
+
+STATE = "state.json"
+DELTA = "delta.json.gz"
+ROWS = "rows.log"
+
+
+def _digest(row: dict) -> str:
+    return hashlib.blake2b(json.dumps(row).encode(), digest_size=8).hexdigest()
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class BackupSet:
+    """Restore points under ``root`` (see the module docstring)."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.lock_path = root / ".lock"
+        # rows.log as loaded: (byte size it covers, id → digest)
+        self._digests: Optional[tuple] = None
+        # id → (row, deleted_at) digested by the last backup of this process
+        self._seen: Dict[str, tuple] = {}
+
+    def _point(self, seq: int) -> Path:
+        return self.root / f"{seq:06d}"
+
+    def _read_state(self) -> dict:
+        try:
+            with open(self.root / STATE) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"seq": 0, "store_version": None, "rows_size": 0, "files": {}}
+
+    def _write_state(self, state: dict) -> None:
+        path = self.root / STATE
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        tmp.replace(path)
+
+    def _read_delta(self, seq: int) -> dict:
+        with gzip.open(self._point(seq) / DELTA, "rt") as f:
+            return json.load(f)
+
+    def points(self) -> List[dict]:
+        """Restore points, oldest first, without their rows."""
+        out = []
+        for seq in range(1, self._read_state()["seq"] + 1):
+            d = self._read_delta(seq)
+            out.append({
+                "seq": seq,
+                "created": d["created"],
+                "store_version": d["store_version"],
+                "upserts": len(d["upserts"]),
+                "removed": len(d["removed"]),
+                "files": d["files"] + d["removed_files"],
+            })
+        return out
+
+    # ---------- backup ----------
+
+    def backup(self, store: TransactionStore, files: Dict[str, Path]) -> Optional[int]:
+        """
+        Record what changed in ``store`` and in ``files`` (name → path) since
+        the last restore point. Returns the new point's number, or None if
+        nothing changed.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with file_lock(self.lock_path):
+            state = self._read_state()
+            version = store.version()
+
+            rows_size = state["rows_size"]
+            upserts, removed, row_log = [], [], ""
+            if version is None or version != state["store_version"]:
+                upserts, removed, row_log = self._row_delta(store, self._read_digests(rows_size))
+            file_state, changed, removed_files = {}, [], []
+            for name, path in sorted(files.items()):
+                if not path.is_file():
+                    continue
+                st = path.stat()
+                old = state["files"].get(name)
+                if old and old[:2] == [st.st_size, st.st_mtime_ns]:
+                    file_state[name] = old
+                    continue
+                sha = _sha256(path)
+                file_state[name] = [st.st_size, st.st_mtime_ns, sha]
+                if not old or old[2] != sha:
+                    changed.append(name)
+            removed_files = sorted(state["files"].keys() - file_state.keys())
+
+            if not (upserts or removed or changed or removed_files):
+                if version != state["store_version"] or file_state != state["files"]:
+                    self._write_state({**state, "store_version": version, "files": file_state})
+                return None
+
+            seq = state["seq"] + 1
+            point = self._point(seq)
+            shutil.rmtree(point, ignore_errors=True)  # left by an interrupted run
+            (point / "files").mkdir(parents=True)
+            for name in changed:
+                dest = point / "files" / name
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(files[name], dest)
+            with gzip.open(point / DELTA, "wt") as f:
+                json.dump({
+                    "seq": seq,
+                    "created": datetime.now().isoformat(),
+                    "store_version": version,
+                    "upserts": upserts,
+                    "removed": removed,
+                    "files": changed,
+                    "paths": {name: str(files[name]) for name in changed},
+                    "removed_files": removed_files,
+                }, f)
+
+            rows_size = self._append_digests(rows_size, row_log)
+            self._write_state({
+                "seq": seq, "store_version": version, "rows_size": rows_size, "files": file_state,
+            })
+            return seq
+
+    def _row_delta(self, store: TransactionStore, before: Dict[str, str]):
+        """(changed rows, removed ids, rows.log lines) against ``before``."""
+        live = [(t, None) for t in store.snapshot()]
+        trashed = [(t, at.isoformat()) for t, at in store.trash()]
+
+        seen, self._seen = self._seen, {}
+        changed, digests = {}, {}
+        for t, deleted_at in live + trashed:
+            self._seen[t.id] = (t, deleted_at)
+            prev = seen.get(t.id)
+            if prev is not None and prev[1] == deleted_at and (prev[0] is t or prev[0] == t):
+                continue
+            d = t.to_dict()
+            if deleted_at is not None:
+                d["deleted_at"] = deleted_at
+            digest = _digest(d)
+            if before.get(t.id) != digest:
+                changed[t.id] = d
+                digests[t.id] = digest
+
+        cold = store.cold(changed)
+        for tid, d in changed.items():
+            if tid in cold:
+                d["extras"] = {**d["extras"], **cold[tid]}
+        removed = sorted(before.keys() - self._seen.keys())
+        lines = "".join(f"{tid} {digest}\n" for tid, digest in digests.items())
+        lines += "".join(f"-{tid}\n" for tid in removed)
+        return list(changed.values()), removed, lines
+
+    # ---------- row digests ----------
+
+    def _read_digests(self, size: int) -> Dict[str, str]:
+        """id → digest as of the newest point (rows.log up to ``size`` bytes)."""
+        if self._digests is not None and self._digests[0] == size:
+            return self._digests[1]
+        # Another process wrote a point since: the identity cache is stale too.
+        self._seen = {}
+        digests: Dict[str, str] = {}
+        try:
+            with open(self.root / ROWS, "rb") as f:
+                blob = f.read(size)
+        except FileNotFoundError:
+            blob = b""
+        for line in blob.decode().splitlines():
+            if line.startswith("-"):
+                digests.pop(line[1:], None)
+            else:
+                tid, digest = line.split()
+                digests[tid] = digest
+        self._digests = (size, digests)
+        return digests
+
+    def _append_digests(self, size: int, lines: str) -> int:
+        """Apply ``lines`` after the first ``size`` bytes of rows.log; returns the new size."""
+        digests = self._read_digests(size)
+        path = self.root / ROWS
+        if not lines and path.exists():
+            return size
+        data = lines.encode()
+        total = sum(len(tid) + len(d) + 2 for tid, d in digests.items())
+        for line in lines.splitlines():
+            if line.startswith("-"):
+                digests.pop(line[1:], None)
+            else:
+                tid, digest = line.split()
+                digests[tid] = digest
+        if size + len(data) > 2 * total + 65536:
+            # Mostly superseded lines: rewrite with one line per id.
+            data = "".join(f"{tid} {d}\n" for tid, d in digests.items()).encode()
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+            tmp.replace(path)
+            size = len(data)
+        else:
+            # Drop a tail an interrupted backup may have left, then append.
+            with open(path, "ab") as f:
+                f.truncate(size)
+                f.write(data)
+            size += len(data)
+        self._digests = (size, digests)
+        return size
+
+    # ---------- restore ----------
+
+    def restore(self, store: TransactionStore, files: Dict[str, Path], seq: Optional[int] = None) -> int:
+        """
+        Put ``store`` and ``files`` (the mapping given to backup()) back as
+        they were at restore point ``seq`` (default: the newest): files the
+        point had are copied back to where they were taken from, files in
+        ``files`` it did not have are removed. Trashed transactions come
+        back trashed at their original deletion time. Returns the point
+        restored.
+        """
+        with file_lock(self.lock_path):
+            last = self._read_state()["seq"]
+            seq = last if seq is None else seq
+            if not 1 <= seq <= last:
+                raise ValueError(f"No restore point {seq} (have 1..{last})")
+
+            rows: Dict[str, dict] = {}
+            where: Dict[str, Optional[int]] = {}
+            paths = {name: str(path) for name, path in files.items()}
+            for n in range(1, seq + 1):
+                delta = self._read_delta(n)
+                for tid in delta["removed"]:
+                    rows.pop(tid, None)
+                for d in delta["upserts"]:
+                    rows[d["id"]] = d
+                for name in delta["removed_files"]:
+                    where[name] = None
+                for name in delta["files"]:
+                    where[name] = n
+                paths.update(delta["paths"])
+
+        store.replace_all(
+            [row_to_txn(d) for d in rows.values()],
+            {tid: datetime.fromisoformat(d["deleted_at"]) for tid, d in rows.items() if d.get("deleted_at")},
+        )
+
+        for name in where.keys() | files.keys():
+            if name not in paths:
+                continue
+            path, n = Path(paths[name]), where.get(name)
+            # Unlink first: archive files are read-only.
+            path.unlink(missing_ok=True)
+            if n is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(self._point(n) / "files" / name, path)
+        return seq
@@ -1,6 +1,17 @@
 from abc import ABC, abstractmethod
-from typing import List
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
 from fie.core.transaction import Transaction
+from fie.storage import query as q
+
+
+class VersionConflict(RuntimeError):
+    """A write with expected_version found the store at another version."""
+
+    def __init__(self, expected: int, actual: int):
+        super().__init__(f"Store is at version {actual}, expected {expected}")
+        self.expected = expected
+        self.actual = actual
 
 
 class TransactionStore(ABC):
@@ -9,6 +20,19 @@ class TransactionStore(ABC):
     def add(self, txns: List[Transaction]) -> None:
         pass
 
+    def add_many(self, txns: List[Transaction]) -> int:
+        """
+        Add a batch in one pass, skipping ids already stored or repeated
+        within the batch. Returns the number of rows added.
+        """
+        first: Dict[str, Transaction] = {}
+        for t in txns:
+            first.setdefault(t.id, t)
+        existing = self.get_many(first)
+        new = [t for tid, t in first.items() if tid not in existing]
+        self.add(new)
+        return len(new)
+
     @abstractmethod
     def update(self, txns: List[Transaction]) -> None:
         pass
@@ -16,3 +40,138 @@ class TransactionStore(ABC):
     @abstractmethod
     def list_all(self) -> List[Transaction]:
         pass
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        pass
+
+    @abstractmethod
+    def get(self, txn_id: str) -> Optional[Transaction]:
+        pass
+
+    @abstractmethod
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Transaction]:
+        """Found transactions keyed by id, in request order; missing ids are skipped."""
+        pass
+
+    # ---------- cold fields ----------
+
+    def cold(self, ids: Iterable[str]) -> Dict[str, dict]:
+        """
+        Cold extras (raw narration, balance, ...; see fie.storage.cold)
+        kept outside the hot record, by id. Stores without a split have none.
+        """
+        return {}
+
+    def detail_many(self, ids: Iterable[str]) -> Dict[str, Transaction]:
+        """get_many() with the cold extras merged back into each transaction."""
+        found = self.get_many(ids)
+        cold = self.cold(found)
+        return {
+            tid: t.evolve(extras={**cold[tid], **t.extras}) if tid in cold else t
+            for tid, t in found.items()
+        }
+
+    def detail(self, txn_id: str) -> Optional[Transaction]:
+        return self.detail_many([txn_id]).get(txn_id)
+
+    # ---------- trash ----------
+
+    @abstractmethod
+    def soft_delete(self, ids: List[str]) -> int:
+        """Tombstone live transactions (hidden from all reads but trash()); returns count."""
+        pass
+
+    @abstractmethod
+    def restore(self, ids: List[str]) -> int:
+        """Bring tombstoned transactions back unchanged; returns count."""
+        pass
+
+    @abstractmethod
+    def purge(self, ids: Optional[List[str]] = None, before: Optional[datetime] = None) -> int:
+        """Permanently remove tombstoned transactions, optionally by id or deletion time."""
+        pass
+
+    @abstractmethod
+    def trash(self) -> List[Tuple[Transaction, datetime]]:
+        """Tombstoned transactions with their deletion time, newest first."""
+        pass
+
+    def replace_all(
+        self, txns: List[Transaction], deleted: Optional[Dict[str, datetime]] = None
+    ) -> None:
+        """
+        Make ``txns`` (full rows, cold extras included) the store's entire
+        contents; ids in ``deleted`` come back tombstoned at that time.
+        Stores override this with a single write; this fallback takes
+        several and is not crash-safe.
+        """
+        self.soft_delete([t.id for t in self.snapshot()])
+        self.purge()
+        self.add_many(txns)
+        if deleted:
+            self.soft_delete(list(deleted))
+
+    def version(self) -> Optional[int]:
+        """
+        Monotonic write stamp, bumped by every committed write from any
+        process. None for stores that do not keep one.
+        """
+        return None
+
+    def id_cursor(self) -> Optional[str]:
+        """
+        Opaque position in the store's log of ids added and removed (live
+        or trashed: soft deletes are not removals), for id_changes(). None
+        for stores that do not keep one.
+        """
+        return None
+
+    def id_changes(self, cursor: Optional[str]) -> Optional[Tuple[List[str], List[str], str]]:
+        """
+        (ids added, ids removed, cursor for now) since ``cursor``, netted
+        over the writes in between; with no cursor, since the store was
+        empty. None if the store cannot tell (no log, or the part of it
+        after ``cursor`` is gone): the caller has to rescan.
+        """
+        return None
+
+    def snapshot(self) -> Tuple[Transaction, ...]:
+        """
+        Immutable view of all transactions. Stores that cache their
+        contents return the same object until the data changes.
+        """
+        return tuple(self.list_all())
+
+    def between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Tuple[Transaction, ...]:
+        """
+        Transactions with start <= datetime <= end (either bound may be
+        None), in snapshot order. Stores that cache their contents return
+        the same object for the same bounds until the data changes.
+        """
+        return tuple(
+            t for t in self.snapshot()
+            if (start is None or t.datetime >= start) and (end is None or t.datetime <= end)
+        )
+
+    def query(
+        self,
+        filters: Optional[dict] = None,
+        sort: str = "datetime",
+        order: str = "desc",
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Transaction], int]:
+        """
+        Filtered, sorted page of transactions plus the total match count.
+        See fie.storage.query for the supported filters. Backends override
+        this to push the work down to their indexes.
+        """
+        filters = q.check(filters, sort)
+        rows = self.snapshot()
+        test = q.predicate(filters)
+        if test is not None:
+            rows = (t for t in rows if test(t))
+        return q.select(rows, sort, order, offset, limit)
@@ -0,0 +1,215 @@
+"""
+Binary snapshot format for JsonTransactionStore (storage.format: binary).
+
+Layout, little-endian:
+
+    header   magic "FIEB", u16 format version, u16 flags(0), u32 records,
+             u32 strings, u32 meta bytes, u32 string bytes, u64 extras bytes
+    meta     JSON object: every top-level key of the snapshot except
+             "transactions", plus "tombstones" {row: deleted_at}
+    strings  u32 offsets[strings + 1] followed by the UTF-8 string data.
+             Ids, counterparties, scopes, modes and categories (joined
+             with US, 0x1f) are stored once each and referenced by index.
+    records  fixed-width rows, see RECORD
+    extras   JSON array with one extras object per record
+
+Numeric and string columns are decoded with struct/NumPy directly, so a
+columnar view never touches the extras blob or a JSON parser.
+
+Version 2 stores the amount as int64 paise; version 1 files (float64
+rupees) are still read and converted on load.
+"""
+
+import json
+import struct
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+MAGIC = b"FIEB"
+VERSION = 2
+
+HEADER = struct.Struct("<4sHHIIIIQ")
+RECORD = np.dtype([
+    ("paise", "<i8"),
+    ("ts", "<i8"),           # microseconds since 1970-01-01, naive
+    ("id", "<u4"),
+    ("counterparty", "<u4"),
+    ("mode", "<u4"),
+    ("scope", "<u4"),
+    ("category", "<u4"),
+    ("direction", "u1"),     # 0 = debit, 1 = credit
+    ("reviewed", "u1"),
+])
+
+# Version 1 layout: the same fields with the amount as float64 rupees.
+RECORD_V1 = np.dtype([("amount", "<f8")] + [(f, RECORD[f]) for f in RECORD.names[1:]])
+RECORDS = {1: RECORD_V1, 2: RECORD}
+
+CATEGORY_SEP = "\x1f"
+DIRECTIONS = ("debit", "credit")
+
+
+class FormatError(ValueError):
+    """File is not a readable FIEB snapshot."""
+
+
+# ================= WRITE =================
+
+def dump(data: dict, f) -> None:
+    txns = data["transactions"]
+    meta = {k: v for k, v in data.items() if k != "transactions"}
+    # Soft-delete tombstones are rare; keep them out of the record layout.
+    tombstones = {str(i): t["deleted_at"] for i, t in enumerate(txns) if t.get("deleted_at")}
+    if tombstones:
+        meta["tombstones"] = tombstones
+    meta = json.dumps(meta).encode()
+
+    strings: Dict[str, int] = {}
+
+    def ref(s: str) -> int:
+        return strings.setdefault(s, len(strings))
+
+    dts = [t["datetime"] for t in txns]
+    dts = [datetime.fromisoformat(d) if isinstance(d, str) else d for d in dts]
+
+    rows = np.zeros(len(txns), dtype=RECORD)
+    rows["paise"] = [t["paise"] for t in txns]
+    rows["ts"] = np.array(dts, dtype="datetime64[us]").astype(np.int64)
+    rows["id"] = [ref(t["id"]) for t in txns]
+    rows["counterparty"] = [ref(t["counterparty"]) for t in txns]
+    rows["mode"] = [ref(t.get("mode") or "UNKNOWN") for t in txns]
+    rows["scope"] = [ref(t.get("scope") or "unknown") for t in txns]
+    rows["category"] = [ref(CATEGORY_SEP.join(t.get("category") or ())) for t in txns]
+    rows["direction"] = [DIRECTIONS.index(t["direction"]) for t in txns]
+    rows["reviewed"] = [bool(t.get("reviewed")) for t in txns]
+
+    encoded = [s.encode() for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    string_bytes = offsets.tobytes() + b"".join(encoded)
+
+    extras = json.dumps([t.get("extras") or {} for t in txns]).encode()
+
+    f.write(HEADER.pack(
+        MAGIC, VERSION, 0, len(txns), len(encoded),
+        len(meta), len(string_bytes), len(extras),
+    ))
+    f.write(meta)
+    f.write(string_bytes)
+    f.write(rows.tobytes())
+    f.write(extras)
+
+
+# ================= READ =================
+
+def _sections(buf: bytes) -> Tuple[dict, List[str], np.ndarray, memoryview]:
+    if len(buf) < HEADER.size:
+        raise FormatError("Truncated header")
+    magic, version, _, n, n_strings, meta_len, str_len, extras_len = HEADER.unpack_from(buf)
+    if magic != MAGIC or version not in RECORDS:
+        raise FormatError("Not a FIEB snapshot")
+
+    view = memoryview(buf)
+    pos = HEADER.size
+    meta = json.loads(bytes(view[pos:pos + meta_len]))
+    pos += meta_len
+
+    offsets = np.frombuffer(buf, dtype="<u4", count=n_strings + 1, offset=pos)
+    data_start = pos + offsets.nbytes
+    blob = bytes(view[data_start:pos + str_len])
+    bounds = offsets.tolist()
+    strings = [blob[a:b].decode() for a, b in zip(bounds, bounds[1:])]
+    pos += str_len
+
+    rows = np.frombuffer(buf, dtype=RECORDS[version], count=n, offset=pos)
+    pos += rows.nbytes
+    if version == 1:
+        old, rows = rows, np.zeros(n, dtype=RECORD)
+        for name in RECORD.names[1:]:
+            rows[name] = old[name]
+        rows["paise"] = np.rint(old["amount"] * 100).astype(np.int64)
+
+    if pos + extras_len != len(buf):
+        raise FormatError("Size mismatch")
+    return meta, strings, rows, view[pos:]
+
+
+def read_meta(f) -> dict:
+    """Header fields only; reads the fixed header and meta section."""
+    head = f.read(HEADER.size)
+    if len(head) < HEADER.size:
+        raise FormatError("Truncated header")
+    magic, version, _, _, _, meta_len, _, _ = HEADER.unpack(head)
+    if magic != MAGIC or version not in RECORDS:
+        raise FormatError("Not a FIEB snapshot")
+    return json.loads(f.read(meta_len))
+
+
+def load(f) -> dict:
+    """Snapshot dict in the same shape json.load gives (datetime already parsed)."""
+    meta, strings, rows, extras_blob = _sections(f.read())
+    extras = json.loads(bytes(extras_blob)) if len(rows) else []
+
+    # Whole-column conversions; only the dict assembly is per row.
+    dts = rows["ts"].astype("datetime64[us]").tolist()
+    categories = [s.split(CATEGORY_SEP) if s else [] for s in strings]
+    directions = [DIRECTIONS[d] for d in rows["direction"].tolist()]
+
+    txns = [
+        {
+            "id": strings[tid],
+            "datetime": dt,
+            "paise": paise,
+            "direction": direction,
+            "counterparty": strings[cp],
+            "mode": strings[mode],
+            "reviewed": bool(reviewed),
+            "scope": strings[scope],
+            "category": list(categories[cat]),
+            "extras": ex,
+        }
+        for tid, dt, paise, direction, cp, mode, reviewed, scope, cat, ex in zip(
+            rows["id"].tolist(), dts, rows["paise"].tolist(), directions,
+            rows["counterparty"].tolist(), rows["mode"].tolist(),
+            rows["reviewed"].tolist(), rows["scope"].tolist(),
+            rows["category"].tolist(), extras,
+        )
+    ]
+
+    for i, at in meta.pop("tombstones", {}).items():
+        txns[int(i)]["deleted_at"] = at
+
+    meta["transactions"] = txns
+    return meta
+
+
+def read_columns(path: Path) -> Dict[str, object]:
+    """
+    Columnar view straight from the record section: NumPy arrays for
+    paise, ts, is_debit, reviewed and deleted (soft-deleted rows), plus
+    string-table codes and the string table itself for the encoded
+    columns. Extras are not read.
+    """
+    with open(path, "rb") as f:
+        meta, strings, rows, _ = _sections(f.read())
+
+    deleted = np.zeros(len(rows), dtype=bool)
+    deleted[[int(i) for i in meta.get("tombstones", {})]] = True
+
+    return {
+        "paise": rows["paise"].copy(),
+        "ts": rows["ts"].copy(),
+        "is_debit": rows["direction"] == 0,
+        "reviewed": rows["reviewed"].astype(bool),
+        "id": rows["id"].copy(),
+        "counterparty": rows["counterparty"].copy(),
+        "mode": rows["mode"].copy(),
+        "scope": rows["scope"].copy(),
+        "category": rows["category"].copy(),
+        "deleted": deleted,
+        "strings": strings,
+    }
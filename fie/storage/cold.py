@@ -0,0 +1,134 @@
+"""
+Cold side of the hot/cold record split.
+
+The parser keeps the full narration and statement bookkeeping in
+``extras`` (COLD_KEYS). Listing and analytics never read them, so the
+stores keep them out of the hot record and load them by id only for a
+detail view or parser debugging (TransactionStore.detail()).
+
+ColdStore is the file-backed side used by JsonTransactionStore: an
+append-only ``<name>.cold.jsonl`` with one ``id<TAB>{json}`` line per
+write; the newest line for an id wins. An id → offset map is built from
+the id prefixes on first lookup and extended as the file grows.
+Superseded lines are squeezed out by compact(), which the store runs
+whenever it compacts its journal.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+
+COLD_KEYS = frozenset(("raw", "raw_nospace", "raw_txn", "balance", "chq_id", "source_file"))
+
+
+def split_extras(extras: dict) -> Tuple[dict, dict]:
+    """(hot, cold) halves of an extras dict; ``extras`` itself if nothing is cold."""
+    if not extras or COLD_KEYS.isdisjoint(extras):
+        return extras, {}
+    hot, cold = {}, {}
+    for k, v in extras.items():
+        (cold if k in COLD_KEYS else hot)[k] = v
+    return hot, cold
+
+
+class ColdStore:
+    """id → cold extras, persisted as described in the module docstring."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ino = None
+        self._size = 0
+        self._lines = 0           # lines indexed, superseded ones included
+        self._offsets: Dict[str, int] = {}
+
+    def put(self, rows: Dict[str, dict]) -> None:
+        """Record cold extras for these ids (callers hold the store's write lock)."""
+        if not rows:
+            return
+        with open(self.path, "a") as f:
+            f.write("".join(f"{tid}\t{json.dumps(cold)}\n" for tid, cold in rows.items()))
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, dict]:
+        ids = list(dict.fromkeys(ids))
+        while True:
+            with self._lock:
+                self._sync()
+                wanted = [(tid, self._offsets[tid]) for tid in ids if tid in self._offsets]
+                ino = self._ino
+            if not wanted:
+                return {}
+            try:
+                f = open(self.path, "rb")
+            except FileNotFoundError:
+                continue
+            with f:
+                # The offsets belong to the file _sync() indexed; a compaction
+                # since then replaced it, so re-index rather than misread.
+                if os.fstat(f.fileno()).st_ino != ino:
+                    continue
+                found = {}
+                for tid, offset in wanted:
+                    f.seek(offset)
+                    line = f.readline()
+                    found[tid] = json.loads(line[line.index(b"\t") + 1:])
+                return found
+
+    def drop(self, ids: Iterable[str]) -> None:
+        """Forget these ids; rewrites the file, also squeezing out superseded lines."""
+        with self._lock:
+            self._sync()
+            doomed = set(ids) & self._offsets.keys()
+            if doomed:
+                self._rewrite(doomed)
+
+    def superseded(self) -> int:
+        """Lines in the file that a newer line for the same id replaced."""
+        with self._lock:
+            self._sync()
+            return self._lines - len(self._offsets)
+
+    def compact(self) -> None:
+        """Rewrite the file with only the newest line per id."""
+        with self._lock:
+            self._sync()
+            if self._lines > len(self._offsets):
+                self._rewrite(set())
+
+    def _rewrite(self, doomed: set) -> None:
+        keep = sorted(o for tid, o in self._offsets.items() if tid not in doomed)
+        with open(self.path, "rb") as f:
+            blob = f.read(self._size)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(b"".join(blob[o:blob.index(b"\n", o) + 1] for o in keep))
+        tmp.replace(self.path)
+        self._ino, self._size, self._lines, self._offsets = None, 0, 0, {}
+
+    def _sync(self) -> None:
+        """Index lines appended since the last call (by any process)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._ino, self._size, self._lines, self._offsets = None, 0, 0, {}
+            return
+        if st.st_ino != self._ino or st.st_size < self._size:
+            self._ino, self._size, self._lines, self._offsets = st.st_ino, 0, 0, {}
+        if st.st_size == self._size:
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self._size)
+            blob = f.read()
+        # Only whole lines; a half-written tail is picked up next time.
+        end = blob.rfind(b"\n") + 1
+        pos = 0
+        while pos < end:
+            nl = blob.index(b"\n", pos)
+            self._offsets[blob[pos:blob.index(b"\t", pos)].decode()] = self._size + pos
+            self._lines += 1
+            pos = nl + 1
+        self._size += end
@@ -0,0 +1,97 @@
+from pathlib import Path
+from typing import Dict
+
+from fie import config
+from fie.storage.base import TransactionStore
+from fie.storage.json_store import JsonTransactionStore
+from fie.storage.partitioned_store import PartitionedTransactionStore
+from fie.storage.sqlite_store import SqliteTransactionStore
+
+
+def sqlite_path(data_path: Path) -> Path:
+    """Location of the SQLite database (storage.sqlite_path, else next to data_path)."""
+    configured = config.get("storage.sqlite_path")
+    return Path(configured) if configured else data_path.with_suffix(".db")
+
+
+def partition_dir(data_path: Path) -> Path:
+    """Shard directory (storage.partition_dir, else data_path without suffix)."""
+    configured = config.get("storage.partition_dir")
+    return Path(configured) if configured else data_path.with_suffix("")
+
+
+def merchants_path(data_path: Path) -> Path:
+    """Merchant directory (storage.merchants_path, else <data>.merchants.json)."""
+    configured = config.get("storage.merchants_path")
+    return Path(configured) if configured else data_path.with_suffix(".merchants.json")
+
+
+def archive_dir(data_path: Path) -> Path:
+    """Yearly archives (archive.dir, else an archive/ directory next to data_path)."""
+    configured = config.get("archive.dir")
+    return Path(configured) if configured else data_path.parent / "archive"
+
+
+def ingest_manifest_path(data_path: Path) -> Path:
+    """Statement files already ingested (ingest.manifest_path, else <data>.ingested.json)."""
+    configured = config.get("ingest.manifest_path")
+    return Path(configured) if configured else data_path.with_suffix(".ingested.json")
+
+
+def fingerprints_path(data_path: Path) -> Path:
+    """Fingerprint index for ingest dedupe (ingest.fingerprints_path, else <data>.fingerprints)."""
+    configured = config.get("ingest.fingerprints_path")
+    return Path(configured) if configured else data_path.with_suffix(".fingerprints")
+
+
+def backup_dir(data_path: Path) -> Path:
+    """Restore points (backup.dir, else a backups/ directory next to data_path)."""
+    configured = config.get("backup.dir")
+    return Path(configured) if configured else data_path.parent / "backups"
+
+
+# Side files of the web UI kept next to data_path
+SIDE_FILES = ("auto_rules.json", "settings.json", "saved_filters.json", "trash.json", "activity_logs.json")
+
+
+def backup_files(data_path: Path) -> Dict[str, Path]:
+    """Everything a backup carries besides the store itself: name → path."""
+    data_dir = data_path.parent
+    files = {name: data_dir / name for name in SIDE_FILES}
+    files["merchants.json"] = merchants_path(data_path)
+    files["ingested.json"] = ingest_manifest_path(data_path)
+    for folder in (data_dir / "activity_logs", archive_dir(data_path)):
+        if folder.is_dir():
+            for path in sorted(folder.iterdir()):
+                if path.is_file() and not path.name.startswith("."):
+                    files[f"{folder.name}/{path.name}"] = path
+    return files
+
+
+def open_store(data_path: Path) -> TransactionStore:
+    """
+    Build the TransactionStore selected by storage.backend in config.yaml.
+    """
+    backend = config.get("storage.backend", "json")
+
+    fmt = config.get("storage.format", "json")
+    options = dict(
+        journal=bool(config.get("storage.journal", False)),
+        compact_every=int(config.get("storage.journal_compact_every", 500)),
+        format=fmt,
+        bloom=bool(config.get("storage.id_bloom", False)),
+    )
+
+    if backend == "json":
+        return JsonTransactionStore(
+            data_path if fmt == "json" else data_path.with_suffix(".fieb"),
+            **options,
+        )
+    if backend == "partitioned":
+        return PartitionedTransactionStore(
+            partition_dir(data_path), legacy_path=data_path, **options
+        )
+    if backend == "sqlite":
+        return SqliteTransactionStore(sqlite_path(data_path))
+
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,222 @@
+"""
+Fingerprint index: ingest dedupe across statements.
+
+Transaction ids hash the source file path, so one bank entry read from a
+re-upload (a new temp path) or from two statements whose date ranges
+overlap gets a new id each time. Transaction.fingerprint() keys only on
+what the bank printed, and this index records the fingerprint of every
+row in the store (trashed rows included, as in the id index):
+
+    <fingerprint> <id>    one row
+    -<id>                 a row no longer in the store
+    @<cursor>             store.id_cursor() the lines above bring it up to
+
+``add_many()`` stores only rows whose fingerprint is new, at one dict
+lookup per row, and appends them. Rows added or removed without the
+index (deletes, purges, restores, plain store.add_many) are replayed
+from store.id_changes() on its next use; edits and soft deletes change
+no id and cost nothing. Ids are immutable content hashes, so only rows
+the index has not seen are fingerprinted (their cold extras read). Only
+if the store cannot say what changed is it rescanned. The file is
+rewritten once dropped and repeated lines outnumber the rows.
+
+``collapse()`` is the one-off migration for rows imported before the
+index existed: per fingerprint it keeps one live row and moves the rest
+to the trash.
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from fie.core.transaction import Transaction
+from fie.storage.base import TransactionStore
+from fie.storage.locking import file_lock
+
+
+class FingerprintIndex:
+    """Fingerprint → id for one store, persisted at ``path``."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.lock_path = path.with_name(path.name + ".lock")
+        self._lock = threading.Lock()
+        self._file_key = None
+        self._cursor: Optional[str] = None
+        self._ids: Dict[str, str] = {}  # fingerprint → first id holding it
+        self._fps: Dict[str, str] = {}  # id → fingerprint, every stored row
+        self._lines = 0
+
+    # ---------- ingest ----------
+
+    def add_many(self, store: TransactionStore, txns: Iterable[Transaction]) -> int:
+        """
+        store.add_many() for the rows of ``txns`` (parsed, so with their cold
+        extras) whose fingerprint is not in the store yet; later copies in
+        the same batch are dropped too. Returns how many were added.
+        """
+        with self._lock, file_lock(self.lock_path):
+            self._sync(store)
+            keep: List[Transaction] = []
+            fresh: Dict[str, str] = {}
+            for t in txns:
+                fp = t.fingerprint()
+                known = self._ids.get(fp) or fresh.get(fp)
+                if known is None:
+                    fresh[fp] = t.id
+                    keep.append(t)
+                elif known == t.id:
+                    keep.append(t)  # same id: the store's own dedupe applies
+            added = store.add_many(keep)
+            # The cursor stays put: replaying these ids later finds them known.
+            if fresh:
+                added_fps = {tid: fp for fp, tid in fresh.items()}
+                self._apply(added_fps, ())
+                self._append(added_fps, (), self._cursor)
+            return added
+
+    # ---------- migration ----------
+
+    def collapse(self, store: TransactionStore, dry_run: bool = False) -> List[List[Transaction]]:
+        """
+        Group live rows sharing a fingerprint and, unless ``dry_run``, trash
+        all but one of each: the first reviewed row, else the first with a
+        category, else the first stored. Returns the groups, kept row first.
+        """
+        with self._lock, file_lock(self.lock_path):
+            self._sync(store)
+            groups: Dict[str, List[Transaction]] = {}
+            for t in store.snapshot():
+                groups.setdefault(self._fps[t.id], []).append(t)
+
+            out = []
+            for group in groups.values():
+                if len(group) > 1:
+                    group.sort(key=lambda t: (not t.reviewed, not t.category))
+                    out.append(group)
+            if out and not dry_run:
+                # Trashed rows keep their fingerprints: the index is unchanged.
+                store.soft_delete([t.id for group in out for t in group[1:]])
+            return out
+
+    # ---------- persistence ----------
+
+    def _sync(self, store: TransactionStore) -> None:
+        """Reload the file if another process changed it; replay what the store changed since."""
+        self._reload()
+        changes = store.id_changes(self._cursor) if self._cursor is not None else None
+        if changes is None:
+            self._rescan(store)
+            return
+        added, removed, cursor = changes
+        unseen = [tid for tid in added if tid not in self._fps]
+        gone = [tid for tid in removed if tid in self._fps]
+        if unseen or gone or cursor != self._cursor:
+            self._update(store, _rows(store, unseen), gone, cursor)
+
+    def _rescan(self, store: TransactionStore) -> None:
+        """Catch up by diffing every stored id, for stores without id_changes()."""
+        # Read before the rows: a write racing with the scan is replayed next time.
+        cursor = store.id_cursor()
+        rows = [*store.snapshot(), *(t for t, _ in store.trash())]
+        present = {t.id for t in rows}
+        unseen = [t for t in rows if t.id not in self._fps]
+        gone = [tid for tid in self._fps if tid not in present]
+        self._update(store, unseen, gone, cursor)
+
+    def _update(
+        self, store: TransactionStore, unseen: List[Transaction], gone: List[str], cursor: Optional[str]
+    ) -> None:
+        """Fingerprint the ``unseen`` rows, forget the ``gone`` ids, stamp ``cursor``."""
+        cold = store.cold(t.id for t in unseen) if unseen else {}
+        added = {t.id: _fingerprint(t, cold) for t in unseen}
+        self._apply(added, gone)
+        if self._lines > 2 * len(self._fps) + 1024 or not self.path.exists():
+            self._rewrite(cursor)
+        else:
+            self._append(added, gone, cursor)
+
+    def _apply(self, added: Dict[str, str], gone: Iterable[str]) -> None:
+        """Update the in-memory maps: ``added`` is id → fingerprint."""
+        orphaned = set()
+        for tid in gone:
+            fp = self._fps.pop(tid, None)
+            if fp is not None and self._ids.get(fp) == tid:
+                del self._ids[fp]
+                orphaned.add(fp)
+        if orphaned:
+            # A repeat the migration has not collapsed yet takes over.
+            for tid, fp in self._fps.items():
+                if fp in orphaned:
+                    self._ids.setdefault(fp, tid)
+        for tid, fp in added.items():
+            self._fps[tid] = fp
+            self._ids.setdefault(fp, tid)
+
+    def _append(self, added: Dict[str, str], gone: Iterable[str], cursor: Optional[str]) -> None:
+        lines = [f"{fp} {tid}\n" for tid, fp in added.items()]
+        lines += [f"-{tid}\n" for tid in gone]
+        with open(self.path, "a") as f:
+            f.write("".join(lines) + _stamp(cursor))
+        self._lines += len(lines) + 1
+        self._cursor = cursor
+        self._file_key = self._stat_key()
+
+    def _rewrite(self, cursor: Optional[str]) -> None:
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f:
+            f.write("".join(f"{fp} {tid}\n" for tid, fp in self._fps.items()) + _stamp(cursor))
+        tmp.replace(self.path)
+        self._lines = len(self._fps) + 1
+        self._cursor = cursor
+        self._file_key = self._stat_key()
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _reload(self) -> None:
+        key = self._stat_key()
+        if key == self._file_key:
+            return
+        self._ids, self._fps, self._lines, self._cursor = {}, {}, 0, None
+        added: Dict[str, str] = {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    self._lines += 1
+                    if line.startswith("@"):
+                        self._cursor = line[1:].rstrip("\n") or None
+                    elif line.startswith("-"):
+                        added.pop(line[1:].strip(), None)
+                    elif " " in line:
+                        fp, tid = line.split()
+                        added[tid] = fp
+        except FileNotFoundError:
+            pass
+        self._apply(added, ())
+        self._file_key = key
+
+
+def _rows(store: TransactionStore, ids: List[str]) -> List[Transaction]:
+    """Stored rows for ``ids``, trashed ones included; ids deleted since are left out."""
+    rows = store.get_many(ids)
+    if len(rows) < len(ids):
+        wanted = set(ids)
+        rows.update((t.id, t) for t, _ in store.trash() if t.id in wanted)
+    return list(rows.values())
+
+
+def _fingerprint(t: Transaction, cold: Dict[str, dict]) -> str:
+    """Fingerprint of a stored row, its cold extras merged back."""
+    if t.id in cold:
+        t = t.evolve(extras={**cold[t.id], **t.extras})
+    return t.fingerprint()
+
+
+def _stamp(cursor: Optional[str]) -> str:
+    return f"@{cursor or ''}\n"
@@ -0,0 +1,270 @@
+"""
+Persistent id set for ingest dedupe, kept next to a JsonTransactionStore.
+
+``<store>.ids`` is an append-only text file:
+
+    #<token>      first line, new on every rebuild
+    +<id>         id added
+    -<id>         id removed (hard delete / purge)
+    @<version>    store version the lines above bring the index up to
+
+With ``bloom=True`` a Bloom filter over the ids is saved to
+``<store>.ids.bloom`` (tagged with the token and the byte offset it
+covers). Lookups then only read the lines appended since, and the full id
+set is loaded only when the filter reports a possible hit.
+"""
+
+import hashlib
+import math
+import os
+import struct
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Optional, Set, Tuple
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on blake2b)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.nbits = max(64, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.nbits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.nbits + 7) // 8)
+
+    def _positions(self, key: str):
+        h = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(h[:8], "little")
+        h2 = int.from_bytes(h[8:], "little") | 1
+        return [(h1 + i * h2) % self.nbits for i in range(self.k)]
+
+    def add(self, key: str) -> None:
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+BLOOM_HEADER = struct.Struct("<4s32sQQQQI")  # magic, token, offset, version, count, capacity, k
+BLOOM_MAGIC = b"FIBL"
+
+
+class IdIndex:
+    """Set of ids in one store, persisted as described in the module docstring."""
+
+    def __init__(self, path: Path, bloom: bool = False):
+        self.path = path
+        self.bloom_path = path.with_name(path.name + ".bloom")
+        self.use_bloom = bloom
+        self._reset()
+
+    def _reset(self):
+        self._ino = None
+        self._token: Optional[str] = None
+        self._offset = 0          # bytes of .ids applied
+        self._version: Optional[int] = None
+        self._count = 0           # ids added since the last rebuild
+        self._ids: Optional[Set[str]] = None
+        self._bloom: Optional[BloomFilter] = None
+        self._bloom_offset = 0    # bytes covered by the saved .bloom
+
+    # ---------- public API ----------
+
+    def version(self) -> Optional[int]:
+        """Store version the index is current for; None if there is no index."""
+        self._sync()
+        return self._version
+
+    def missing(self, ids: Iterable[str]) -> List[str]:
+        """Ids not in the index, first occurrence order, batch duplicates dropped."""
+        self._sync()
+        batch = list(dict.fromkeys(ids))
+        if self._bloom is not None:
+            maybe = [i for i in batch if i in self._bloom]
+            if not maybe:
+                return batch
+            known = self._all()
+            return [i for i in batch if i not in known]
+        known = self._all()
+        return [i for i in batch if i not in known]
+
+    def cursor(self) -> Optional[str]:
+        """``<token>:<offset>``: this file, this far; None if there is no index."""
+        self._sync()
+        return None if self._token is None else f"{self._token}:{self._offset}"
+
+    def changes(self, cursor: Optional[str]) -> Optional[Tuple[List[str], List[str], str]]:
+        """
+        (added, removed, cursor()) from the lines after ``cursor`` (all of
+        them without one), netted per id. None if the file was rebuilt
+        since, so the lines in between are gone.
+        """
+        here = self.cursor()
+        if here is None:
+            return None
+        start = len(self._token) + 2  # past "#<token>\n"
+        if cursor is not None:
+            token, _, offset = cursor.partition(":")
+            if token != self._token or not offset.isdigit() or int(offset) > self._offset:
+                return None
+            start = int(offset)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            blob = f.read(self._offset - start)
+
+        added, removed = {}, set()
+        for line in blob.decode().splitlines():
+            tag, value = line[:1], line[1:]
+            if tag == "+":
+                removed.discard(value)
+                added[value] = None
+            elif tag == "-":
+                if value in added:
+                    del added[value]
+                else:
+                    removed.add(value)
+        return list(added), sorted(removed), here
+
+    def rebuild(self, ids: Iterable[str], version: int) -> None:
+        """Rewrite the index from the full id list of a store at ``version``."""
+        ids = list(dict.fromkeys(ids))
+        token = uuid.uuid4().hex
+        body = f"#{token}\n" + "".join(f"+{i}\n" for i in ids) + f"@{version}\n"
+        tmp = self.path.with_suffix(".ids.tmp")
+        with open(tmp, "w") as f:
+            f.write(body)
+        tmp.replace(self.path)
+
+        self._reset()
+        self._ino = os.stat(self.path).st_ino
+        self._token, self._offset, self._version = token, len(body.encode()), version
+        self._ids, self._count = set(ids), len(ids)
+        if self.use_bloom:
+            self._build_bloom()
+
+    def record(
+        self,
+        prev_version: int,
+        version: int,
+        added: Iterable[str] = (),
+        removed: Iterable[str] = (),
+    ) -> None:
+        """
+        Log one store write that took it from prev_version to version. If
+        the index was not current for prev_version it is left stale, and
+        the store rebuilds it on next use.
+        """
+        if self.version() != prev_version:
+            return
+        added, removed = list(added), list(removed)
+        lines = "".join(f"+{i}\n" for i in added) + "".join(f"-{i}\n" for i in removed)
+        with open(self.path, "a") as f:
+            f.write(lines + f"@{version}\n")
+        self._sync()
+
+    # ---------- loading ----------
+
+    def _sync(self) -> None:
+        """Apply lines appended since the last call (by any process)."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            return
+        if st.st_ino != self._ino or st.st_size < self._offset:
+            self._reset()
+            self._ino = st.st_ino
+        if st.st_size == self._offset:
+            return
+
+        with open(self.path, "rb") as f:
+            if self._offset == 0:
+                first = f.readline()
+                self._token = first[1:].strip().decode()
+                self._offset = len(first)
+                if self.use_bloom:
+                    self._load_bloom()
+                if self._bloom is None:
+                    self._ids = set()
+            f.seek(self._offset)
+            blob = f.read()
+
+        end = blob.rfind(b"\n") + 1
+        self._apply(blob[:end].decode().splitlines(), track_bloom=True)
+        self._offset += end
+
+        if self.use_bloom:
+            if self._bloom is None or self._count > self._bloom.capacity:
+                self._build_bloom()
+            elif self._offset - self._bloom_offset > max(65536, self._bloom_offset // 10):
+                self._save_bloom()
+
+    def _apply(self, lines: List[str], track_bloom: bool) -> None:
+        for line in lines:
+            tag, value = line[:1], line[1:]
+            if tag == "+":
+                self._count += 1
+                if self._ids is not None:
+                    self._ids.add(value)
+                if track_bloom and self._bloom is not None:
+                    self._bloom.add(value)
+            elif tag == "-":
+                if self._ids is not None:
+                    self._ids.discard(value)
+            elif tag == "@":
+                self._version = int(value)
+
+    def _all(self) -> Set[str]:
+        """Full id set, read from the start of the file on first use."""
+        if self._ids is None:
+            self._ids = set()
+            if self._offset:
+                with open(self.path, "rb") as f:
+                    f.readline()
+                    blob = f.read(self._offset - f.tell())
+                count, version = self._count, self._version
+                self._apply(blob.decode().splitlines(), track_bloom=False)
+                self._count, self._version = count, version
+        return self._ids
+
+    # ---------- bloom ----------
+
+    def _build_bloom(self) -> None:
+        ids = self._all()
+        self._bloom = BloomFilter(max(2 * len(ids), 10_000))
+        for i in ids:
+            self._bloom.add(i)
+        self._count = len(ids)
+        self._save_bloom()
+
+    def _save_bloom(self) -> None:
+        b = self._bloom
+        header = BLOOM_HEADER.pack(
+            BLOOM_MAGIC, self._token.encode(), self._offset, self._version or 0,
+            self._count, b.capacity, b.k,
+        )
+        tmp = self.bloom_path.with_name(self.bloom_path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(header + bytes(b.bits))
+        tmp.replace(self.bloom_path)
+        self._bloom_offset = self._offset
+
+    def _load_bloom(self) -> None:
+        """Resume from a saved filter that matches this index file."""
+        try:
+            with open(self.bloom_path, "rb") as f:
+                head = f.read(BLOOM_HEADER.size)
+                magic, token, offset, version, count, capacity, k = BLOOM_HEADER.unpack(head)
+                if magic != BLOOM_MAGIC or token.decode() != self._token:
+                    return
+                bloom = BloomFilter(capacity)
+                bits = f.read(len(bloom.bits))
+        except (FileNotFoundError, struct.error):
+            return
+        if len(bits) != len(bloom.bits) or bloom.k != k:
+            return
+        bloom.bits = bytearray(bits)
+        self._bloom = bloom
+        self._offset = self._bloom_offset = offset
+        self._version, self._count = version, count
@@ -1,118 +1,813 @@
+import bisect
 import json
+import re
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
 from datetime import datetime
 
+from fie.core.money import to_paise
 from fie.core.transaction import Transaction
-from fie.storage.base import TransactionStore
+from fie.storage.base import TransactionStore, VersionConflict
+from fie.storage import binary
+from fie.storage.cold import ColdStore, split_extras
+from fie.storage.id_index import IdIndex
+from fie.storage.locking import file_lock
+from fie.storage import query as q
+
+
+# Record layout, stored as "schema" in the snapshot header (absent = 1).
+#   1: rows may keep reference/upi_id/... at top level, lack mode or
+#      category, or carry unknown keys.
+#   2: every row is exactly Transaction.to_dict(), plus deleted_at.
+#   3: as 2, with the fie.storage.cold COLD_KEYS moved out of extras and
+#      into <name>.cold.jsonl.
+#   4: as 3, with integer "paise" in place of the float rupee "amount".
+SCHEMA_VERSION = 4
+
+# Schema 1 top-level keys that now live in extras.
+LEGACY_KEYS = ("reference", "upi_id", "source_file", "balance", "chq_id", "raw_txn")
+
+
+class _Snapshot:
+    """Parsed store contents for one on-disk version."""
+
+    __slots__ = (
+        "key", "meta", "records", "live", "txns", "base", "index", "query_index", "windows",
+    )
+
+    def __init__(self, key: tuple, data: dict, base: "Optional[_Snapshot]" = None):
+        self.key = key
+        # Header fields: every top-level key except "transactions".
+        self.meta = {k: v for k, v in data.items() if k != "transactions"}
+        self.records = tuple(data["transactions"])
+        # Records without a tombstone; everything but trash() reads these.
+        self.live = tuple(r for r in self.records if "deleted_at" not in r)
+        self.txns: Optional[Tuple[Transaction, ...]] = None
+        self.index: Optional[Dict[str, Transaction]] = None
+        self.query_index: Optional[_QueryIndex] = None
+        # (start, end) → rows returned by between()
+        self.windows: Dict[tuple, Tuple[Transaction, ...]] = {}
+        # Previous snapshot whose Transaction objects can be reused for
+        # record dicts that survived a write unchanged.
+        self.base = base
+
+
+class _QueryIndex:
+    """Secondary indexes over one snapshot's row positions."""
+
+    def __init__(self, txns: Tuple[Transaction, ...]):
+        self.by_scope: Dict[str, List[int]] = {}
+        self.by_direction: Dict[str, List[int]] = {}
+        for i, t in enumerate(txns):
+            self.by_scope.setdefault(t.scope, []).append(i)
+            self.by_direction.setdefault(t.direction, []).append(i)
+
+        # Positions by datetime; ties keep insertion order ascending and
+        # reversed insertion order descending, like a stable sort would.
+        self.asc = sorted(range(len(txns)), key=lambda i: txns[i].datetime)
+        self.desc = sorted(range(len(txns)), key=lambda i: (txns[i].datetime, -i))
+        self.dates = [txns[i].datetime for i in self.asc]
+
+    def date_range(self, start, end) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self.dates, start) if start else 0
+        hi = bisect.bisect_right(self.dates, end) if end else len(self.dates)
+        return lo, max(lo, hi)
 
 
 class JsonTransactionStore(TransactionStore):
-    def __init__(self, path: Path):
+    """
+    Store backed by a single JSON snapshot file.
+
+    With ``journal=True`` mutations are appended as JSONL records to a
+    sidecar ``<name>.journal.jsonl`` instead of rewriting the snapshot.
+    The journal is replayed on read and folded back into the snapshot
+    (atomic replace) once it holds ``compact_every`` records.
+
+    Parsed contents are cached in memory and reused until the snapshot or
+    journal changes on disk (mtime/size) or this instance writes.
+
+    ``format="binary"`` keeps the snapshot in the FIEB layout from
+    fie.storage.binary instead of pretty-printed JSON. A JSON file with
+    the same stem is imported the first time a binary store is opened.
+
+    Writers from several processes are serialized with flock on
+    ``<name>.lock`` and always re-read under the lock. Every write bumps
+    the ``version`` header (journal records carry it too); pass
+    ``expected_version`` to a mutator for compare-and-swap, which raises
+    VersionConflict if another write got there first.
+
+    soft_delete() marks records with a ``deleted_at`` tombstone instead of
+    removing them; they drop out of every read except trash() until
+    restore() clears the mark or purge() removes them. Tombstoned rows
+    ignore updates and still count as existing for add()'s dedupe, so
+    re-importing a statement does not resurrect deleted transactions.
+
+    Snapshots carry a ``schema`` header (SCHEMA_VERSION). Older files are
+    rewritten once on open by migrate(), so reads build Transactions
+    straight from the record dicts without per-row legacy fixups.
+
+    Records hold only hot fields. Bulky extras (raw narration, balance,
+    ...) go to ``<name>.cold.jsonl`` on write and are read back by id
+    through cold()/detail(), never by list_all() or query().
+
+    add()/add_many() dedupe against a persistent id index (<name>.ids,
+    optionally with a Bloom filter, see fie.storage.id_index) instead of
+    collecting every stored id, so the dedupe cost scales with the batch.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        journal: bool = False,
+        compact_every: int = 500,
+        format: str = "json",
+        bloom: bool = False,
+    ):
+        if format not in ("json", "binary"):
+            raise ValueError(f"Unknown snapshot format: {format}")
         self.path = path
+        self.format = format
+        self.journal = journal
+        self.journal_path = path.with_suffix(".journal.jsonl")
+        self.lock_path = path.with_suffix(".lock")
+        self.ids = IdIndex(path.with_suffix(".ids"), bloom=bloom)
+        self.cold_rows = ColdStore(path.with_suffix(".cold.jsonl"))
+        self.compact_every = compact_every
+        self._journal_len = None
+        self._generation = 0
+        self._cache: Optional[_Snapshot] = None
+        self._lock = threading.RLock()
         self._init_store()
 
     # ---------- lifecycle ----------
 
     def _init_store(self):
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        if not self.path.exists():
-            self._write({"transactions": []})
+        if self.path.exists():
+            self.migrate()
+            return
+
+        with file_lock(self.lock_path):
+            if not self.path.exists():
+                self._create()
+
+    def _create(self):
+        legacy = self.path.with_suffix(".json")
+        if self.format == "binary" and legacy != self.path and legacy.exists():
+            with open(legacy, "r") as f:
+                self._write(self._migrate(json.load(f)))
+        else:
+            self._write(self._empty())
+
+    def _empty(self) -> dict:
+        return {"version": 0, "schema": SCHEMA_VERSION, "transactions": []}
+
+    def migrate(self) -> bool:
+        """
+        Rewrite an older-schema snapshot in the current layout (pending
+        journal folded in, version unchanged). True if a rewrite happened.
+        """
+        if self._header().get("schema", 1) >= SCHEMA_VERSION:
+            return False
+        with self._writing(None):
+            if self._header().get("schema", 1) >= SCHEMA_VERSION:
+                return False
+            # _load has already upgraded the snapshot's records in memory;
+            # rows replayed from an older journal may still be in the old layout.
+            data, cold = self._read(), {}
+            data["transactions"] = [_relayout(r, cold) for r in data["transactions"]]
+            self.cold_rows.put(cold)
+            self._commit(data, bump=False)
+        return True
+
+    def _migrate(self, data: dict) -> dict:
+        schema = data.get("schema", 1)
+        if schema >= SCHEMA_VERSION:
+            return data
+        records = data["transactions"]
+        if schema < 2:
+            records = [_upgrade(r) for r in records]
+        cold: Dict[str, dict] = {}
+        data["transactions"] = [_relayout(r, cold) for r in records]
+        self.cold_rows.put(cold)
+        data["schema"] = SCHEMA_VERSION
+        return data
 
     # ---------- core IO ----------
 
+    def _stat_key(self) -> tuple:
+        key = [self._generation]
+        for p in (self.path, self.journal_path):
+            try:
+                st = p.stat()
+                key.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                key.append(None)
+        return tuple(key)
+
+    def _current(self) -> _Snapshot:
+        with self._lock:
+            key = self._stat_key()
+            if self._cache is None or self._cache.key != key:
+                data = self._load()
+                # Stat again: _load may have rewritten a missing/corrupt file.
+                self._cache = _Snapshot(self._stat_key(), data)
+            return self._cache
+
     def _read(self):
+        # Callers mutate the list, never the record dicts themselves.
+        snap = self._current()
+        return {**snap.meta, "transactions": list(snap.records)}
+
+    def _load(self):
         try:
-            with open(self.path, "r") as f:
-                return json.load(f)
+            if self.format == "binary":
+                with open(self.path, "rb") as f:
+                    data = binary.load(f)
+            else:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
         except FileNotFoundError:
-            # File deleted mid-run → recreate
-            self._init_store()
-            return {"transactions": []}
-        except json.JSONDecodeError:
+            # File deleted mid-run → recreate (may already hold the file lock)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._create()
+            data = self._empty()
+        except (json.JSONDecodeError, binary.FormatError):
             # Corrupted file → reset safely
-            self._write({"transactions": []})
-            return {"transactions": []}
+            data = self._empty()
+            self._write(data)
+
+        # Normally a no-op: old files are migrated on open, but one may
+        # have been put back in place since.
+        return self._replay(self._migrate(data))
 
     def _write(self, data):
         tmp = self.path.with_suffix(".tmp")
-        with open(tmp, "w") as f:
-            json.dump(data, f, indent=2)
+        if self.format == "binary":
+            with open(tmp, "wb") as f:
+                binary.dump(data, f)
+        else:
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=2)
         tmp.replace(self.path)
+        self._invalidate()
+
+    def _invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._cache = None
+
+    def _commit(self, data, bump: bool = True, added: Iterable[str] = (), removed: Iterable[str] = ()):
+        """
+        Write a full snapshot; any pending journal is now folded in.
+        ``added``/``removed`` are the ids this write inserted or dropped.
+        """
+        with self._lock:
+            prev = data.get("version", 0)
+            version = prev + (1 if bump else 0)
+            # version/schema go first so _header() can read them from the file head.
+            data = {
+                "version": version,
+                "schema": SCHEMA_VERSION,
+                **{k: v for k, v in data.items() if k not in ("version", "schema")},
+            }
+            base = self._cache if self._cache is not None and self._cache.txns is not None else None
+            self._write(data)
+            self.journal_path.unlink(missing_ok=True)
+            self._journal_len = 0
+            # What we just wrote is the new state; no need to parse it back.
+            self._cache = _Snapshot(self._stat_key(), data, base)
+            if bump:
+                self.ids.record(prev, version, added, removed)
+
+    # ---------- journal ----------
+
+    def _read_journal(self) -> List[dict]:
+        try:
+            with open(self.journal_path, "r") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Torn write from a crash mid-append → ignore the tail
+                break
+        return entries
+
+    def _replay(self, data):
+        entries = self._read_journal()
+        self._journal_len = len(entries)
+        if not entries:
+            return data
+
+        data["version"] = max(
+            data.get("version", 0), max(e.get("version", 0) for e in entries)
+        )
+
+        data["transactions"] = self._replay_ops(data["transactions"], entries)
+        return data
+
+    def _replay_ops(self, records: List[dict], entries: List[dict]) -> List[dict]:
+        index = {t["id"]: i for i, t in enumerate(records)}
+
+        # Replay is idempotent, so a crash between compaction's replace
+        # and the journal unlink just re-applies already-folded records.
+        for e in entries:
+            op, tid = e["op"], e["id"]
+            i = index.get(tid)
+            if op == "add" and i is None:
+                index[tid] = len(records)
+                records.append({"id": tid, **e["fields"]})
+            elif op == "update" and i is not None and "deleted_at" not in records[i]:
+                records[i] = {"id": tid, **e["fields"]}
+            elif op == "delete" and i is not None:
+                records[i] = None
+                del index[tid]
+            elif op == "tombstone" and i is not None and "deleted_at" not in records[i]:
+                records[i] = {**records[i], "deleted_at": e["at"]}
+            elif op == "restore" and i is not None:
+                records[i] = {k: v for k, v in records[i].items() if k != "deleted_at"}
+
+        return [t for t in records if t is not None]
+
+    def _append(self, entries: List[dict]) -> None:
+        if not entries:
+            return
+
+        version = self.version() + 1
+        entries = [{**e, "version": version} for e in entries]
+        with open(self.journal_path, "a") as f:
+            f.write("".join(json.dumps(e) + "\n" for e in entries))
+        self._invalidate()
+        self.ids.record(
+            version - 1,
+            version,
+            added=[e["id"] for e in entries if e["op"] == "add"],
+            removed=[e["id"] for e in entries if e["op"] == "delete"],
+        )
+
+        if self._journal_len is None:
+            self._journal_len = len(self._read_journal())
+        else:
+            self._journal_len += len(entries)
+
+        if self._journal_len >= self.compact_every:
+            self._commit(self._read(), bump=False)
+            self.cold_rows.compact()
+
+    def _entry(self, op: str, txn: Transaction) -> dict:
+        fields = self._serialize(txn)
+        fields.pop("id", None)
+        return {"op": op, "id": txn.id, "fields": fields}
+
+    def compact(self) -> None:
+        """Fold the journal back into the snapshot file."""
+        with self._writing(None):
+            self._commit(self._read(), bump=False)
+            self.cold_rows.compact()
+
+    # ---------- versioning ----------
+
+    def version(self) -> int:
+        """
+        Current on-disk version: the snapshot header's, or the newest
+        journal record's. Reads only the file head and journal tail.
+        """
+        return max(self._header().get("version", 0), self._journal_version())
+
+    def _header(self) -> dict:
+        """version/schema of the snapshot file, read from its head only."""
+        try:
+            with open(self.path, "rb") as f:
+                if self.format == "binary":
+                    return binary.read_meta(f)
+                head = f.read(96)
+        except (FileNotFoundError, binary.FormatError, json.JSONDecodeError):
+            return {}
+        header = {}
+        m = re.match(rb'\{\s*"version":\s*(\d+)', head)
+        if m:
+            header["version"] = int(m.group(1))
+            m = re.match(rb',\s*"schema":\s*(\d+)', head[m.end():])
+            if m:
+                header["schema"] = int(m.group(1))
+        return header
+
+    def _journal_version(self) -> int:
+        try:
+            with open(self.journal_path, "rb") as f:
+                f.seek(0, 2)
+                f.seek(max(0, f.tell() - 65536))
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return 0
+
+        # Skip a torn last line and the partial first line of the window.
+        for line in reversed(lines):
+            try:
+                return json.loads(line).get("version", 0)
+            except ValueError:
+                continue
+        return 0
+
+    @contextmanager
+    def _writing(self, expected_version: Optional[int]):
+        """Exclusive (thread + process) write section on a fresh snapshot."""
+        with self._lock, file_lock(self.lock_path):
+            current = self.version()
+            if expected_version is not None and expected_version != current:
+                raise VersionConflict(expected_version, current)
+            # Another process may have written within one mtime tick.
+            if self._cache is not None and self._cache.meta.get("version", 0) != current:
+                self._cache = None
+            yield
 
     # ---------- public API ----------
 
-    def add(self, txns: List[Transaction]) -> None:
-        data = self._read()
-        existing_ids = {t["id"] for t in data["transactions"]}
+    def add(self, txns: List[Transaction], expected_version: Optional[int] = None) -> None:
+        self.add_many(txns, expected_version)
+
+    def add_many(self, txns: List[Transaction], expected_version: Optional[int] = None) -> int:
+        with self._writing(expected_version):
+            return self._add(txns)
 
+    def _add(self, txns: List[Transaction]) -> int:
+        first: Dict[str, Transaction] = {}
         for txn in txns:
-            if txn.id not in existing_ids:
-                data["transactions"].append(self._serialize(txn))
+            first.setdefault(txn.id, txn)
+        new = self._ids().missing(first)
+        if not new:
+            return 0
 
-        self._write(data)
+        self._stash_cold(first[tid] for tid in new)
+        if self.journal:
+            # No snapshot read at all: cost is proportional to the new rows.
+            self._append([self._entry("add", first[tid]) for tid in new])
+            return len(new)
+
+        data = self._read()
+        data["transactions"].extend(self._serialize(first[tid]) for tid in new)
+        self._commit(data, added=new)
+        return len(new)
+
+    def _ids(self) -> IdIndex:
+        """The id index, rebuilt from the snapshot if it missed a write."""
+        version = self.version()
+        if self.ids.version() != version:
+            self.ids.rebuild((r["id"] for r in self._current().records), version)
+        return self.ids
+
+    def id_cursor(self) -> str:
+        if self.ids.version() != self.version():
+            with self._writing(None):
+                self._ids()
+        return self.ids.cursor()
+
+    def id_changes(self, cursor: Optional[str]) -> Optional[Tuple[List[str], List[str], str]]:
+        # A stale index is rebuilt with a new token, which voids old cursors.
+        if self.ids.version() != self.version():
+            return None
+        return self.ids.changes(cursor)
+
+    def missing(self, ids: Iterable[str]) -> List[str]:
+        """Ids of ``ids`` not stored here, live or trashed (see IdIndex.missing)."""
+        return self._ids().missing(ids)
+
+    def update(self, txns: List[Transaction], expected_version: Optional[int] = None) -> None:
+        with self._writing(expected_version):
+            self._update(txns)
+
+    def _update(self, txns: List[Transaction]) -> None:
+        self._stash_cold(txns)
+        if self.journal:
+            # Updates for unknown ids are dropped on replay, so no read needed.
+            self._append([self._entry("update", txn) for txn in txns])
+            return
 
-    def update(self, txns: List[Transaction]) -> None:
         data = self._read()
         tx_map = {txn.id: txn for txn in txns}
 
         updated = []
         for t in data["transactions"]:
-            if t["id"] in tx_map:
+            if t["id"] in tx_map and "deleted_at" not in t:
                 updated.append(self._serialize(tx_map[t["id"]]))
             else:
                 updated.append(t)
 
         data["transactions"] = updated
-        self._write(data)
+        self._commit(data)
+        # Without a journal there is no compaction to ride along with.
+        if self.cold_rows.superseded() >= self.compact_every:
+            self.cold_rows.compact()
 
     def list_all(self) -> List[Transaction]:
-        data = self._read()
-        return [self._deserialize(t) for t in data["transactions"]]
+        return list(self.snapshot())
+
+    def snapshot(self) -> Tuple[Transaction, ...]:
+        """Immutable view of all transactions, shared until the store changes."""
+        return self._materialize(self._current()).txns
+
+    def get(self, txn_id: str) -> Optional[Transaction]:
+        return self._index().get(txn_id)
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Transaction]:
+        index = self._index()
+        return {tid: index[tid] for tid in ids if tid in index}
+
+    def _materialize(self, snap: _Snapshot) -> _Snapshot:
+        if snap.txns is None:
+            with self._lock:
+                if snap.txns is None:
+                    reuse = {}
+                    if snap.base is not None and snap.base.txns is not None:
+                        reuse = {id(r): t for r, t in zip(snap.base.live, snap.base.txns)}
+                    snap.txns = tuple(
+                        reuse.get(id(r)) or self._deserialize(r) for r in snap.live
+                    )
+                    snap.base = None
+        return snap
+
+    def _index(self) -> Dict[str, Transaction]:
+        """id → Transaction for the current snapshot, built once per version."""
+        snap = self._materialize(self._current())
+        if snap.index is None:
+            with self._lock:
+                if snap.index is None:
+                    snap.index = {t.id: t for t in snap.txns}
+        return snap.index
+
+    def query(
+        self,
+        filters: Optional[dict] = None,
+        sort: str = "datetime",
+        order: str = "desc",
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Transaction], int]:
+        filters = q.check(filters, sort)
+        snap = self._materialize(self._current())
+        txns = snap.txns
+        qi = self._query_index(snap)
 
-    def delete(self, ids: List[str]) -> None:
+        start, end = filters.get("start"), filters.get("end")
+        lo, hi = qi.date_range(start, end)
+        test = q.predicate(filters)
+
+        # Newest/oldest first: walk the date order, never sort.
+        if sort == "datetime":
+            offset = max(0, offset or 0)
+            total = hi - lo
+            if order == "desc":
+                positions, walk = qi.desc, range(hi - 1, lo - 1, -1)
+            else:
+                positions, walk = qi.asc, range(lo, hi)
+
+            if set(filters) <= {"start", "end"}:
+                stop = total if limit is None else min(total, offset + limit)
+                return [txns[positions[k]] for k in walk[offset:stop]], total
+
+            page, total = [], 0
+            for k in walk:
+                t = txns[positions[k]]
+                if test(t):
+                    if total >= offset and (limit is None or len(page) < limit):
+                        page.append(t)
+                    total += 1
+            return page, total
+
+        # Otherwise narrow to the smallest index bucket, then heap-select.
+        buckets = [range(len(txns))]
+        if start or end:
+            buckets.append(sorted(qi.asc[lo:hi]))
+        if filters.get("scope"):
+            buckets.append(qi.by_scope.get(filters["scope"], []))
+        if filters.get("direction"):
+            buckets.append(qi.by_direction.get(filters["direction"], []))
+        positions = min(buckets, key=len)
+
+        rows = (txns[i] for i in positions)
+        if test is not None:
+            rows = (t for t in rows if test(t))
+        return q.select(rows, sort, order, offset, limit)
+
+    def between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Tuple[Transaction, ...]:
+        snap = self._materialize(self._current())
+        key = (start, end)
+        rows = snap.windows.get(key)
+        if rows is None:
+            qi = self._query_index(snap)
+            lo, hi = qi.date_range(start, end)
+            if hi - lo == len(snap.txns):
+                rows = snap.txns
+            else:
+                rows = tuple(snap.txns[i] for i in sorted(qi.asc[lo:hi]))
+            if len(snap.windows) >= 16:
+                snap.windows.clear()
+            snap.windows[key] = rows
+        return rows
+
+    def _query_index(self, snap: _Snapshot) -> _QueryIndex:
+        if snap.query_index is None:
+            with self._lock:
+                if snap.query_index is None:
+                    snap.query_index = _QueryIndex(snap.txns)
+        return snap.query_index
+
+    def delete(self, ids: List[str], expected_version: Optional[int] = None) -> None:
         """Delete transactions by IDs."""
+        with self._writing(expected_version):
+            self._delete(ids)
+
+    def _delete(self, ids: List[str]) -> None:
+        self.cold_rows.drop(ids)
+        if self.journal:
+            self._append([{"op": "delete", "id": tid} for tid in dict.fromkeys(ids)])
+            return
+
         data = self._read()
         id_set = set(ids)
         data["transactions"] = [t for t in data["transactions"] if t["id"] not in id_set]
-        self._write(data)
+        self._commit(data, removed=id_set)
+
+    def replace_all(
+        self,
+        txns: List[Transaction],
+        deleted: Optional[Dict[str, datetime]] = None,
+        expected_version: Optional[int] = None,
+    ) -> None:
+        """Swap in ``txns`` as the whole store: one snapshot commit (see TransactionStore)."""
+        deleted = deleted or {}
+        with self._writing(expected_version):
+            first: Dict[str, Transaction] = {}
+            for t in txns:
+                first.setdefault(t.id, t)
+            records = []
+            for tid, t in first.items():
+                r = self._serialize(t)
+                if tid in deleted:
+                    r["deleted_at"] = deleted[tid].isoformat()
+                records.append(r)
+
+            data = self._read()
+            before = {r["id"] for r in data["transactions"]}
+            # New cold lines first (the newest line wins); lines of rows that
+            # are gone or now have no cold extras are dropped after the commit.
+            self._stash_cold(first.values())
+            data["transactions"] = records
+            self._commit(data, added=first.keys() - before, removed=before - first.keys())
+            self.cold_rows.drop(
+                tid for tid in before | first.keys()
+                if tid not in first or not split_extras(first[tid].extras)[1]
+            )
+
+    # ---------- trash ----------
+
+    def soft_delete(self, ids: List[str], expected_version: Optional[int] = None) -> int:
+        """Tombstone live transactions; returns how many were marked."""
+        with self._writing(expected_version):
+            live = self._index()
+            ids = [tid for tid in dict.fromkeys(ids) if tid in live]
+            if ids:
+                self._mark({"op": "tombstone", "id": tid, "at": datetime.now().isoformat()} for tid in ids)
+            return len(ids)
+
+    def restore(self, ids: List[str], expected_version: Optional[int] = None) -> int:
+        """Clear tombstones; the record comes back exactly as it was deleted."""
+        with self._writing(expected_version):
+            dead = self._tombstoned()
+            ids = [tid for tid in dict.fromkeys(ids) if tid in dead]
+            if ids:
+                self._mark({"op": "restore", "id": tid} for tid in ids)
+            return len(ids)
+
+    def purge(
+        self,
+        ids: Optional[List[str]] = None,
+        before: Optional[datetime] = None,
+        expected_version: Optional[int] = None,
+    ) -> int:
+        """Permanently remove tombstoned records (all, by id, or deleted before a time)."""
+        with self._writing(expected_version):
+            dead = self._tombstoned()
+            wanted = set(ids) if ids is not None else None
+            cutoff = before.isoformat() if before else None
+            doomed = [
+                tid for tid, r in dead.items()
+                if (wanted is None or tid in wanted) and (cutoff is None or r["deleted_at"] < cutoff)
+            ]
+            if doomed:
+                self._delete(doomed)
+            return len(doomed)
+
+    def trash(self) -> List[Tuple[Transaction, datetime]]:
+        """Tombstoned transactions with their deletion time, newest first."""
+        items = [
+            (self._deserialize(r), datetime.fromisoformat(r["deleted_at"]))
+            for r in self._tombstoned().values()
+        ]
+        items.sort(key=lambda item: item[1], reverse=True)
+        return items
+
+    def _tombstoned(self) -> Dict[str, dict]:
+        return {r["id"]: r for r in self._current().records if "deleted_at" in r}
+
+    def _mark(self, entries: Iterable[dict]) -> None:
+        """Apply tombstone/restore ops: one journal append, or one rewrite."""
+        entries = list(entries)
+        if self.journal:
+            self._append(entries)
+            return
+
+        data = self._read()
+        data["transactions"] = self._replay_ops(data["transactions"], entries)
+        self._commit(data)
 
     # ---------- helpers ----------
 
     def _serialize(self, txn: Transaction) -> dict:
+        """Hot record; cold extras are written by _stash_cold()."""
         # Prefer the model's explicit serializer when available.
         if hasattr(txn, "to_dict"):
-            return txn.to_dict()
-
-        d = txn.__dict__.copy()
-        d["datetime"] = txn.datetime.isoformat()
+            d = txn.to_dict()
+        else:
+            d = txn.__dict__.copy()
+            d["datetime"] = txn.datetime.isoformat()
+        d["extras"] = split_extras(d["extras"])[0]
         return d
 
-    def _deserialize(self, data: dict) -> Transaction:
-        d = data.copy()
+    def _stash_cold(self, txns: Iterable[Transaction]) -> None:
+        cold = {}
+        for t in txns:
+            c = split_extras(t.extras)[1]
+            if c:
+                cold[t.id] = c
+        self.cold_rows.put(cold)
+
+    def cold(self, ids: Iterable[str]) -> Dict[str, dict]:
+        return self.cold_rows.get_many(ids)
 
-        # ---- datetime ----
-        if isinstance(d.get("datetime"), str):
-            d["datetime"] = datetime.fromisoformat(d["datetime"])
+    def _deserialize(self, r: dict) -> Transaction:
+        # Current-schema record (see _upgrade): no fixups, no key filtering,
+        # and already validated when it was stored.
+        dt = r["datetime"]
+        return Transaction.trusted(
+            r["id"],
+            datetime.fromisoformat(dt) if type(dt) is str else dt,
+            r["paise"],
+            r["direction"],
+            r["counterparty"],
+            r["mode"],
+            r["reviewed"],
+            r["scope"],
+            r["category"],
+            r["extras"],
+        )
 
-        # ---- legacy compatibility ----
-        extras = d.get("extras")
-        if not isinstance(extras, dict):
-            extras = {}
 
-        # Older schema stored these at top-level; move to extras.
-        for legacy_key in ("reference", "upi_id", "source_file", "balance", "chq_id", "raw_txn"):
-            if legacy_key in d:
-                extras.setdefault(legacy_key, d.pop(legacy_key))
+def _relayout(record: dict, cold: Dict[str, dict]) -> dict:
+    """A schema 2/3 record in the current layout; cold extras go into ``cold``."""
+    if "amount" in record:
+        record = dict(record)
+        record["paise"] = to_paise(record.pop("amount"))
+    hot, c = split_extras(record["extras"])
+    if not c:
+        return record
+    cold[record["id"]] = c
+    return {**record, "extras": hot}
 
-        d["extras"] = extras
-        d.setdefault("mode", extras.get("mode") or "UNKNOWN")
 
-        if d.get("category") is None:
-            d["category"] = []
+def _upgrade(record: dict) -> dict:
+    """A schema 1 record in the current layout."""
+    d = dict(record)
+    extras = d.get("extras")
+    extras = dict(extras) if isinstance(extras, dict) else {}
 
-        # Drop unknown keys to avoid crashing on old/new schema drift.
-        allowed = set(Transaction.__dataclass_fields__.keys())
-        d = {k: v for k, v in d.items() if k in allowed}
+    # Older schema stored these at top-level; move to extras.
+    for legacy_key in LEGACY_KEYS:
+        if legacy_key in d:
+            extras.setdefault(legacy_key, d.pop(legacy_key))
 
-        return Transaction(**d)
+    # Unknown keys are dropped to avoid crashing on old/new schema drift.
+    out = {
+        "id": d["id"],
+        "datetime": d["datetime"],
+        "amount": d["amount"],
+        "direction": d["direction"],
+        "counterparty": d["counterparty"],
+        "mode": d["mode"] if "mode" in d else extras.get("mode") or "UNKNOWN",
+        "reviewed": d.get("reviewed", False),
+        "scope": d.get("scope", "unknown"),
+        "category": d.get("category") or [],
+        "extras": extras,
+    }
+    if "deleted_at" in d:
+        out["deleted_at"] = d["deleted_at"]
+    return out
@@ -0,0 +1,30 @@
+"""
+Advisory inter-process locks for the file-backed stores.
+"""
+
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, stores are single-process there
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False):
+    """
+    Hold flock(2) on ``path`` (created if missing) for the block.
+    Exclusive by default; a no-op where fcntl is unavailable.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,421 @@
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fie.core.transaction import Transaction
+from fie.storage.base import TransactionStore, VersionConflict
+from fie.storage.json_store import JsonTransactionStore
+from fie.storage.locking import file_lock
+from fie.storage import query as q
+
+
+MANIFEST = "manifest.json"
+
+
+def month_key(dt: datetime) -> str:
+    return f"{dt.year:04d}-{dt.month:02d}"
+
+
+class PartitionedTransactionStore(TransactionStore):
+    """
+    One JsonTransactionStore shard per calendar month (``YYYY-MM.json``)
+    under ``root``, plus ``manifest.json`` with each shard's live and
+    soft-deleted row counts, datetime bounds and the store-wide write
+    ``version``.
+
+    Date-bounded reads (between, query with start/end) open only the
+    shards whose month overlaps the bounds, and writes rewrite only the
+    shards holding the touched transactions. The shard is picked by the
+    transaction's datetime, so an update that moves a transaction into
+    another month deletes it from the old shard and adds it to the new one.
+
+    ``shard_options`` (journal, compact_every, format, bloom) are passed to every
+    shard. If ``root`` does not exist yet and ``legacy_path`` is a
+    single-file store, it is split into shards on first open.
+
+    Mutations hold flock on ``root/.lock`` and accept ``expected_version``
+    with the same compare-and-swap semantics as JsonTransactionStore.
+    """
+
+    def __init__(self, root: Path, legacy_path: Optional[Path] = None, **shard_options):
+        self.root = root
+        self.lock_path = root / ".lock"
+        self.shard_options = shard_options
+        self.suffix = ".fieb" if shard_options.get("format") == "binary" else ".json"
+        self._lock = threading.RLock()
+        self._shards: Dict[str, JsonTransactionStore] = {}
+        self._manifest: Optional[dict] = None
+        self._manifest_key = None
+        # (shard snapshots, combined rows) for snapshot() and between()
+        self._snapshot: Tuple[tuple, Tuple[Transaction, ...]] = ((), ())
+        self._windows: Dict[tuple, Tuple[tuple, Tuple[Transaction, ...]]] = {}
+        self._init_store(legacy_path)
+
+    # ---------- lifecycle ----------
+
+    def _init_store(self, legacy_path: Optional[Path]):
+        if self.root.exists():
+            return
+        self.root.mkdir(parents=True)
+        with file_lock(self.lock_path):
+            if (self.root / MANIFEST).exists():
+                return
+            self._write_manifest({"version": 0, "partitions": {}})
+            if legacy_path is not None and legacy_path.exists():
+                legacy = JsonTransactionStore(legacy_path)
+                self._add(list(legacy.detail_many(t.id for t in legacy.list_all()).values()))
+
+    # ---------- manifest ----------
+
+    def _read_manifest(self) -> dict:
+        path = self.root / MANIFEST
+        try:
+            st = path.stat()
+            key = (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            key = None
+
+        if self._manifest is None or key != self._manifest_key:
+            try:
+                with open(path, "r") as f:
+                    self._manifest = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._manifest = {"version": 0, "partitions": {}}
+            self._manifest_key = key
+        return self._manifest
+
+    def _write_manifest(self, manifest: dict) -> None:
+        path = self.root / MANIFEST
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        tmp.replace(path)
+        self._manifest = None
+
+    def _refresh(self, months: Iterable[str]) -> None:
+        """Recompute manifest entries for shards that were just written."""
+        manifest = self._read_manifest()
+        partitions = dict(manifest["partitions"])
+        for month in months:
+            shard = self._shard(month)
+            rows = shard.snapshot()
+            deleted = len(shard.trash())
+            if rows or deleted:
+                dates = [t.datetime for t in rows]
+                partitions[month] = {
+                    "count": len(rows),
+                    "deleted": deleted,
+                    "first": min(dates).isoformat() if dates else None,
+                    "last": max(dates).isoformat() if dates else None,
+                }
+            else:
+                partitions.pop(month, None)
+                self._drop_shard(month)
+        self._write_manifest({
+            **manifest,
+            "version": manifest.get("version", 0) + 1,
+            "partitions": dict(sorted(partitions.items())),
+        })
+
+    def months(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> List[str]:
+        """Months that have a shard, oldest first, limited to the bounds."""
+        lo = month_key(start) if start else ""
+        hi = month_key(end) if end else "9999-99"
+        return [m for m in sorted(self._read_manifest()["partitions"]) if lo <= m <= hi]
+
+    # ---------- shards ----------
+
+    def _shard(self, month: str) -> JsonTransactionStore:
+        shard = self._shards.get(month)
+        if shard is None:
+            shard = self._shards[month] = JsonTransactionStore(
+                self.root / f"{month}{self.suffix}", **self.shard_options
+            )
+        return shard
+
+    def _drop_shard(self, month: str) -> None:
+        shard = self._shards.pop(month, None)
+        if shard is not None:
+            shard.path.unlink(missing_ok=True)
+            shard.journal_path.unlink(missing_ok=True)
+            shard.ids.path.unlink(missing_ok=True)
+            shard.ids.bloom_path.unlink(missing_ok=True)
+            shard.cold_rows.path.unlink(missing_ok=True)
+
+    def _group(self, txns: Iterable[Transaction]) -> Dict[str, List[Transaction]]:
+        groups = defaultdict(list)
+        for t in txns:
+            groups[month_key(t.datetime)].append(t)
+        return groups
+
+    def _locate(self, ids: Iterable[str]) -> Dict[str, Dict[str, Transaction]]:
+        """month → {id: Transaction} for the ids that exist."""
+        remaining = set(ids)
+        found = {}
+        for month in self.months():
+            if not remaining:
+                break
+            hits = self._shard(month).get_many(remaining)
+            if hits:
+                found[month] = hits
+                remaining -= hits.keys()
+        return found
+
+    # ---------- versioning ----------
+
+    def version(self) -> int:
+        return self._read_manifest().get("version", 0)
+
+    def id_cursor(self) -> Optional[str]:
+        """The shards' id index cursors, by month."""
+        cursors = {m: self._shard(m).id_cursor() for m in self.months()}
+        if None in cursors.values():
+            return None
+        return json.dumps(cursors, sort_keys=True, separators=(",", ":"))
+
+    def id_changes(self, cursor: Optional[str]) -> Optional[Tuple[List[str], List[str], str]]:
+        try:
+            before = json.loads(cursor) if cursor else {}
+        except json.JSONDecodeError:
+            return None
+        months = self.months()
+        if not isinstance(before, dict) or before.keys() - set(months):
+            return None  # not ours, or a shard emptied and was dropped with its log
+        added, removed, after = {}, set(), {}
+        for month in months:
+            changes = self._shard(month).id_changes(before.get(month))
+            if changes is None:
+                return None
+            shard_added, shard_removed, after[month] = changes
+            added.update(dict.fromkeys(shard_added))
+            removed.update(shard_removed)
+        # A row update() moved is removed from one shard and added to another.
+        cursor = json.dumps(after, sort_keys=True, separators=(",", ":"))
+        return list(added), sorted(removed - added.keys()), cursor
+
+    @contextmanager
+    def _writing(self, expected_version: Optional[int]):
+        with self._lock, file_lock(self.lock_path):
+            self._manifest = None
+            current = self.version()
+            if expected_version is not None and expected_version != current:
+                raise VersionConflict(expected_version, current)
+            yield
+
+    # ---------- public API ----------
+
+    def add(self, txns: List[Transaction], expected_version: Optional[int] = None) -> None:
+        self.add_many(txns, expected_version)
+
+    def add_many(self, txns: List[Transaction], expected_version: Optional[int] = None) -> int:
+        with self._writing(expected_version):
+            return self._add(txns)
+
+    def _add(self, txns: List[Transaction]) -> int:
+        # Ids hash the datetime, so a re-import lands in the same shard
+        # as the original unless update() has since moved it to another
+        # month: rows new to their own shard are checked against the id
+        # indexes of the others.
+        groups = self._group(txns)
+        months = self.months()
+        for month, group in groups.items():
+            unseen = [t.id for t in group]
+            if month in months:
+                unseen = self._shard(month).missing(unseen)
+            held = set()
+            for other in months:
+                if other != month and unseen:
+                    still = self._shard(other).missing(unseen)
+                    held.update(set(unseen) - set(still))
+                    unseen = still
+            if held:
+                groups[month] = [t for t in group if t.id not in held]
+        counts = {month: self._shard(month).add_many(group) for month, group in groups.items() if group}
+        touched = [m for m, n in counts.items() if n]
+        if touched:
+            self._refresh(touched)
+        return sum(counts.values())
+
+    def update(self, txns: List[Transaction], expected_version: Optional[int] = None) -> None:
+        with self._writing(expected_version):
+            known = set(self.months())
+            touched, moved = set(), []
+            for month, group in self._group(txns).items():
+                found = self._shard(month).get_many(t.id for t in group) if month in known else {}
+                in_place = [t for t in group if t.id in found]
+                if in_place:
+                    self._shard(month).update(in_place)
+                    touched.add(month)
+                moved += [t for t in group if t.id not in found]
+
+            if moved:
+                located = self._locate(t.id for t in moved)
+                cold = {}
+                for month, hits in located.items():
+                    # Cold extras move with the row to its new shard.
+                    cold.update(self._shard(month).cold(hits))
+                    self._shard(month).delete(list(hits))
+                    touched.add(month)
+                existing = {tid for hits in located.values() for tid in hits}
+                moved = [
+                    t.evolve(extras={**cold[t.id], **t.extras}) if t.id in cold else t
+                    for t in moved if t.id in existing
+                ]
+                for month, group in self._group(moved).items():
+                    self._shard(month).add(group)
+                    touched.add(month)
+
+            if touched:
+                self._refresh(touched)
+
+    def delete(self, ids: List[str], expected_version: Optional[int] = None) -> None:
+        """Delete transactions by IDs."""
+        with self._writing(expected_version):
+            located = self._locate(ids)
+            for month, hits in located.items():
+                self._shard(month).delete(list(hits))
+            if located:
+                self._refresh(located)
+
+    def replace_all(
+        self,
+        txns: List[Transaction],
+        deleted: Optional[Dict[str, datetime]] = None,
+        expected_version: Optional[int] = None,
+    ) -> None:
+        """
+        Swap in ``txns`` as the whole store (see TransactionStore) under the
+        store lock: each month's shard is replaced in one commit, shards
+        no longer needed are emptied, then the manifest is rewritten once.
+        """
+        deleted = deleted or {}
+        with self._writing(expected_version):
+            groups = self._group(txns)
+            months = set(self.months()) | groups.keys()
+            for month in sorted(months):
+                group = groups.get(month, [])
+                self._shard(month).replace_all(group, {t.id: deleted[t.id] for t in group if t.id in deleted})
+            self._refresh(months)
+
+    # ---------- trash ----------
+
+    def _trash_months(self) -> List[str]:
+        partitions = self._read_manifest()["partitions"]
+        return [m for m in sorted(partitions) if partitions[m].get("deleted")]
+
+    def soft_delete(self, ids: List[str], expected_version: Optional[int] = None) -> int:
+        with self._writing(expected_version):
+            located = self._locate(ids)
+            count = sum(self._shard(m).soft_delete(list(hits)) for m, hits in located.items())
+            if located:
+                self._refresh(located)
+            return count
+
+    def restore(self, ids: List[str], expected_version: Optional[int] = None) -> int:
+        with self._writing(expected_version):
+            counts = {m: self._shard(m).restore(ids) for m in self._trash_months()}
+            touched = [m for m, n in counts.items() if n]
+            if touched:
+                self._refresh(touched)
+            return sum(counts.values())
+
+    def purge(
+        self,
+        ids: Optional[List[str]] = None,
+        before: Optional[datetime] = None,
+        expected_version: Optional[int] = None,
+    ) -> int:
+        with self._writing(expected_version):
+            counts = {m: self._shard(m).purge(ids, before) for m in self._trash_months()}
+            touched = [m for m, n in counts.items() if n]
+            if touched:
+                self._refresh(touched)
+            return sum(counts.values())
+
+    def trash(self) -> List[Tuple[Transaction, datetime]]:
+        items = [item for m in self._trash_months() for item in self._shard(m).trash()]
+        items.sort(key=lambda item: item[1], reverse=True)
+        return items
+
+    def list_all(self) -> List[Transaction]:
+        return list(self.snapshot())
+
+    def snapshot(self) -> Tuple[Transaction, ...]:
+        """All shards in month order; the same tuple until a shard changes."""
+        parts = tuple(self._shard(m).snapshot() for m in self.months())
+        cached_parts, rows = self._snapshot
+        if not _same(parts, cached_parts):
+            rows = tuple(chain.from_iterable(parts))
+            self._snapshot = (parts, rows)
+        return rows
+
+    def between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Tuple[Transaction, ...]:
+        if start is None and end is None:
+            return self.snapshot()
+
+        parts = tuple(self._shard(m).between(start, end) for m in self.months(start, end))
+        key = (start, end)
+        cached = self._windows.get(key)
+        if cached is not None and _same(parts, cached[0]):
+            return cached[1]
+
+        rows = parts[0] if len(parts) == 1 else tuple(chain.from_iterable(parts))
+        if len(self._windows) >= 16:
+            self._windows.clear()
+        self._windows[key] = (parts, rows)
+        return rows
+
+    def get(self, txn_id: str) -> Optional[Transaction]:
+        return self.get_many([txn_id]).get(txn_id)
+
+    def cold(self, ids: Iterable[str]) -> Dict[str, dict]:
+        remaining = set(ids)
+        found = {}
+        for month, hits in self._locate(remaining).items():
+            found.update(self._shard(month).cold(hits))
+            remaining -= hits.keys()
+        # _locate() sees live rows only; tombstoned ones are in some shard's trash.
+        for month in self._trash_months():
+            if not remaining:
+                break
+            shard = self._shard(month)
+            hits = remaining.intersection(t.id for t, _ in shard.trash())
+            if hits:
+                found.update(shard.cold(hits))
+                remaining -= hits
+        return found
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Transaction]:
+        ids = list(dict.fromkeys(ids))
+        found = {}
+        for hits in self._locate(ids).values():
+            found.update(hits)
+        return {tid: found[tid] for tid in ids if tid in found}
+
+    def query(
+        self,
+        filters: Optional[dict] = None,
+        sort: str = "datetime",
+        order: str = "desc",
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Transaction], int]:
+        filters = q.check(filters, sort)
+        rows = self.between(filters.get("start"), filters.get("end"))
+        test = q.predicate(filters)
+        if test is not None:
+            rows = (t for t in rows if test(t))
+        return q.select(rows, sort, order, offset, limit)
+
+
+def _same(a: tuple, b: tuple) -> bool:
+    return len(a) == len(b) and all(x is y for x, y in zip(a, b))
@@ -0,0 +1,106 @@
+"""
+Shared filter/sort/paginate logic behind TransactionStore.query().
+
+Filters (all optional):
+    scope, category, direction  exact match (category: membership)
+    search                      lowercase substring of counterparty or amount
+    start, end                  inclusive datetime bounds
+"""
+
+import heapq
+from operator import attrgetter
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from fie.core.transaction import Transaction
+
+
+SORT_FIELDS = (
+    "datetime", "amount", "scope", "counterparty",
+    "direction", "mode", "reviewed", "id",
+)
+
+FILTER_KEYS = ("scope", "category", "direction", "search", "start", "end")
+
+# Sort field → Transaction attribute (amount orders the same as paise).
+SORT_ATTRS = {"amount": "paise"}
+
+
+def check(filters: Optional[dict], sort: str) -> dict:
+    """Validate arguments; returns filters with empty values dropped."""
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"Cannot sort by: {sort}")
+
+    filters = {k: v for k, v in (filters or {}).items() if v not in (None, "")}
+    unknown = set(filters) - set(FILTER_KEYS)
+    if unknown:
+        raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+    return filters
+
+
+def predicate(filters: dict) -> Optional[Callable[[Transaction], bool]]:
+    """Single test for all filters, or None when nothing is filtered."""
+    tests = []
+
+    scope = filters.get("scope")
+    if scope:
+        tests.append(lambda t: t.scope == scope)
+    category = filters.get("category")
+    if category:
+        tests.append(lambda t: category in t.category)
+    direction = filters.get("direction")
+    if direction:
+        tests.append(lambda t: t.direction == direction)
+    search = filters.get("search")
+    if search:
+        search = search.lower()
+        tests.append(lambda t: search in t.counterparty.lower() or search in str(t.amount))
+    start = filters.get("start")
+    if start:
+        tests.append(lambda t: t.datetime >= start)
+    end = filters.get("end")
+    if end:
+        tests.append(lambda t: t.datetime <= end)
+
+    if not tests:
+        return None
+    if len(tests) == 1:
+        return tests[0]
+    return lambda t: all(test(t) for test in tests)
+
+
+def select(
+    rows: Iterable[Transaction],
+    sort: str = "datetime",
+    order: str = "desc",
+    offset: int = 0,
+    limit: Optional[int] = None,
+) -> Tuple[List[Transaction], int]:
+    """
+    Sort and slice already-filtered rows, returning (page, total).
+
+    With a limit only the top offset+limit rows are kept (heap select), so
+    the full result is never sorted. Results match
+    ``sorted(rows, key=..., reverse=order == "desc")[offset:offset + limit]``.
+    """
+    key = attrgetter(SORT_ATTRS.get(sort, sort))
+    reverse = order == "desc"
+    offset = max(0, offset or 0)
+
+    if limit is None:
+        ordered = sorted(rows, key=key, reverse=reverse)
+        return ordered[offset:], len(ordered)
+
+    if offset + limit <= 0:
+        return [], sum(1 for _ in rows)
+
+    total = 0
+
+    def counted():
+        nonlocal total
+        for row in rows:
+            total += 1
+            yield row
+
+    pick = heapq.nlargest if reverse else heapq.nsmallest
+    top = pick(offset + limit, counted(), key=key)
+    return top[offset:], total
@@ -0,0 +1,489 @@
+import json
+import shutil
+import sqlite3
+import tempfile
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fie.core.transaction import Transaction
+from fie.storage.base import TransactionStore
+from fie.storage.cold import split_extras
+from fie.storage.json_store import JsonTransactionStore
+from fie.storage import query as q
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+    id           TEXT PRIMARY KEY,
+    datetime     TEXT NOT NULL,
+    paise        INTEGER NOT NULL,
+    direction    TEXT NOT NULL,
+    counterparty TEXT NOT NULL,
+    mode         TEXT NOT NULL,
+    reviewed     INTEGER NOT NULL DEFAULT 0,
+    scope        TEXT NOT NULL DEFAULT 'unknown',
+    category     TEXT NOT NULL DEFAULT '[]',
+    extras       TEXT NOT NULL DEFAULT '{}',
+    deleted_at   TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_txn_datetime     ON transactions (datetime);
+CREATE INDEX IF NOT EXISTS idx_txn_scope        ON transactions (scope);
+CREATE INDEX IF NOT EXISTS idx_txn_direction    ON transactions (direction);
+CREATE INDEX IF NOT EXISTS idx_txn_counterparty ON transactions (counterparty);
+CREATE TABLE IF NOT EXISTS transaction_cold (
+    id     TEXT PRIMARY KEY,
+    extras TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS store_meta (
+    key   TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS id_log (
+    seq   INTEGER PRIMARY KEY AUTOINCREMENT,
+    id    TEXT NOT NULL,
+    added INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS id_log_insert AFTER INSERT ON transactions
+BEGIN INSERT INTO id_log (id, added) VALUES (new.id, 1); END;
+CREATE TRIGGER IF NOT EXISTS id_log_delete AFTER DELETE ON transactions
+BEGIN INSERT INTO id_log (id, added) VALUES (old.id, 0); END;
+"""
+
+# id_log rows kept once it is pruned (id_changes() from before them rescans)
+ID_LOG_KEEP = 100_000
+
+COLUMNS = (
+    "id", "datetime", "paise", "direction", "counterparty",
+    "mode", "reviewed", "scope", "category", "extras",
+)
+
+
+class SqliteTransactionStore(TransactionStore):
+    """
+    TransactionStore backed by a single SQLite file.
+
+    Rows are keyed by id (PRIMARY KEY) with secondary indexes on the
+    columns the web UI filters by, so single-row edits touch one row
+    instead of rewriting the whole store.
+
+    Soft-deleted rows keep a ``deleted_at`` timestamp and are excluded
+    from every read except trash().
+
+    Cold extras (fie.storage.cold) live in ``transaction_cold`` and are
+    only read by cold()/detail().
+
+    Every write bumps the ``version`` row of ``store_meta`` in the same
+    transaction, so version() works across processes as for JSON stores.
+    Triggers log each inserted and deleted id to ``id_log`` for
+    id_changes(); ``store_meta.id_log_floor`` is the last seq pruned.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._init_store()
+
+    # ---------- lifecycle ----------
+
+    def _init_store(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            had_cold = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'transaction_cold'"
+            ).fetchone()
+            conn.executescript(SCHEMA)
+            # Databases created before soft delete lack the tombstone column.
+            cols = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+            if "deleted_at" not in cols:
+                conn.execute("ALTER TABLE transactions ADD COLUMN deleted_at TEXT")
+            # ... and before integer paise, a REAL rupee amount.
+            if "amount" in cols:
+                conn.execute("ALTER TABLE transactions ADD COLUMN paise INTEGER NOT NULL DEFAULT 0")
+                conn.execute("UPDATE transactions SET paise = CAST(round(amount * 100) AS INTEGER)")
+                conn.execute("ALTER TABLE transactions DROP COLUMN amount")
+            if not had_cold:
+                self._split_cold(conn)
+
+    def _split_cold(self, conn: sqlite3.Connection) -> None:
+        """One-time move of cold extras out of rows written before the split."""
+        hot, cold = [], []
+        for tid, extras in conn.execute("SELECT id, extras FROM transactions WHERE extras != '{}'"):
+            h, c = split_extras(json.loads(extras))
+            if c:
+                hot.append((json.dumps(h), tid))
+                cold.append((tid, json.dumps(c)))
+        conn.executemany("UPDATE transactions SET extras = ? WHERE id = ?", hot)
+        conn.executemany("INSERT OR REPLACE INTO transaction_cold (id, extras) VALUES (?, ?)", cold)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _bump(self, conn: sqlite3.Connection) -> None:
+        conn.execute(
+            "INSERT INTO store_meta (key, value) VALUES ('version', 1) "
+            "ON CONFLICT (key) DO UPDATE SET value = value + 1"
+        )
+        floor, top = self._id_log_bounds(conn)
+        if top - floor > 2 * ID_LOG_KEEP:
+            floor = top - ID_LOG_KEEP
+            conn.execute("DELETE FROM id_log WHERE seq <= ?", (floor,))
+            conn.execute(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('id_log_floor', ?)", (floor,)
+            )
+
+    def _id_log_bounds(self, conn: sqlite3.Connection) -> Tuple[int, int]:
+        """(last seq pruned, last seq written)."""
+        row = conn.execute("SELECT value FROM store_meta WHERE key = 'id_log_floor'").fetchone()
+        floor = row[0] if row else 0
+        top = conn.execute("SELECT MAX(seq) FROM id_log").fetchone()[0]
+        return floor, floor if top is None else top
+
+    def id_cursor(self) -> str:
+        with closing(self._connect()) as conn:
+            return str(self._id_log_bounds(conn)[1])
+
+    def id_changes(self, cursor: Optional[str]) -> Optional[Tuple[List[str], List[str], str]]:
+        # Rows stored before the log existed were never logged: no "since empty".
+        if not cursor or not cursor.isdigit():
+            return None
+        since = int(cursor)
+        with closing(self._connect()) as conn:
+            floor, top = self._id_log_bounds(conn)
+            if not floor <= since <= top:
+                return None
+            rows = conn.execute(
+                "SELECT seq, id, added FROM id_log WHERE seq > ? ORDER BY seq", (since,)
+            ).fetchall()
+            if self._id_log_bounds(conn)[0] > since:
+                return None  # pruned while we read
+        added, removed = {}, set()
+        for _, tid, was_added in rows:
+            if was_added:
+                removed.discard(tid)
+                added[tid] = None
+            elif tid in added:
+                del added[tid]
+            else:
+                removed.add(tid)
+        return list(added), sorted(removed), str(rows[-1][0] if rows else since)
+
+    def version(self) -> int:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT value FROM store_meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    # ---------- public API ----------
+
+    def add(self, txns: List[Transaction]) -> None:
+        self.add_many(txns)
+
+    def add_many(self, txns: List[Transaction]) -> int:
+        # The PRIMARY KEY index does the dedupe; rowcount counts real inserts.
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with closing(self._connect()) as conn, conn:
+            cur = conn.executemany(
+                f"INSERT OR IGNORE INTO transactions ({', '.join(COLUMNS)}) "
+                f"VALUES ({placeholders})",
+                [self._to_row(t) for t in txns],
+            )
+            added = cur.rowcount
+            self._put_cold(conn, txns, "INSERT OR IGNORE")
+            self._bump(conn)
+            return added
+
+    def update(self, txns: List[Transaction]) -> None:
+        assignments = ", ".join(f"{c} = ?" for c in COLUMNS[1:])
+        rows = []
+        for t in txns:
+            row = self._to_row(t)
+            rows.append(row[1:] + row[:1])
+
+        with closing(self._connect()) as conn, conn:
+            # Cold rows only for the ids actually updated: not unknown or
+            # tombstoned ones.
+            matched = [
+                t for t, row in zip(txns, rows)
+                if conn.execute(
+                    f"UPDATE transactions SET {assignments} WHERE id = ? AND deleted_at IS NULL", row
+                ).rowcount
+            ]
+            self._put_cold(conn, matched, "INSERT OR REPLACE")
+            self._bump(conn)
+
+    def _put_cold(self, conn: sqlite3.Connection, txns: List[Transaction], verb: str) -> None:
+        rows = []
+        for t in txns:
+            cold = split_extras(t.extras)[1]
+            if cold:
+                rows.append((t.id, json.dumps(cold)))
+        conn.executemany(f"{verb} INTO transaction_cold (id, extras) VALUES (?, ?)", rows)
+
+    def cold(self, ids: Iterable[str]) -> Dict[str, dict]:
+        ids = list(dict.fromkeys(ids))
+        found = {}
+        with closing(self._connect()) as conn:
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                cur = conn.execute(
+                    f"SELECT id, extras FROM transaction_cold "
+                    f"WHERE id IN ({', '.join('?' for _ in chunk)})",
+                    chunk,
+                )
+                for tid, extras in cur:
+                    found[tid] = json.loads(extras)
+        return found
+
+    def list_all(self) -> List[Transaction]:
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM transactions "
+                f"WHERE deleted_at IS NULL ORDER BY rowid"
+            )
+            return [self._from_row(r) for r in cur]
+
+    def get(self, txn_id: str) -> Optional[Transaction]:
+        return self.get_many([txn_id]).get(txn_id)
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Transaction]:
+        ids = list(dict.fromkeys(ids))
+        found = {}
+        with closing(self._connect()) as conn:
+            # Stay under SQLite's default host-parameter limit.
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                cur = conn.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM transactions "
+                    f"WHERE deleted_at IS NULL AND id IN ({', '.join('?' for _ in chunk)})",
+                    chunk,
+                )
+                for row in cur:
+                    found[row[0]] = self._from_row(row)
+        return {tid: found[tid] for tid in ids if tid in found}
+
+    def between(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None
+    ) -> Tuple[Transaction, ...]:
+        where, params = ["deleted_at IS NULL"], []
+        if start:
+            where.append("datetime >= ?")
+            params.append(start.isoformat())
+        if end:
+            where.append("datetime <= ?")
+            params.append(end.isoformat())
+        clause = f"WHERE {' AND '.join(where)}"
+
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM transactions {clause} ORDER BY rowid",
+                params,
+            )
+            return tuple(self._from_row(r) for r in cur)
+
+    def query(
+        self,
+        filters: Optional[dict] = None,
+        sort: str = "datetime",
+        order: str = "desc",
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Transaction], int]:
+        filters = q.check(filters, sort)
+
+        where, params = ["deleted_at IS NULL"], []
+        for col in ("scope", "direction"):
+            if col in filters:
+                where.append(f"{col} = ?")
+                params.append(filters[col])
+        if "category" in filters:
+            where.append("EXISTS (SELECT 1 FROM json_each(category) WHERE value = ?)")
+            params.append(filters["category"])
+        if "search" in filters:
+            where.append("(instr(lower(counterparty), ?) > 0 OR instr(CAST(paise / 100.0 AS TEXT), ?) > 0)")
+            params += [filters["search"].lower()] * 2
+        if "start" in filters:
+            where.append("datetime >= ?")
+            params.append(filters["start"].isoformat())
+        if "end" in filters:
+            where.append("datetime <= ?")
+            params.append(filters["end"].isoformat())
+        clause = f"WHERE {' AND '.join(where)}"
+
+        # rowid breaks ties in insertion order, like a stable sort.
+        direction = "DESC" if order == "desc" else "ASC"
+        sql = (
+            f"SELECT {', '.join(COLUMNS)} FROM transactions {clause} "
+            f"ORDER BY {q.SORT_ATTRS.get(sort, sort)} {direction}, rowid LIMIT ? OFFSET ?"
+        )
+        page_params = params + [-1 if limit is None else limit, max(0, offset or 0)]
+
+        with closing(self._connect()) as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM transactions {clause}", params).fetchone()[0]
+            page = [self._from_row(r) for r in conn.execute(sql, page_params)]
+        return page, total
+
+    def delete(self, ids: List[str]) -> None:
+        """Delete transactions by IDs."""
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "DELETE FROM transactions WHERE id = ?",
+                [(i,) for i in ids],
+            )
+            conn.executemany(
+                "DELETE FROM transaction_cold WHERE id = ?",
+                [(i,) for i in ids],
+            )
+            self._bump(conn)
+
+    def replace_all(
+        self, txns: List[Transaction], deleted: Optional[Dict[str, datetime]] = None
+    ) -> None:
+        """Swap in ``txns`` as the whole store in one transaction (see TransactionStore)."""
+        deleted = deleted or {}
+        first: Dict[str, Transaction] = {}
+        for t in txns:
+            first.setdefault(t.id, t)
+        placeholders = ", ".join("?" for _ in range(len(COLUMNS) + 1))
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM transactions")
+            conn.execute("DELETE FROM transaction_cold")
+            conn.executemany(
+                f"INSERT INTO transactions ({', '.join(COLUMNS)}, deleted_at) VALUES ({placeholders})",
+                [
+                    self._to_row(t) + (deleted[tid].isoformat() if tid in deleted else None,)
+                    for tid, t in first.items()
+                ],
+            )
+            self._put_cold(conn, list(first.values()), "INSERT")
+            self._bump(conn)
+
+    # ---------- trash ----------
+
+    def soft_delete(self, ids: List[str]) -> int:
+        now = datetime.now().isoformat()
+        with closing(self._connect()) as conn, conn:
+            cur = conn.executemany(
+                "UPDATE transactions SET deleted_at = ? WHERE id = ? AND deleted_at IS NULL",
+                [(now, tid) for tid in dict.fromkeys(ids)],
+            )
+            self._bump(conn)
+            return cur.rowcount
+
+    def restore(self, ids: List[str]) -> int:
+        with closing(self._connect()) as conn, conn:
+            cur = conn.executemany(
+                "UPDATE transactions SET deleted_at = NULL WHERE id = ? AND deleted_at IS NOT NULL",
+                [(tid,) for tid in dict.fromkeys(ids)],
+            )
+            self._bump(conn)
+            return cur.rowcount
+
+    def purge(self, ids: Optional[List[str]] = None, before: Optional[datetime] = None) -> int:
+        where, params = "deleted_at IS NOT NULL", []
+        if before:
+            where += " AND deleted_at < ?"
+            params.append(before.isoformat())
+
+        with closing(self._connect()) as conn, conn:
+            if ids is None:
+                count = conn.execute(f"DELETE FROM transactions WHERE {where}", params).rowcount
+            else:
+                count = conn.executemany(
+                    f"DELETE FROM transactions WHERE {where} AND id = ?",
+                    [(*params, tid) for tid in dict.fromkeys(ids)],
+                ).rowcount
+            if count:
+                conn.execute(
+                    "DELETE FROM transaction_cold WHERE id NOT IN (SELECT id FROM transactions)"
+                )
+            self._bump(conn)
+            return count
+
+    def trash(self) -> List[Tuple[Transaction, datetime]]:
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                f"SELECT {', '.join(COLUMNS)}, deleted_at FROM transactions "
+                f"WHERE deleted_at IS NOT NULL ORDER BY deleted_at DESC"
+            )
+            return [(self._from_row(r[:-1]), datetime.fromisoformat(r[-1])) for r in cur]
+
+    # ---------- migration ----------
+
+    def migrate_from_json(self, json_path: Path) -> int:
+        """
+        One-shot import of an existing transactions.json, read from a copy
+        so the source (and its journal and cold file) is left as it was.
+        Ids already present are left untouched, so re-running is safe.
+        Soft-deleted rows come across with their tombstones.
+        Returns the number of live rows in the source file.
+        """
+        txns, trash = _read_json_store(json_path)
+        self.add(txns)
+        placeholders = ", ".join("?" for _ in range(len(COLUMNS) + 1))
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO transactions ({', '.join(COLUMNS)}, deleted_at) "
+                f"VALUES ({placeholders})",
+                [self._to_row(t) + (at.isoformat(),) for t, at in trash],
+            )
+            self._put_cold(conn, [t for t, _ in trash], "INSERT OR IGNORE")
+            self._bump(conn)
+        return len(txns)
+
+    # ---------- helpers ----------
+
+    def _to_row(self, txn: Transaction) -> tuple:
+        return (
+            txn.id,
+            txn.datetime.isoformat(),
+            txn.paise,
+            txn.direction,
+            txn.counterparty,
+            txn.mode,
+            int(txn.reviewed),
+            txn.scope,
+            json.dumps(list(txn.category or [])),
+            json.dumps(split_extras(txn.extras or {})[0]),
+        )
+
+    def _from_row(self, row: tuple) -> Transaction:
+        (tid, dt, paise, direction, counterparty,
+         mode, reviewed, scope, category, extras) = row
+        return Transaction.trusted(
+            id=tid,
+            datetime=datetime.fromisoformat(dt),
+            paise=paise,
+            direction=direction,
+            counterparty=counterparty,
+            mode=mode,
+            reviewed=bool(reviewed),
+            scope=scope,
+            category=json.loads(category),
+            extras=json.loads(extras),
+        )
+
+
+def _read_json_store(json_path: Path) -> Tuple[List[Transaction], List[Tuple[Transaction, datetime]]]:
+    """
+    Live rows and trash of a JSON store, cold extras merged back. Opening a
+    JsonTransactionStore migrates old files in place and creates its
+    sidecar files, so it is opened on a copy in a temporary directory.
+    """
+    with tempfile.TemporaryDirectory(prefix="fie_migrate_") as tmp:
+        copy = Path(tmp) / json_path.name
+        for suffix in ("", ".journal.jsonl", ".cold.jsonl"):
+            src = json_path.with_suffix(suffix) if suffix else json_path
+            if src.exists():
+                shutil.copy2(src, copy.with_suffix(suffix) if suffix else copy)
+        store = JsonTransactionStore(copy)
+        txns = list(store.detail_many(t.id for t in store.list_all()).values())
+        trash = store.trash()
+        cold = store.cold(t.id for t, _ in trash)
+    trash = [
+        (t.evolve(extras={**cold[t.id], **t.extras}) if t.id in cold else t, at)
+        for t, at in trash
+    ]
+    return txns, trash
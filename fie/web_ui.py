@@ -1,23 +1,42 @@
+from bisect import bisect_left, bisect_right
 from pathlib import Path
+import hashlib
 import tempfile
 import os
 import functools
 from datetime import datetime, timedelta
+from itertools import accumulate
+import numpy as np
 from flask import Flask, render_template, jsonify, request, session, redirect, url_for
 
 from fie.core.engine import FIEEngine
-from fie.storage.json_store import JsonTransactionStore
+from fie.core.merchants import MerchantDirectory, merchant_key
+from fie.core.money import rupees, to_paise
+from fie.core.table import top
+from fie.storage.activity_log import ActivityLog
+from fie.storage.archive import TransactionArchive, empty_summary, row_to_txn
+from fie.storage.backup import BackupSet
+from fie.storage.factory import (
+    archive_dir, backup_dir, backup_files, fingerprints_path, ingest_manifest_path,
+    merchants_path, open_store,
+)
+from fie.storage.fingerprints import FingerprintIndex
 from fie import config
 from fie.defaults import (
     get_default_rules, get_default_settings,
     get_split_categories, DEFAULT_CATEGORIES, DEFAULT_SCOPES
 )
-from fie.ingest.canara import parse_canara_pdf
+from fie.ingest.manifest import IngestManifest, tally
+from fie.ingest.parallel import iter_many
 from fie.core.transaction import Transaction
 
 DATA_PATH = Path(config.get("storage.data_path"))
-store = JsonTransactionStore(DATA_PATH)
-engine = FIEEngine(store)
+store = open_store(DATA_PATH)
+merchants = MerchantDirectory(merchants_path(DATA_PATH))
+archive = TransactionArchive(archive_dir(DATA_PATH))
+engine = FIEEngine(store, merchants, archive, FingerprintIndex(fingerprints_path(DATA_PATH)))
+backups = BackupSet(backup_dir(DATA_PATH))
+ingest_manifest = IngestManifest(ingest_manifest_path(DATA_PATH))
 
 app = Flask(__name__, template_folder="templates", static_folder="static")
 app.secret_key = "fie-secret-key-change-in-prod"
@@ -46,7 +65,7 @@ def txn_to_dict(t):
         "amount": t.amount,
         "direction": t.direction,
         "scope": t.scope,
-        "category": t.category,
+        "category": list(t.category),
         "counterparty": t.counterparty,
         "mode": t.mode,
         "reviewed": t.reviewed,
@@ -55,6 +74,57 @@ def txn_to_dict(t):
     }
 
 
+# ============ ARCHIVED YEARS ============
+# All-time views add the precomputed summaries of archived years (paise,
+# see fie.storage.archive) to what the live store gives.
+
+def add_paise(totals, more):
+    """Add a label → paise dict into ``totals``."""
+    for label, p in more.items():
+        totals[label] = totals.get(label, 0) + p
+    return totals
+
+
+def archived_scopes(scope_filter="all"):
+    """Per-scope summaries of the archived years for a scope filter ("all": every scope)."""
+    scopes = archive.summary()["scopes"]
+    if scope_filter == "all":
+        return list(scopes.values())
+    return [scopes[scope_filter]] if scope_filter in scopes else []
+
+
+def archived_by_day(parts, fmt="%Y-%m-%d", weight="spent", start=None, end=None):
+    """
+    Archived paise per date label of ``fmt``: "spent" or "income" (days that
+    have such rows) or "net" (income - spent, every day), for days within
+    the YYYY-MM-DD bounds ``start``/``end``.
+    """
+    paise = {}
+    for a in parts:
+        for day, sums in a["days"].items():
+            if (start and day < start) or (end and day > end):
+                continue
+            p = sums["income"] - sums["spent"] if weight == "net" else sums[weight]
+            if weight != "net" and not p:
+                continue
+            label = day if fmt == "%Y-%m-%d" else datetime.strptime(day, "%Y-%m-%d").strftime(fmt)
+            paise[label] = paise.get(label, 0) + p
+    return paise
+
+
+def archived_merchants(parts):
+    """Archived debit paise by merchant name (counterparties the directory never saw as-is)."""
+    paise = {}
+    for a in parts:
+        add_paise(paise, a["merchants"])
+    ids = merchants.find_many(paise)
+    by_name = {}
+    for cp, p in paise.items():
+        name = merchants.name(ids[cp]) if ids[cp] is not None else cp
+        by_name[name] = by_name.get(name, 0) + p
+    return by_name
+
+
 @app.route("/login")
 def login_page():
     if session.get("logged_in"):
@@ -91,47 +161,30 @@ def index():
 @login_required
 def api_transactions():
     args = request.args
-    txns = engine.all()
 
     # filters
-    scope = args.get("scope")
-    if scope:
-        txns = [t for t in txns if t.scope == scope]
-    category = args.get("category")
-    if category:
-        txns = [t for t in txns if category in t.category]
-    direction = args.get("direction")
-    if direction:
-        txns = [t for t in txns if t.direction == direction]
+    filters = {k: args.get(k) for k in ("scope", "category", "direction")}
     
     # search filter
-    search = args.get("search", "").lower()
-    if search:
-        txns = [t for t in txns if search in t.counterparty.lower() or search in str(t.amount)]
+    filters["search"] = args.get("search", "").lower()
 
     sort = args.get("sort", "datetime")
-    reverse = args.get("order", "desc") == "desc"
-    txns.sort(key=lambda t: getattr(t, sort), reverse=reverse)
+    order = "desc" if args.get("order", "desc") == "desc" else "asc"
 
-    # Store total count before pagination
-    total_count = len(txns)
-    
     # Pagination: offset and limit
-    offset = args.get("offset")
-    if offset:
-        try:
-            offset = int(offset)
-            txns = txns[offset:]
-        except ValueError:
-            pass
-    
-    limit = args.get("limit")
-    if limit:
-        try:
-            limit = int(limit)
-            txns = txns[:limit]
-        except ValueError:
-            pass
+    try:
+        offset = int(args.get("offset") or 0)
+    except ValueError:
+        offset = 0
+    try:
+        limit = int(args.get("limit") or 0) or None
+    except ValueError:
+        limit = None
+
+    try:
+        txns, total_count = store.query(filters, sort=sort, order=order, offset=offset, limit=limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     data = [txn_to_dict(t) for t in txns]
     
@@ -147,7 +200,8 @@ def api_summary():
     """Summary with optional scope and time period filters."""
     scope_filter = request.args.get("scope", "personal")  # Default to personal
     period = request.args.get("period", "month")  # month, quarter, year, all
-    txns = engine.all()
+    all_txns = engine.all()
+    txns = all_txns
     
     # Filter by scope if specified (use "all" for no filter)
     if scope_filter != "all":
@@ -162,7 +216,8 @@ def api_summary():
         txns = [t for t in txns if t.datetime >= three_months_ago]
     elif period == "year":
         txns = [t for t in txns if t.datetime.year == now.year]
-    # "all" means no date filter
+    # "all" means no date filter, archived years included
+    archived = archived_scopes(scope_filter) if period == "all" else []
 
     # category aggregation
     cat_counts = {}
@@ -171,50 +226,70 @@ def api_summary():
     income_by_cat = {}  # Only income (credits)
     
     # Credits breakdown: splits vs deposits (use configurable categories)
-    splits_total = 0.0  # Friend paybacks, refunds - shouldn't count as income
-    deposits_total = 0.0  # True income (parents, salary, etc.)
+    # Totals are summed in paise and rendered as rupees at the end.
+    splits_total = 0  # Friend paybacks, refunds - shouldn't count as income
+    deposits_total = 0  # True income (parents, salary, etc.)
     splits_categories = get_split_categories()  # From defaults.py
     
     for t in txns:
         key = t.category[0] if t.category else "unknown"
         cat_counts[key] = cat_counts.get(key, 0) + 1
-        amt = t.amount if t.direction == "credit" else -t.amount
-        cat_totals[key] = cat_totals.get(key, 0.0) + amt
+        amt = t.paise if t.direction == "credit" else -t.paise
+        cat_totals[key] = cat_totals.get(key, 0) + amt
         
         # Separate spending vs income
         if t.direction == "debit":
-            spending_by_cat[key] = spending_by_cat.get(key, 0.0) + t.amount
+            spending_by_cat[key] = spending_by_cat.get(key, 0) + t.paise
         else:
-            income_by_cat[key] = income_by_cat.get(key, 0.0) + t.amount
+            income_by_cat[key] = income_by_cat.get(key, 0) + t.paise
             # Classify credits: splits vs deposits
             is_split = any(cat in splits_categories for cat in (t.category or []))
             if is_split:
-                splits_total += t.amount
+                splits_total += t.paise
+            else:
+                deposits_total += t.paise
+
+    for a in archived:
+        for key, c in a["categories"].items():
+            cat_counts[key] = cat_counts.get(key, 0) + c["count"]
+            cat_totals[key] = cat_totals.get(key, 0) + c["income"] - c["spent"]
+            if c["spent"]:
+                spending_by_cat[key] = spending_by_cat.get(key, 0) + c["spent"]
+            if c["income"]:
+                income_by_cat[key] = income_by_cat.get(key, 0) + c["income"]
+        for tags, p in a["credit_tags"].items():
+            if any(cat in splits_categories for cat in tags.split("|")):
+                splits_total += p
             else:
-                deposits_total += t.amount
+                deposits_total += p
 
-    # scope aggregation (for all scopes view)
-    all_txns = engine.all()
+    # scope aggregation (for all scopes view), all time
     scopes = config.get("tagging.scope_map").values()
     scope_counts = {s: 0 for s in scopes}
-    scope_totals = {s: 0.0 for s in scopes}
+    scope_totals = {s: 0 for s in scopes}
     for t in all_txns:
         key = t.scope
-        amt = t.amount if t.direction == "credit" else -t.amount
+        amt = t.paise if t.direction == "credit" else -t.paise
         scope_counts[key] = scope_counts.get(key, 0) + 1
-        scope_totals[key] = scope_totals.get(key, 0.0) + amt
+        scope_totals[key] = scope_totals.get(key, 0) + amt
+    for key, a in archive.summary()["scopes"].items():
+        scope_counts[key] = scope_counts.get(key, 0) + a["count"]
+        scope_totals[key] = scope_totals.get(key, 0) + a["income"] - a["spent"]
+
+    def as_rupees(totals):
+        return {k: rupees(v) for k, v in totals.items()}
 
     return jsonify({
-        "total_transactions": len(txns),
+        "total_transactions": len(txns) + sum(a["count"] for a in archived),
         "scope_filter": scope_filter,
-        "by_category": {"counts": cat_counts, "totals": cat_totals},
-        "spending_by_category": spending_by_cat,  # Only debits for spending chart
-        "income_by_category": income_by_cat,  # Only credits
+        "by_category": {"counts": cat_counts, "totals": as_rupees(cat_totals)},
+        "spending_by_category": as_rupees(spending_by_cat),  # Only debits for spending chart
+        "income_by_category": as_rupees(income_by_cat),  # Only credits
         "credits_breakdown": {
-            "splits": splits_total,  # Friend paybacks (offset spending)
-            "deposits": deposits_total,  # True income
+            "splits": rupees(splits_total),  # Friend paybacks (offset spending)
+            "deposits": rupees(deposits_total),  # True income
         },
-        "by_scope": {"counts": scope_counts, "totals": scope_totals},
+        "by_scope": {"counts": scope_counts, "totals": as_rupees(scope_totals)},
         "period": period,
     })
 
@@ -223,79 +298,81 @@ def api_summary():
 @login_required
 def api_trends():
     """Return monthly and weekly spending trends with optional scope filter."""
-    from collections import defaultdict
     scope_filter = request.args.get("scope", "personal")  # Default to personal
     start_date = request.args.get("start")  # YYYY-MM-DD
     end_date = request.args.get("end")  # YYYY-MM-DD
     
-    txns = engine.all()
-    
-    # Filter by scope
-    if scope_filter != "all":
-        txns = [t for t in txns if t.scope == scope_filter]
-    
-    # Filter by date range if provided
+    # Parse date range if provided; only the matching rows are loaded
+    start_dt = end_dt = None
     if start_date:
         try:
             start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-            txns = [t for t in txns if t.datetime >= start_dt]
         except:
             pass
     
     if end_date:
         try:
             end_dt = datetime.strptime(end_date, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
-            txns = [t for t in txns if t.datetime <= end_dt]
         except:
             pass
     
-    monthly = defaultdict(float)
-    weekly = defaultdict(float)
-    daily = defaultdict(float)
+    table = engine.table(start_dt, end_dt)
+    mask = table.all()
     
-    # Daily by category (for personal expenses chart)
-    daily_by_cat = defaultdict(lambda: defaultdict(float))
+    # Filter by scope
+    if scope_filter != "all":
+        mask &= table.scope_is(scope_filter)
     
-    # Running totals for cumulative line chart
-    daily_cumulative = defaultdict(float)
-    running_total = 0
+    # Archived years in the date range (their days only exist there)
+    archived = archived_scopes(scope_filter)
+    bounds = {
+        "start": start_dt.strftime("%Y-%m-%d") if start_dt else None,
+        "end": end_dt.strftime("%Y-%m-%d") if end_dt else None,
+    }
     
-    # Sort transactions by date for cumulative calculation
-    sorted_txns = sorted(txns, key=lambda t: t.datetime)
+    def by_day(mask, fmt="%Y-%m-%d", weight="spent"):
+        """Live and archived paise per date label, ascending, in rupees."""
+        weights = table.signed if weight == "net" else None
+        paise = add_paise(archived_by_day(archived, fmt, weight, **bounds), table.paise_by_day(mask, fmt, weights))
+        return {label: rupees(p) for label, p in sorted(paise.items())}
+    
+    # Net amounts (credits - debits)
+    monthly = by_day(mask, "%Y-%m", "net")
+    weekly = by_day(mask, "%Y-W%W", "net")
+    daily = by_day(mask, weight="net")
+    
+    # Daily spending by category (for personal expenses chart)
+    debit = mask & table.is_debit
+    daily_by_cat = {}
+    for cat_code in np.unique(table.category[debit]):
+        cat = table.categories[cat_code] or "unknown"
+        per_day = table.totals_by_day(debit & (table.category == cat_code))
+        for day_key, amt in per_day.items():
+            day_cats = daily_by_cat.setdefault(day_key, {})
+            day_cats[cat] = day_cats.get(cat, 0.0) + amt
+    for a in archived:
+        for day_key, cats in a["day_categories"].items():
+            if (bounds["start"] and day_key < bounds["start"]) or (bounds["end"] and day_key > bounds["end"]):
+                continue
+            day_cats = daily_by_cat.setdefault(day_key, {})
+            for cat, p in cats.items():
+                day_cats[cat] = day_cats.get(cat, 0.0) + rupees(p)
     
-    for t in sorted_txns:
-        amt = t.amount if t.direction == "credit" else -t.amount
-        month_key = t.datetime.strftime("%Y-%m")
-        monthly[month_key] += amt
-        
-        # ISO week
-        week_key = t.datetime.strftime("%Y-W%W")
-        weekly[week_key] += amt
-        
-        # Daily
-        day_key = t.datetime.strftime("%Y-%m-%d")
-        daily[day_key] += amt
-        
-        # Daily by category
-        cat = t.category[0] if t.category else "unknown"
-        if t.direction == "debit":
-            daily_by_cat[day_key][cat] += t.amount
-        
-        # Cumulative (spending only)
-        if t.direction == "debit":
-            running_total += t.amount
-            daily_cumulative[day_key] = running_total
+    # Running totals for cumulative line chart (spending only)
+    spent = add_paise(archived_by_day(archived, **bounds), table.paise_by_day(debit))
+    running = accumulate(p for _, p in sorted(spent.items()))
+    daily_cumulative = {day: rupees(p) for day, p in zip(sorted(spent), running)}
     
     # Get all daily data, limited to last 90 days if no date filter
-    all_daily = dict(sorted(daily.items()))
-    all_daily_by_cat = {k: dict(v) for k, v in sorted(daily_by_cat.items())}
-    all_cumulative = dict(sorted(daily_cumulative.items()))
+    all_daily = daily
+    all_daily_by_cat = dict(sorted(daily_by_cat.items()))
+    all_cumulative = daily_cumulative
     
     # If no date filter, limit to last 30 days for display
     if not start_date and not end_date:
-        display_daily = dict(list(sorted(daily.items()))[-30:])
-        display_daily_by_cat = {k: dict(v) for k, v in list(sorted(daily_by_cat.items()))[-30:]}
-        display_cumulative = dict(list(sorted(daily_cumulative.items()))[-30:])
+        display_daily = dict(list(all_daily.items())[-30:])
+        display_daily_by_cat = dict(list(all_daily_by_cat.items())[-30:])
+        display_cumulative = dict(list(all_cumulative.items())[-30:])
     else:
         display_daily = all_daily
         display_daily_by_cat = all_daily_by_cat
@@ -305,7 +382,7 @@ def api_trends():
     all_dates = list(all_daily.keys())
     
     return jsonify({
-        "monthly": dict(sorted(monthly.items())),
+        "monthly": monthly,
         "weekly": dict(sorted(weekly.items())[-12:]),
         "daily": display_daily,
         "daily_by_category": display_daily_by_cat,
@@ -322,80 +399,49 @@ def api_trends():
 @app.route("/api/analytics")
 @login_required
 def api_analytics():
-    """Comprehensive analytics for all scopes - optimized single pass."""
-    from collections import defaultdict
-    
-    txns = engine.all()
+    """Comprehensive analytics for all scopes - vectorized over the columnar table."""
+    table = engine.table()
     settings = load_settings()
     all_scopes = settings.get("scopes", ["personal", "family", "education", "shared"])
     
     now = datetime.now()
-    this_month = now.month
-    this_year = now.year
-    
-    # Initialize data structures for single-pass processing
-    scope_data = {s: {
-        "count": 0, "spent": 0.0, "income": 0.0, "this_month": 0.0,
-        "categories": defaultdict(float),
-        "merchants": defaultdict(float),
-        "monthly": defaultdict(float),
-        "weekly": defaultdict(float),
-    } for s in all_scopes}
-    
-    comparison_monthly = defaultdict(lambda: {s: 0.0 for s in all_scopes})
-    scope_totals = {s: 0.0 for s in all_scopes}
-    
-    # Single pass over all transactions
-    for t in txns:
-        scope = t.scope
-        if scope not in scope_data:
-            continue
-        
-        sd = scope_data[scope]
-        sd["count"] += 1
-        
-        is_debit = t.direction == "debit"
-        if is_debit:
-            sd["spent"] += t.amount
-            scope_totals[scope] += t.amount
-            
-            # Category
-            cat = t.category[0] if t.category else "unknown"
-            sd["categories"][cat] += t.amount
-            
-            # Merchant
-            sd["merchants"][t.counterparty] += t.amount
-            
-            # Monthly/weekly trends
-            month_key = t.datetime.strftime("%Y-%m")
-            sd["monthly"][month_key] += t.amount
-            sd["weekly"][t.datetime.strftime("%Y-W%W")] += t.amount
-            
-            # Comparison monthly
-            comparison_monthly[month_key][scope] += t.amount
-            
-            # This month
-            if t.datetime.year == this_year and t.datetime.month == this_month:
-                sd["this_month"] += t.amount
-        else:
-            sd["income"] += t.amount
+    this_month = table.in_month(now.year, now.month)
     
-    # Build result
     result = {"scopes": {}, "comparison": {}}
+    comparison_monthly = {}
+    scope_totals = {}
     
     for scope in all_scopes:
-        sd = scope_data[scope]
-        top_merchants = sorted(sd["merchants"].items(), key=lambda x: -x[1])[:5]
+        in_scope = table.scope_is(scope)
+        debit = in_scope & table.is_debit
+        credit = in_scope & ~table.is_debit
+        # Archived years of this scope, in paise
+        archived = archived_scopes(scope)
+        
+        spent = rupees(int(table.paise[debit].sum()) + sum(a["spent"] for a in archived))
+        scope_totals[scope] = spent
+        
+        monthly_paise = add_paise(archived_by_day(archived, "%Y-%m"), table.paise_by_day(debit, "%Y-%m"))
+        monthly = {m: rupees(p) for m, p in sorted(monthly_paise.items())}
+        for month_key, amt in monthly.items():
+            comparison_monthly.setdefault(month_key, {s: 0.0 for s in all_scopes})[scope] = amt
+        weekly_paise = add_paise(archived_by_day(archived, "%Y-W%W"), table.paise_by_day(debit, "%Y-W%W"))
+        
+        merchant_paise = add_paise(table.paise_by("merchant", debit), archived_merchants(archived))
+        top_merchants = top({m: rupees(p) for m, p in merchant_paise.items()}, 5)
+        category_paise = table.paise_by("category", debit, default="unknown")
+        for a in archived:
+            add_paise(category_paise, {cat: c["spent"] for cat, c in a["categories"].items() if c["spent"]})
         
         result["scopes"][scope] = {
-            "total_transactions": sd["count"],
-            "total_spent": sd["spent"],
-            "total_income": sd["income"],
-            "this_month_spent": sd["this_month"],
-            "categories": dict(sd["categories"]),
+            "total_transactions": int(in_scope.sum()) + sum(a["count"] for a in archived),
+            "total_spent": spent,
+            "total_income": rupees(int(table.paise[credit].sum()) + sum(a["income"] for a in archived)),
+            "this_month_spent": table.sum(debit & this_month),
+            "categories": {cat: rupees(p) for cat, p in category_paise.items()},
             "top_merchants": [{"name": m, "amount": a} for m, a in top_merchants],
-            "monthly": dict(sorted(sd["monthly"].items())[-6:]),
-            "weekly": dict(sorted(sd["weekly"].items())[-8:]),
+            "monthly": dict(list(monthly.items())[-6:]),
+            "weekly": {w: rupees(p) for w, p in sorted(weekly_paise.items())[-8:]},
         }
     
     result["comparison"]["monthly"] = dict(sorted(comparison_monthly.items())[-6:])
@@ -425,47 +471,73 @@ def api_meta():
 @app.route("/api/load", methods=["POST"])
 @login_required
 def api_load():
-    # Accept either an uploaded file (form field 'file') or a path (form field 'path')
+    # Accept uploaded files (form field 'file', repeatable) or paths (form field 'path')
     if "file" in request.files:
-        f = request.files["file"]
-        if f.filename == "":
+        uploads = request.files.getlist("file")
+        if any(f.filename == "" for f in uploads):
             return jsonify({"error": "No file provided"}), 400
         tmpdir = Path(tempfile.mkdtemp(prefix="fie_upload_"))
-        save_path = tmpdir / f.filename
-        f.save(save_path)
-        pdf_path = str(save_path)
-        filename = f.filename
+        todo, skipped = {}, []
+        for i, f in enumerate(uploads):
+            # Statements this parser version already ingested are not saved or parsed
+            data = f.read()
+            sha = hashlib.sha256(data).hexdigest()
+            if ingest_manifest.seen(sha) or sha in todo.values():
+                skipped.append(Path(f.filename).name)
+                continue
+            # One folder per file: the file name is part of each transaction id
+            save_path = tmpdir / str(i) / Path(f.filename).name
+            save_path.parent.mkdir()
+            save_path.write_bytes(data)
+            todo[str(save_path)] = sha
     else:
-        pdf_path = request.form.get("path")
-        if not pdf_path:
+        pdf_paths = request.form.getlist("path")
+        if not pdf_paths or not all(pdf_paths):
             return jsonify({"error": "No file or path provided"}), 400
-        filename = Path(pdf_path).name
-
-    # parse and ingest
+        try:
+            todo, done = ingest_manifest.select([Path(p) for p in pdf_paths])
+        except OSError as e:
+            return jsonify({"error": f"Cannot read {e.filename}: {e.strerror}"}), 400
+        skipped = [path.name for path, _ in done]
+    if not todo:
+        return jsonify({"ok": True, "count": 0, "added": 0, "auto_tagged": 0, "skipped": skipped})
+    filename = ", ".join(Path(p).name for p in todo)
+
+    # parse (in parallel for a large batch) and store the stream in chunks
     try:
-        txns = parse_canara_pdf(pdf_path)
-        engine.ingest(txns)
-        count = len(txns)
+        stats = {}
+        added = engine.ingest(tally(iter_many(list(todo)), stats))
+        ingest_manifest.record(todo, stats)
+        count = sum(s["count"] for s in stats.values())
         
         # Auto-tag new transactions
         tagged_count = auto_tag_new_transactions()
         
         # Log the upload
-        save_log("upload", {"filename": filename, "transactions_added": count, "auto_tagged": tagged_count})
+        save_log("upload", {"filename": filename, "transactions_added": count, "new": added, "auto_tagged": tagged_count})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-    return jsonify({"ok": True, "count": count, "auto_tagged": tagged_count})
+    result = {"ok": True, "count": count, "added": added, "auto_tagged": tagged_count, "skipped": skipped}
+
+    # Restore point with just what this upload changed. The upload is
+    # stored by now: a failed backup is logged and reported, not a 500.
+    if config.get("backup.after_upload", True):
+        try:
+            backups.backup(store, backup_files(DATA_PATH))
+        except Exception as e:
+            save_log("backup_failed", {"error": str(e)})
+            result["backup_error"] = str(e)
+
+    return jsonify(result)
 
 
 def auto_tag_new_transactions():
     """Apply auto-tagging rules to unreviewed transactions."""
-    from dataclasses import replace as dc_replace
-    
-    rules = load_rules()
-    rules = sorted([r for r in rules if r.get("enabled", True)], key=lambda r: r.get("priority", 999))
+    rules = enabled_rules()
     
     txns = engine.all()
+    match = rule_matcher(rules, txns)
     updated = []
     
     for txn in txns:
@@ -474,8 +546,8 @@ def auto_tag_new_transactions():
             continue
         
         # Try each rule in priority order
-        for rule in rules:
-            if match_rule(txn, rule):
+        for i, rule in enumerate(rules):
+            if match(txn, i):
                 new_txn = apply_rule(txn, rule)
                 if new_txn != txn:
                     updated.append(new_txn)
@@ -494,20 +566,16 @@ def api_tag():
     """Update tags/scope for a transaction.
     Expects JSON: {"id": "...", "scope": "personal", "category": ["food"], "notes": "..."}
     """
-    from dataclasses import replace
-
     data = request.get_json() or {}
     tid = data.get("id")
     if not tid:
         return jsonify({"error": "id required"}), 400
 
     # find txn
-    txns = engine.all()
-    match = [t for t in txns if t.id == tid]
-    if not match:
+    t = store.get(tid)
+    if t is None:
         return jsonify({"error": "transaction not found"}), 404
 
-    t = match[0]
     updates = {}
     old_values = {}
     if "scope" in data and data["scope"] != t.scope:
@@ -526,7 +594,7 @@ def api_tag():
 
     if updates:
         updates["reviewed"] = True
-        new_t = replace(t, **updates)
+        new_t = t.evolve(**updates)
         try:
             store.update([new_t])
             # Log the edit
@@ -606,8 +674,43 @@ def save_rules(rules):
         json.dump(rules, f, indent=2)
 
 
-def match_rule(txn, rule):
-    """Check if a transaction matches a rule's conditions."""
+def enabled_rules():
+    """Enabled auto-tagging rules in priority order."""
+    return sorted([r for r in load_rules() if r.get("enabled", True)], key=lambda r: r.get("priority", 999))
+
+
+def rule_matcher(rules, txns):
+    """
+    match_rule() for one tagging or preview pass: each rule's merchant_exact
+    names and each counterparty are resolved once, in one read-only
+    merchants.lookup(), so spellings the directory has not seen yet still
+    match by merchant key. Returns match(txn, i) for rules[i].
+    """
+    exact_names = [
+        [m for m in r.get("conditions", {}).get("merchant_exact", "").split(",") if m.strip()]
+        for r in rules
+    ]
+    counterparties = list(dict.fromkeys(t.counterparty for t in txns))
+    flat = [n for ns in exact_names for n in ns]
+    mids, names = merchants.lookup(flat + counterparties)
+    exact, start = [], 0
+    for ns in exact_names:
+        exact.append(set(mids[start:start + len(ns)]))
+        start += len(ns)
+    ids = dict(zip(counterparties, mids[len(flat):]))
+
+    def match(txn, i):
+        mid = ids[txn.counterparty]
+        return match_rule(txn, rules[i], exact[i], mid, names[mid])
+    return match
+
+
+def match_rule(txn, rule, exact_ids, merchant, merchant_name):
+    """
+    Check if a transaction matches a rule's conditions. ``exact_ids`` are
+    the rule's merchant_exact ids, ``merchant`` and ``merchant_name`` the
+    transaction's merchant, as rule_matcher() resolves them.
+    """
     if not rule.get("enabled", True):
         return False
     
@@ -625,20 +728,21 @@ def match_rule(txn, rule):
     
     # Merchant/counterparty conditions (supports comma-separated multiple values)
     if rule_type in ["merchant", "combined"]:
-        merchant_contains = conditions.get("merchant_contains", "").lower()
-        merchant_exact = conditions.get("merchant_exact", "").lower()
-        counterparty = txn.counterparty.lower()
+        merchant_contains = conditions.get("merchant_contains", "")
+        merchant_exact = conditions.get("merchant_exact", "")
         
-        # Check exact match (supports comma-separated: match ANY)
+        # Check exact match (supports comma-separated: match ANY); aliases
+        # of a listed merchant match too
         if merchant_exact:
-            exact_matches = [m.strip() for m in merchant_exact.split(",") if m.strip()]
-            if not any(counterparty == m for m in exact_matches):
+            if merchant not in exact_ids:
                 return False
         
-        # Check contains match (supports comma-separated: match ANY)
+        # Check contains match (supports comma-separated: match ANY) against
+        # the row's own spelling or its merchant's name
         if merchant_contains:
-            contains_keywords = [m.strip() for m in merchant_contains.split(",") if m.strip()]
-            if not any(kw in counterparty for kw in contains_keywords):
+            names = [txn.counterparty.lower(), merchant_key(merchant_name)]
+            contains_keywords = [m.strip() for m in merchant_contains.lower().split(",") if m.strip()]
+            if not any(kw in name for kw in contains_keywords for name in names):
                 return False
     
     # Direction condition (optional)
@@ -651,8 +755,6 @@ def match_rule(txn, rule):
 
 def apply_rule(txn, rule):
     """Apply a rule's actions to a transaction."""
-    from dataclasses import replace
-    
     actions = rule.get("actions", {})
     updates = {}
     
@@ -662,7 +764,7 @@ def apply_rule(txn, rule):
         updates["category"] = actions["category"]
     
     updates["reviewed"] = True
-    return replace(txn, **updates)
+    return txn.evolve(**updates)
 
 
 @app.route("/api/rules", methods=["GET"])
@@ -804,10 +906,10 @@ def api_apply_rules():
     data = request.get_json() or {}
     only_unreviewed = data.get("only_unreviewed", False)
     
-    rules = load_rules()
-    rules = sorted([r for r in rules if r.get("enabled", True)], key=lambda r: r.get("priority", 999))
+    rules = enabled_rules()
     
     txns = engine.all()
+    match = rule_matcher(rules, txns)
     updated = []
     
     for txn in txns:
@@ -816,8 +918,8 @@ def api_apply_rules():
             continue
         
         # Try each rule in priority order
-        for rule in rules:
-            if match_rule(txn, rule):
+        for i, rule in enumerate(rules):
+            if match(txn, i):
                 new_txn = apply_rule(txn, rule)
                 if new_txn != txn:
                     updated.append(new_txn)
@@ -840,18 +942,18 @@ def api_preview_rules():
     data = request.get_json() or {}
     only_unreviewed = data.get("only_unreviewed", False)
     
-    rules = load_rules()
-    rules = sorted([r for r in rules if r.get("enabled", True)], key=lambda r: r.get("priority", 999))
+    rules = enabled_rules()
     
     txns = engine.all()
+    match = rule_matcher(rules, txns)
     preview = []
     
     for txn in txns:
         if only_unreviewed and txn.reviewed:
             continue
         
-        for rule in rules:
-            if match_rule(txn, rule):
+        for i, rule in enumerate(rules):
+            if match(txn, i):
                 preview.append({
                     "id": txn.id,
                     "counterparty": txn.counterparty,
@@ -871,21 +973,46 @@ def api_preview_rules():
 @login_required
 def api_get_merchants():
     """Get list of unique merchants/counterparties for autocomplete."""
-    txns = engine.all()
-    merchants = {}
-    for t in txns:
-        cp = t.counterparty
-        if cp not in merchants:
-            merchants[cp] = {"count": 0, "total": 0.0}
-        merchants[cp]["count"] += 1
-        if t.direction == "debit":
-            merchants[cp]["total"] += t.amount
+    table = engine.table()
+    counts = np.bincount(table.merchant, minlength=len(table.merchants))
+    totals = np.bincount(table.merchant, weights=np.where(table.is_debit, table.paise, 0),
+                         minlength=len(table.merchants))
+    
+    # Sort by count (ties: merchant of the earliest row first, as the store lists them)
+    present, first = np.unique(table.merchant, return_index=True)
+    order = present[np.lexsort((first, -counts[present]))]
+    result = [{"name": table.merchants[m], "count": int(counts[m]), "total": rupees(int(totals[m]))}
+              for m in order[:100]]
     
-    # Sort by count
-    result = [{"name": k, "count": v["count"], "total": v["total"]} 
-              for k, v in sorted(merchants.items(), key=lambda x: -x[1]["count"])]
+    return jsonify(result)  # Top 100
+
+
+@app.route("/api/merchants/aliases", methods=["GET", "POST"])
+@login_required
+def api_merchant_aliases():
+    """List merchant aliases, or map a spelling onto an existing merchant."""
+    if request.method == "GET":
+        return jsonify(merchants.aliases())
+    
+    data = request.get_json() or {}
+    spelling = (data.get("alias") or "").strip()
+    target = (data.get("merchant") or "").strip()
+    if not spelling or not target:
+        return jsonify({"error": "alias and merchant are required"}), 400
+    # Rows stored without engine.ingest() (migrated, restored) have no merchant
+    # id yet; this write is the place to give one to the merchant aliased onto.
+    if merchants.find(target) is None:
+        key = merchant_key(target)
+        stored = [c for c in engine.table().counterparties if merchant_key(c) == key]
+        if stored:
+            merchants.ids(stored[:1])
+    try:
+        mid = merchants.alias(spelling, target)
+    except KeyError:
+        return jsonify({"error": f"Unknown merchant: {target}"}), 404
     
-    return jsonify(result[:100])  # Top 100
+    save_log("merchant_alias", {"alias": spelling, "merchant": merchants.name(mid)})
+    return jsonify({"ok": True, "merchant": merchants.name(mid)})
 
 
 def save_settings(settings):
@@ -933,29 +1060,15 @@ def api_save_settings():
 @login_required
 def api_delete_transaction(tid):
     """Soft delete a transaction by ID (moves to trash)."""
-    txns = engine.all()
-    match = [t for t in txns if t.id == tid]
-    if not match:
+    txn = store.get(tid)
+    if txn is None:
         return jsonify({"error": "Transaction not found"}), 404
     
-    txn = match[0]
-    
-    # Move to trash
-    trash = load_trash()
-    trash.insert(0, {
-        "id": tid,
-        "deleted_at": datetime.now().isoformat(),
-        "transaction": txn_to_dict(txn)
-    })
-    # Keep only last 100 in trash
-    trash = trash[:100]
-    save_trash(trash)
-    
     # Log the deletion
     save_log("delete", {"transaction_id": tid, "counterparty": txn.counterparty, "amount": txn.amount})
     
     try:
-        store.delete([tid])
+        store.soft_delete([tid])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -971,30 +1084,14 @@ def api_bulk_delete():
     if not ids:
         return jsonify({"error": "No IDs provided"}), 400
     
-    # Move all to trash first
-    txns = engine.all()
-    trash = load_trash()
-    deleted_info = []
-    
-    for tid in ids:
-        match = [t for t in txns if t.id == tid]
-        if match:
-            txn = match[0]
-            trash.insert(0, {
-                "id": tid,
-                "deleted_at": datetime.now().isoformat(),
-                "transaction": txn_to_dict(txn)
-            })
-            deleted_info.append({"id": tid, "counterparty": txn.counterparty})
-    
-    trash = trash[:100]  # Keep last 100
-    save_trash(trash)
+    found = store.get_many(ids)
+    deleted_info = [{"id": tid, "counterparty": txn.counterparty} for tid, txn in found.items()]
     
     # Log bulk deletion
     save_log("bulk_delete", {"count": len(ids), "transactions": deleted_info[:10]})
     
     try:
-        store.delete(ids)
+        store.soft_delete(ids)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
     
@@ -1007,28 +1104,31 @@ def api_bulk_delete():
 @login_required
 def api_stats():
     """Return detailed statistics with optional time period filter."""
-    from collections import defaultdict
-    from datetime import timedelta
-    
     period = request.args.get("period", "month")  # month, quarter, year, all
-    all_txns = engine.all()
     settings = load_settings()
     monthly_budget = settings.get("monthly_budget", 10000)
     budget_scopes = settings.get("budget_scopes", ["personal"])
     
-    # Filter by time period for display stats
+    # Filter by time period for display stats; only that window is loaded
     now = datetime.now()
     if period == "month":
-        txns = [t for t in all_txns if t.datetime.year == now.year and t.datetime.month == now.month]
+        month_start = datetime(now.year, now.month, 1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        table = engine.table(month_start, next_month - timedelta(microseconds=1))
     elif period == "quarter":
-        three_months_ago = now - timedelta(days=90)
-        txns = [t for t in all_txns if t.datetime >= three_months_ago]
+        # From the start of that day, so the table cache key is stable all day
+        since = now - timedelta(days=90)
+        table = engine.table(datetime(since.year, since.month, since.day))
     elif period == "year":
-        txns = [t for t in all_txns if t.datetime.year == now.year]
+        table = engine.table(datetime(now.year, 1, 1), datetime(now.year + 1, 1, 1) - timedelta(microseconds=1))
     else:
-        txns = all_txns
+        table = engine.table()
+    mask = table.all()
     
-    if not txns:
+    # All time: archived years come in as their precomputed paise summaries
+    archived = archive.summary() if period == "all" else empty_summary()
+    
+    if not mask.any() and not archived["count"]:
         return jsonify({
             "total_transactions": 0,
             "this_month_transactions": 0,
@@ -1047,67 +1147,64 @@ def api_stats():
             "last_month_spent": 0,
         })
     
+    debit = mask & table.is_debit
+    credit = mask & ~table.is_debit
+    
     # Basic stats
-    total_spent = sum(t.amount for t in txns if t.direction == "debit")
-    total_income = sum(t.amount for t in txns if t.direction == "credit")
+    total_spent = rupees(int(table.paise[debit].sum()) + archived["spent"])
+    total_income = rupees(int(table.paise[credit].sum()) + archived["income"])
     net_flow = total_income - total_spent
-    
-    # Date range
-    dates = [t.datetime for t in txns]
-    min_date, max_date = min(dates), max(dates)
-    days = max(1, (max_date - min_date).days + 1)
-    avg_daily_spend = total_spent / days
-    avg_transaction = total_spent / max(1, len([t for t in txns if t.direction == "debit"]))
+    avg_transaction = total_spent / max(1, int(debit.sum()) + archived["debits"])
     
     # This month stats (only count budget_scopes for budget tracking)
-    now = datetime.now()
-    this_month_txns = [t for t in txns if t.datetime.year == now.year and t.datetime.month == now.month]
-    this_month_spent = sum(t.amount for t in this_month_txns if t.direction == "debit" and t.scope in budget_scopes)
+    in_budget = table.scope_is(*budget_scopes)
+    this_month = mask & table.in_month(now.year, now.month)
+    this_month_spent = table.sum(this_month & debit & in_budget)
     
     # Last month stats (only budget_scopes)
     last_month = now.month - 1 if now.month > 1 else 12
     last_month_year = now.year if now.month > 1 else now.year - 1
-    last_month_txns = [t for t in txns if t.datetime.year == last_month_year and t.datetime.month == last_month]
-    last_month_spent = sum(t.amount for t in last_month_txns if t.direction == "debit" and t.scope in budget_scopes)
+    last_month_spent = table.sum(mask & table.in_month(last_month_year, last_month) & debit & in_budget)
     
     # Budget tracking
     budget_used_percent = min(100, (this_month_spent / monthly_budget) * 100) if monthly_budget > 0 else 0
     budget_remaining = max(0, monthly_budget - this_month_spent)
     
     # Top merchants (by spend)
-    merchant_totals = defaultdict(float)
-    for t in txns:
-        if t.direction == "debit":
-            merchant_totals[t.counterparty] += t.amount
-    top_merchants = sorted(merchant_totals.items(), key=lambda x: -x[1])[:10]
+    merchant_paise = add_paise(table.paise_by("merchant", debit), archived_merchants([archived]))
+    top_merchants = top({m: rupees(p) for m, p in merchant_paise.items()}, 10)
     
     # Category breakdown
-    category_totals = defaultdict(float)
-    for t in txns:
-        if t.direction == "debit":
-            cat = t.category[0] if t.category else "unknown"
-            category_totals[cat] += t.amount
+    category_paise = table.paise_by("category", debit, default="unknown")
+    for cat, p in archived["categories"].items():
+        category_paise[cat] = category_paise.get(cat, 0) + p
+    category_totals = {k: rupees(p) for k, p in category_paise.items()}
     category_breakdown = [{"category": k, "amount": v, "percent": (v / total_spent) * 100 if total_spent > 0 else 0} 
-                          for k, v in sorted(category_totals.items(), key=lambda x: -x[1])]
+                          for k, v in top(category_totals, len(category_totals))]
     
     # Monthly comparison
-    monthly_totals = defaultdict(lambda: {"spent": 0, "income": 0})
-    for t in txns:
-        key = t.datetime.strftime("%Y-%m")
-        if t.direction == "debit":
-            monthly_totals[key]["spent"] += t.amount
-        else:
-            monthly_totals[key]["income"] += t.amount
+    monthly_paise = {key: dict(sums) for key, sums in archived["monthly"].items()}
+    for key, p in table.paise_by_day(debit, "%Y-%m").items():
+        monthly_paise.setdefault(key, {"spent": 0, "income": 0})["spent"] += p
+    for key, p in table.paise_by_day(credit, "%Y-%m").items():
+        monthly_paise.setdefault(key, {"spent": 0, "income": 0})["income"] += p
+    monthly_totals = {
+        key: {"spent": rupees(sums["spent"]) if sums["spent"] else 0,
+              "income": rupees(sums["income"]) if sums["income"] else 0}
+        for key, sums in monthly_paise.items()
+    }
     
-    # Largest transactions
-    debits = [t for t in txns if t.direction == "debit"]
-    credits = [t for t in txns if t.direction == "credit"]
-    largest_expense = txn_to_dict(max(debits, key=lambda t: t.amount)) if debits else None
-    largest_income = txn_to_dict(max(credits, key=lambda t: t.amount)) if credits else None
+    # Largest transactions (archived only if strictly larger)
+    def largest(mask, archived_row):
+        row = table.argmax(mask)
+        t = table.txns[row] if row is not None else None
+        if archived_row is not None and (t is None or archived_row["paise"] > t.paise):
+            t = row_to_txn(archived_row)
+        return txn_to_dict(t) if t is not None else None
     
     return jsonify({
-        "total_transactions": len(txns),
-        "this_month_transactions": len(this_month_txns),
+        "total_transactions": int(mask.sum()) + archived["count"],
+        "this_month_transactions": int(this_month.sum()),
         "total_spent": total_spent,
         "total_income": total_income,
         "net_flow": net_flow,
@@ -1118,8 +1215,8 @@ def api_stats():
         "top_merchants": [{"name": m, "amount": a} for m, a in top_merchants],
         "category_breakdown": category_breakdown,
         "monthly_comparison": dict(sorted(monthly_totals.items())),
-        "largest_expense": largest_expense,
-        "largest_income": largest_income,
+        "largest_expense": largest(debit, archived["largest_expense"]),
+        "largest_income": largest(credit, archived["largest_income"]),
         "this_month_spent": this_month_spent,
         "last_month_spent": last_month_spent,
     })
@@ -1127,69 +1224,34 @@ def api_stats():
 
 # ============ ACTIVITY LOGS ============
 
-LOGS_FILE = DATA_PATH.parent / "activity_logs.json"
-
-
-def load_logs():
-    """Load activity logs."""
-    import json
-    if LOGS_FILE.exists():
-        try:
-            with open(LOGS_FILE) as f:
-                return json.load(f)
-        except:
-            pass
-    return []
+activity_log = ActivityLog(
+    DATA_PATH.parent / "activity_logs",
+    segment_bytes=int(config.get("activity_log.segment_kb", 1024)) * 1024,
+    max_segments=int(config.get("activity_log.max_segments", 20)),
+    legacy_path=DATA_PATH.parent / "activity_logs.json",
+)
 
 
 def save_log(action, details, user="admin"):
-    """Save a new activity log entry."""
-    import json
-    import uuid
-    
-    logs = load_logs()
-    
-    log_entry = {
-        "id": f"log_{uuid.uuid4().hex[:8]}",
-        "timestamp": datetime.now().isoformat(),
-        "action": action,
-        "details": details,
-        "user": user
-    }
-    
-    logs.insert(0, log_entry)  # Most recent first
-    
-    # Keep only last 1000 logs
-    logs = logs[:1000]
-    
-    LOGS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(LOGS_FILE, 'w') as f:
-        json.dump(logs, f, indent=2)
-    
-    return log_entry
+    """Append a new activity log entry."""
+    return activity_log.append(action, details, user)
 
 
 @app.route("/api/logs")
 @login_required
 def api_get_logs():
-    """Get activity logs with optional filtering."""
-    logs = load_logs()
-    
-    # Filters
-    action = request.args.get("action")
-    search = request.args.get("search", "").lower()
-    limit = int(request.args.get("limit", 100))
-    
-    if action:
-        logs = [l for l in logs if l["action"] == action]
-    
-    if search:
-        logs = [l for l in logs if search in str(l.get("details", "")).lower() 
-                or search in l.get("action", "").lower()]
+    """Get activity logs with optional filtering (start/end: ISO date or timestamp)."""
+    logs, total = activity_log.query(
+        action=request.args.get("action"),
+        search=request.args.get("search", ""),
+        start=request.args.get("start"),
+        end=request.args.get("end"),
+        limit=int(request.args.get("limit", 100)),
+    )
     
     return jsonify({
-        "logs": logs[:limit],
-        "total": len(logs)
+        "logs": logs,
+        "total": total
     })
 
 
@@ -1197,43 +1259,72 @@ def api_get_logs():
 @login_required
 def api_clear_logs():
     """Clear all activity logs."""
-    import json
-    LOGS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(LOGS_FILE, 'w') as f:
-        json.dump([], f)
+    activity_log.clear()
     return jsonify({"ok": True})
 
 
 # ============ SOFT DELETE (TRASH) ============
 
+# Deleted transactions stay in the store as tombstones (store.soft_delete)
+# until restored, emptied, or older than trash.retention_days.
 TRASH_FILE = DATA_PATH.parent / "trash.json"
+TRASH_RETENTION_DAYS = int(config.get("trash.retention_days", 30))
 
 
-def load_trash():
-    """Load trashed transactions."""
+def import_legacy_trash():
+    """Move entries from the old trash.json copy into store tombstones, once."""
     import json
-    if TRASH_FILE.exists():
-        try:
-            with open(TRASH_FILE) as f:
-                return json.load(f)
-        except:
-            pass
-    return []
+    if not TRASH_FILE.exists():
+        return
+    try:
+        with open(TRASH_FILE) as f:
+            items = json.load(f)
+    except:
+        items = []
+    
+    ids = [item["id"] for item in items]
+    present = set(store.get_many(ids)) | {t.id for t, _ in store.trash()}
+    txns = []
+    for item in items:
+        txn_data = item["transaction"]
+        if txn_data["id"] in present:
+            continue
+        txns.append(Transaction(
+            id=txn_data["id"],
+            datetime=datetime.fromisoformat(txn_data["datetime"]),
+            paise=to_paise(txn_data["amount"]),
+            direction=txn_data["direction"],
+            counterparty=txn_data["counterparty"],
+            category=txn_data.get("category", []),
+            scope=txn_data.get("scope", "personal"),
+            reviewed=txn_data.get("reviewed", False),
+            mode=txn_data.get("mode", "UNKNOWN"),
+            extras={"notes": txn_data.get("notes", ""), "is_manual": txn_data.get("is_manual", False)}
+        ))
+    if txns:
+        store.add(txns)
+        store.soft_delete([t.id for t in txns])
+    TRASH_FILE.rename(TRASH_FILE.with_name(TRASH_FILE.name + ".imported"))
 
 
-def save_trash(trash):
-    """Save trashed transactions."""
-    import json
-    TRASH_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(TRASH_FILE, 'w') as f:
-        json.dump(trash, f, indent=2)
+def purge_expired_trash():
+    """Permanently drop tombstones older than the retention window."""
+    return store.purge(before=datetime.now() - timedelta(days=TRASH_RETENTION_DAYS))
+
+
+import_legacy_trash()
+purge_expired_trash()
 
 
 @app.route("/api/trash")
 @login_required
 def api_get_trash():
-    """Get trashed transactions."""
-    return jsonify(load_trash())
+    """Get trashed transactions, most recently deleted first."""
+    purge_expired_trash()
+    return jsonify([
+        {"id": t.id, "deleted_at": deleted_at.isoformat(), "transaction": txn_to_dict(t)}
+        for t, deleted_at in store.trash()
+    ])
 
 
 @app.route("/api/trash/restore", methods=["POST"])
@@ -1246,45 +1337,10 @@ def api_restore_transactions():
     if not ids:
         return jsonify({"error": "No IDs provided"}), 400
     
-    trash = load_trash()
-    id_set = set(ids)
-    
-    to_restore = []
-    new_trash = []
-    for item in trash:
-        if item["id"] in id_set:
-            to_restore.append(item)
-        else:
-            new_trash.append(item)
-    
-    if not to_restore:
+    restored_count = store.restore(ids)
+    if not restored_count:
         return jsonify({"error": "None found in trash"}), 404
     
-    # Restore to main store
-    from fie.core.transaction import Transaction
-    restored_count = 0
-    
-    for item in to_restore:
-        txn_data = item["transaction"]
-        try:
-            txn = Transaction(
-                id=txn_data["id"],
-                datetime=datetime.fromisoformat(txn_data["datetime"]),
-                amount=txn_data["amount"],
-                direction=txn_data["direction"],
-                counterparty=txn_data["counterparty"],
-                category=txn_data.get("category", []),
-                scope=txn_data.get("scope", "personal"),
-                reviewed=txn_data.get("reviewed", False),
-                mode=txn_data.get("mode", "UNKNOWN"),
-                extras={"notes": txn_data.get("notes", ""), "is_manual": txn_data.get("is_manual", False)}
-            )
-            store.add([txn])
-            restored_count += 1
-        except Exception as e:
-            print(f"Error restoring {txn_data.get('id')}: {e}")
-    
-    save_trash(new_trash)
     save_log("restore_bulk", {"count": restored_count, "ids": ids})
     
     return jsonify({"ok": True, "restored": restored_count})
@@ -1294,37 +1350,11 @@ def api_restore_transactions():
 @login_required
 def api_restore_transaction(txn_id):
     """Restore a transaction from trash."""
-    trash = load_trash()
-    
-    to_restore = None
-    new_trash = []
-    for item in trash:
-        if item["id"] == txn_id:
-            to_restore = item
-        else:
-            new_trash.append(item)
-    
-    if not to_restore:
+    if not store.restore([txn_id]):
         return jsonify({"error": "Not found in trash"}), 404
     
-    # Restore to main store
-    from fie.core.transaction import Transaction
-    txn_data = to_restore["transaction"]
-    txn = Transaction(
-        id=txn_data["id"],
-        datetime=datetime.fromisoformat(txn_data["datetime"]),
-        amount=txn_data["amount"],
-        direction=txn_data["direction"],
-        counterparty=txn_data["counterparty"],
-        category=txn_data.get("category", []),
-        scope=txn_data.get("scope", "personal"),
-        reviewed=txn_data.get("reviewed", False),
-        raw=txn_data.get("raw", "")
-    )
-    store.add([txn])
-    save_trash(new_trash)
-    
-    save_log("restore", {"transaction_id": txn_id, "counterparty": txn_data["counterparty"]})
+    txn = store.get(txn_id)
+    save_log("restore", {"transaction_id": txn_id, "counterparty": txn.counterparty})
     
     return jsonify({"ok": True})
 
@@ -1333,9 +1363,7 @@ def api_restore_transaction(txn_id):
 @login_required
 def api_empty_trash():
     """Permanently delete all trashed items."""
-    trash = load_trash()
-    count = len(trash)
-    save_trash([])
+    count = store.purge()
     save_log("empty_trash", {"count": count})
     return jsonify({"ok": True, "deleted": count})
 
@@ -1360,19 +1388,21 @@ def api_health():
         })
     
     reviewed_count = sum(1 for t in txns if t.reviewed)
-    uncategorized = [t for t in txns if not t.category or t.category == ["unknown"]]
+    uncategorized = [t for t in txns if not t.category or t.category == ("unknown",)]
     uncategorized_count = len(uncategorized)
     
     # Top uncategorized merchant
     merchant_counts = {}
-    for t in uncategorized:
-        merchant_counts[t.counterparty] = merchant_counts.get(t.counterparty, 0) + 1
+    uncategorized_ids, names = merchants.lookup(t.counterparty for t in uncategorized)
+    for mid in uncategorized_ids:
+        merchant_counts[mid] = merchant_counts.get(mid, 0) + 1
     
     top_merchant = None
     top_count = 0
     if merchant_counts:
-        top_merchant = max(merchant_counts, key=merchant_counts.get)
-        top_count = merchant_counts[top_merchant]
+        top_id = max(merchant_counts, key=merchant_counts.get)
+        top_merchant = names[top_id]
+        top_count = merchant_counts[top_id]
     
     return jsonify({
         "total": total,
@@ -1390,7 +1420,19 @@ def api_health():
 def api_duplicates():
     """Find potential duplicate transactions (same merchant, amount ±1, within 2 hours)."""
     txns = engine.all()
-    
+    merchant_ids, _ = merchants.lookup(t.counterparty for t in txns)
+
+    # Each merchant's rows sorted by time: a row's candidates are the
+    # bisected two-hour window of its own merchant, not every later row.
+    by_merchant = {}
+    for i, m in enumerate(merchant_ids):
+        by_merchant.setdefault(m, []).append(i)
+    times = {}
+    for m, rows in by_merchant.items():
+        rows.sort(key=lambda i: txns[i].datetime)
+        times[m] = [txns[i].datetime for i in rows]
+    window = timedelta(hours=2)
+
     # Group potential duplicates
     duplicates = []
     processed = set()
@@ -1399,18 +1441,17 @@ def api_duplicates():
         if t1.id in processed:
             continue
         
+        m = merchant_ids[i]
+        lo = bisect_left(times[m], t1.datetime - window)
+        hi = bisect_right(times[m], t1.datetime + window)
         group = [txn_to_dict(t1)]
-        for j, t2 in enumerate(txns[i+1:], i+1):
+        for j in sorted(j for j in by_merchant[m][lo:hi] if j > i):
+            t2 = txns[j]
             if t2.id in processed:
                 continue
             
-            # Check duplicate criteria
-            same_merchant = t1.counterparty.lower() == t2.counterparty.lower()
-            similar_amount = abs(t1.amount - t2.amount) <= 1.0
-            time_diff = abs((t1.datetime - t2.datetime).total_seconds())
-            within_time = time_diff <= 7200  # 2 hours
-            
-            if same_merchant and similar_amount and within_time:
+            # Same merchant and within the window already; check the amount
+            if abs(t1.paise - t2.paise) <= 100:
                 group.append(txn_to_dict(t2))
                 processed.add(t2.id)
         
@@ -1436,27 +1477,8 @@ def api_merge_duplicates():
     if not keep_id or not delete_ids:
         return jsonify({"error": "Must provide keep_id and delete_ids"}), 400
     
-    # Move duplicates to trash
-    trash = load_trash()
-    txns = engine.all()
-    txn_map = {t.id: t for t in txns}
-    deleted_count = 0
-    
-    for txn_id in delete_ids:
-        txn = txn_map.get(txn_id)
-        if txn:
-            trash.append({
-                "id": txn.id,
-                "deleted_at": datetime.now().isoformat(),
-                "reason": "duplicate_merge",
-                "transaction": txn_to_dict(txn)
-            })
-            deleted_count += 1
-    
-    # Delete all at once
-    if deleted_count > 0:
-        store.delete(delete_ids)
-        save_trash(trash)
+    # Move duplicates to trash, all at once
+    deleted_count = store.soft_delete(delete_ids)
     
     save_log("merge_duplicates", {"kept": keep_id, "deleted": delete_ids})
     
@@ -1489,22 +1511,22 @@ def api_category_drilldown(category):
     
     # Aggregate by merchant
     merchant_data = {}
-    for t in cat_txns:
-        if t.direction != "debit":
-            continue
-        m = t.counterparty
+    debits = [t for t in cat_txns if t.direction == "debit"]
+    debit_ids, names = merchants.lookup(t.counterparty for t in debits)
+    for t, m in zip(debits, debit_ids):
         if m not in merchant_data:
-            merchant_data[m] = {"name": m, "amount": 0, "count": 0}
-        merchant_data[m]["amount"] += t.amount
+            merchant_data[m] = {"name": names[m], "amount": 0, "count": 0}
+        merchant_data[m]["amount"] += t.paise
         merchant_data[m]["count"] += 1
     
     # Sort merchants by amount
-    merchants = sorted(merchant_data.values(), key=lambda x: -x["amount"])
-    for m in merchants:
-        m["avg_amount"] = round(m["amount"] / m["count"]) if m["count"] > 0 else 0
+    by_amount = sorted(merchant_data.values(), key=lambda x: -x["amount"])
+    for m in by_amount:
+        m["avg_amount"] = round(m["amount"] / m["count"] / 100) if m["count"] > 0 else 0
+        m["amount"] = rupees(m["amount"])
     
     # Total spent (debits only)
-    total_spent = sum(t.amount for t in cat_txns if t.direction == "debit")
+    total_spent = rupees(sum(t.paise for t in cat_txns if t.direction == "debit"))
     
     # Recent transactions (last 10)
     recent = sorted(cat_txns, key=lambda t: t.datetime, reverse=True)[:10]
@@ -1520,7 +1542,7 @@ def api_category_drilldown(category):
         "category": category,
         "total_spent": total_spent,
         "transaction_count": len(cat_txns),
-        "merchants": merchants[:10],  # Top 10
+        "merchants": by_amount[:10],  # Top 10
         "recent_transactions": recent_data
     })
 
@@ -1613,11 +1635,12 @@ def api_create_manual_transaction():
             return jsonify({"error": f"{f} is required"}), 400
     
     try:
-        amount = float(data["amount"])
-        if amount <= 0:
+        paise = to_paise(data["amount"])
+        if paise <= 0:
             return jsonify({"error": "Amount must be positive"}), 400
-    except ValueError:
+    except (ValueError, ArithmeticError):
         return jsonify({"error": "Invalid amount"}), 400
+    amount = rupees(paise)
     
     direction = data["direction"]
     if direction not in ("credit", "debit"):
@@ -1643,7 +1666,7 @@ def api_create_manual_transaction():
     txn = Transaction(
         id=manual_id,
         datetime=dt,
-        amount=amount,
+        paise=paise,
         direction=direction,
         counterparty=counterparty,
         mode=mode,
@@ -1667,25 +1690,31 @@ def api_create_manual_transaction():
     return jsonify({"ok": True, "transaction": txn_to_dict(txn)})
 
 
+@app.route("/api/transactions/<txn_id>")
+@login_required
+def api_transaction_detail(txn_id):
+    """One transaction with its cold extras (raw narration, balance, source file)."""
+    t = store.detail(txn_id)
+    if t is None:
+        return jsonify({"error": "Transaction not found"}), 404
+    return jsonify({**txn_to_dict(t), "extras": t.extras})
+
+
 @app.route("/api/transactions/<txn_id>/notes", methods=["PUT"])
 @login_required
 def api_update_notes(txn_id):
     """Update notes for a transaction."""
-    from dataclasses import replace
-    
     data = request.get_json() or {}
     notes = data.get("notes", "")
     
-    txns = engine.all()
-    match = [t for t in txns if t.id == txn_id]
-    if not match:
+    t = store.get(txn_id)
+    if t is None:
         return jsonify({"error": "Transaction not found"}), 404
     
-    t = match[0]
     new_extras = dict(t.extras)
     new_extras["notes"] = notes
     
-    new_t = replace(t, extras=new_extras)
+    new_t = t.evolve(extras=new_extras)
     store.update([new_t])
     
     save_log("notes_update", {
@@ -1708,10 +1737,10 @@ def api_recurring():
     
     # Group transactions by merchant (normalized)
     merchant_txns = defaultdict(list)
-    for t in txns:
-        if t.direction == "debit":  # Only track debits (expenses)
-            key = t.counterparty.lower().strip()
-            merchant_txns[key].append(t)
+    debits = [t for t in txns if t.direction == "debit"]  # Only track debits (expenses)
+    debit_ids, names = merchants.lookup(t.counterparty for t in debits)
+    for t, mid in zip(debits, debit_ids):
+        merchant_txns[mid].append(t)
     
     recurring = []
     
@@ -1775,7 +1804,7 @@ def api_recurring():
             next_date = last_date + timedelta(days=expected_intervals[pattern])
             
             recurring.append({
-                "merchant": txn_list[0].counterparty,  # Original case
+                "merchant": names[merchant],
                 "pattern": pattern,
                 "confidence": round(confidence),
                 "avg_amount": round(avg_amount, 2),
@@ -1798,8 +1827,6 @@ def api_recurring():
 @login_required
 def api_compare_months():
     """Compare spending between two months."""
-    from collections import defaultdict
-    
     # Get optional month params (defaults to this month vs last month)
     month1 = request.args.get("month1")  # Format: YYYY-MM
     month2 = request.args.get("month2")  # Format: YYYY-MM
@@ -1838,30 +1865,18 @@ def api_compare_months():
     month1_end = month_end(month1_start)
     month2_end = month_end(month2_start)
     
-    txns = engine.all()
-    
-    # Separate transactions by month
+    # Separate transactions by month (one table per month window)
     def categorize_spending(start, end):
-        spending = defaultdict(float)
-        income = 0
-        total_expense = 0
-        count = 0
-        
-        for t in txns:
-            if start <= t.datetime <= end:
-                if t.direction == "debit" and t.scope != "ignored":
-                    cat = t.category[0] if t.category else "uncategorized"
-                    spending[cat] += t.amount
-                    total_expense += t.amount
-                    count += 1
-                elif t.direction == "credit" and t.scope != "ignored":
-                    income += t.amount
+        table = engine.table(start, end)
+        in_month = ~table.scope_is("ignored")
+        debit = in_month & table.is_debit
+        credit = in_month & ~table.is_debit
         
         return {
-            "by_category": dict(spending),
-            "total_expense": round(total_expense, 2),
-            "income": round(income, 2),
-            "transaction_count": count
+            "by_category": table.totals_by("category", debit, default="uncategorized"),
+            "total_expense": round(table.sum(debit), 2),
+            "income": round(table.sum(credit), 2),
+            "transaction_count": int(debit.sum())
         }
     
     month1_data = categorize_spending(month1_start, month1_end)
@@ -0,0 +1,79 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pdfplumber
+
+from fie.ingest import canara, manifest
+from fie.ingest.canara import page_words, parse_canara_pdf, parse_pages
+from fie.ingest.parallel import inline_jobs, parse_many
+
+
+PDFS = [str(Path(__file__).parent / name) for name in ("canara11.pdf", "canara12.pdf")]
+
+
+def test_parse_many_keeps_input_order():
+    first, second = (parse_canara_pdf(pdf) for pdf in PDFS)
+    assert first and second
+    assert parse_many(PDFS[::-1], jobs=2) == second + first
+
+
+def test_small_batches_parse_inline(monkeypatch):
+    assert inline_jobs(PDFS) == 1
+    assert inline_jobs(PDFS * 2) is None
+    assert inline_jobs(PDFS[:1] * 5) is None
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError("pool started for a small parse")
+
+    expected = parse_canara_pdf(PDFS[1])
+    monkeypatch.setattr(canara, "ProcessPoolExecutor", no_pool)
+    assert parse_many(PDFS[1:]) == expected
+    # A single page range is parsed in-process whatever ``jobs`` says.
+    monkeypatch.setattr(canara, "PAGES_PER_TASK", 100)
+    assert parse_canara_pdf(PDFS[1], jobs=2) == expected
+
+
+def test_page_parallel_parse_matches_sequential(monkeypatch):
+    monkeypatch.setattr(canara, "PAGES_PER_TASK", 1)
+    assert parse_canara_pdf(PDFS[0], jobs=2) == parse_canara_pdf(PDFS[0])
+
+
+def test_file_pool_workers_do_not_start_page_pools(monkeypatch):
+    def nested(*args):
+        raise AssertionError("page pool inside a file pool worker")
+
+    monkeypatch.setattr(canara, "_parallel_pages", nested)
+    ctx = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        assert pool.submit(parse_canara_pdf, PDFS[0], 2).result() == parse_canara_pdf(PDFS[0])
+
+
+def test_state_machine_stitches_across_page_breaks():
+    with pdfplumber.open(PDFS[1]) as pdf:
+        words = [w for page in pdf.pages for w in page_words(page)]
+    expected = list(parse_pages([words], PDFS[1]))
+    for cut in range(0, len(words), 37):
+        assert list(parse_pages([words[:cut], [], words[cut:]], PDFS[1])) == expected
+
+
+def test_manifest_skips_ingested_files_until_parser_changes(tmp_path, monkeypatch):
+    a, b, copy = tmp_path / "a.pdf", tmp_path / "b.pdf", tmp_path / "a copy.pdf"
+    a.write_bytes(b"statement a")
+    b.write_bytes(b"statement b")
+    copy.write_bytes(b"statement a")
+    m = manifest.IngestManifest(tmp_path / "ingested.json")
+
+    todo, done = m.select([a, b, copy])
+    assert list(todo) == [str(a), str(b)] and done == []
+    m.record(todo, {str(a): {"count": 2, "first": "2025-01-01", "last": "2025-01-31"}})
+
+    todo, done = m.select([copy, b])
+    assert todo == {} and [p for p, _ in done] == [copy, b]
+    assert done[0][1]["count"] == 2 and done[1][1]["count"] == 0
+    assert list(m.select([a], force=True)[0]) == [str(a)]
+
+    b.write_bytes(b"statement b, amended")
+    assert list(m.select([a, b])[0]) == [str(b)]
+    monkeypatch.setattr(manifest, "PARSER_VERSION", manifest.PARSER_VERSION + 1)
+    assert list(m.select([a])[0]) == [str(a)]
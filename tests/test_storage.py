@@ -0,0 +1,602 @@
+import json
+import multiprocessing
+import sqlite3
+from contextlib import closing
+from dataclasses import replace
+from datetime import datetime
+
+from fie.core.engine import FIEEngine
+from fie.core.transaction import Transaction
+import pytest
+
+from fie.storage import binary
+from fie.storage.activity_log import ActivityLog
+from fie.storage.archive import TransactionArchive, summarize
+from fie.storage.backup import BackupSet
+from fie.storage.base import VersionConflict
+from fie.storage.cold import ColdStore
+from fie.storage.fingerprints import FingerprintIndex
+from fie.storage.json_store import JsonTransactionStore
+from fie.storage.partitioned_store import PartitionedTransactionStore
+from fie.storage.sqlite_store import SqliteTransactionStore
+
+
+def make_txn(n, **kw):
+    fields = dict(
+        id=f"t{n:04d}",
+        datetime=datetime(2025, 1, 1 + n % 28, 12, 0, 0),
+        paise=10000 + 100 * n,
+        direction="debit",
+        counterparty=f"SHOP{n % 3}",
+        mode="UPI",
+        extras={"raw": f"UPI/DR/{n}", "balance": 1000.0 - n},
+    )
+    fields.update(kw)
+    return Transaction(**fields)
+
+
+def test_trusted_construction_and_evolve():
+    t = make_txn(1, category=["food"])
+    fields = [getattr(t, f) for f in Transaction.__dataclass_fields__]
+    assert Transaction.trusted(*fields) == t
+
+    e = t.evolve(scope="family", category="rent", reviewed=True)
+    assert e == replace(t, scope="family", category=("rent",), reviewed=True)
+    assert t.scope == "unknown"
+    with pytest.raises(ValueError):
+        t.evolve(direction="sideways")
+    with pytest.raises(TypeError):
+        t.evolve(colour="red")
+
+
+def test_sqlite_store_roundtrip(tmp_path):
+    store = SqliteTransactionStore(tmp_path / "t.db")
+    store.add([make_txn(1), make_txn(2), make_txn(1)])
+    assert [t.id for t in store.list_all()] == ["t0001", "t0002"]
+
+    store.update([replace(make_txn(2), scope="family", category=["food"], reviewed=True)])
+    t2 = store.list_all()[1]
+    assert (t2.scope, t2.category, t2.reviewed) == ("family", ("food",), True)
+    assert "raw" not in t2.extras
+    assert store.detail("t0002").extras["raw"] == "UPI/DR/2"
+
+    store.delete(["t0001"])
+    assert [t.id for t in store.list_all()] == ["t0002"]
+
+
+def test_sqlite_migrate_from_json(tmp_path):
+    src = JsonTransactionStore(tmp_path / "transactions.json")
+    src.add([make_txn(n) for n in range(5)])
+
+    dest = SqliteTransactionStore(tmp_path / "transactions.db")
+    assert dest.migrate_from_json(src.path) == 5
+    assert dest.migrate_from_json(src.path) == 5
+    assert [t.to_dict() for t in dest.list_all()] == [t.to_dict() for t in src.list_all()]
+
+    # The source is read, not migrated: an old file stays as it was, no sidecars.
+    legacy = tmp_path / "legacy" / "transactions.json"
+    legacy.parent.mkdir()
+    legacy.write_text(json.dumps({"version": 1, "transactions": [
+        {"id": "a", "datetime": "2025-01-02T10:00:00", "amount": 5.0, "direction": "debit",
+         "counterparty": "X", "balance": 90.0},
+    ]}))
+    before = legacy.read_bytes()
+    assert dest.migrate_from_json(legacy) == 1
+    assert legacy.read_bytes() == before
+    assert [p.name for p in legacy.parent.iterdir()] == ["transactions.json"]
+    assert dest.detail("a").extras["balance"] == 90.0
+
+
+def test_sqlite_update_writes_cold_rows_for_updated_ids_only(tmp_path):
+    store = SqliteTransactionStore(tmp_path / "t.db")
+    store.add([make_txn(n) for n in range(2)])
+    store.soft_delete(["t0001"])
+    store.update([make_txn(1, scope="family"), make_txn(7)])
+    with closing(sqlite3.connect(store.path)) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM transaction_cold").fetchone()[0] == 2
+        assert conn.execute("SELECT id FROM transaction_cold WHERE id = 't0007'").fetchone() is None
+
+
+@pytest.mark.parametrize("fmt", ["json", "binary"])
+def test_legacy_schema_migrated_once_on_open(tmp_path, fmt):
+    legacy = {"version": 3, "transactions": [
+        {"id": "a", "datetime": "2025-01-02T10:00:00", "amount": 5.0, "direction": "debit",
+         "counterparty": "X", "balance": 90.0, "raw_txn": "UPI/DR/1", "category": None, "junk": 1},
+        {**make_txn(2).to_dict(), "extras": None, "mode": "IMPS", "deleted_at": "2025-02-01T00:00:00"},
+    ]}
+    legacy["transactions"][1]["amount"] = legacy["transactions"][1].pop("paise") / 100
+    (tmp_path / "t.json").write_text(json.dumps(legacy))
+    path = tmp_path / ("t.json" if fmt == "json" else "t.fieb")
+
+    store = JsonTransactionStore(path, format=fmt)
+    assert store._header()["schema"] == 4
+    assert store.version() == 3
+    assert store.migrate() is False
+    a = store.get("a")
+    assert (a.mode, a.category, a.reviewed, a.scope) == ("UNKNOWN", (), False, "unknown")
+    assert a.extras == {}
+    assert store.detail("a").extras == {"balance": 90.0, "raw_txn": "UPI/DR/1"}
+    assert [(t.id, t.mode, t.extras) for t, _ in store.trash()] == [("t0002", "IMPS", {})]
+
+    if fmt == "json":
+        assert "junk" not in json.loads(path.read_text())["transactions"][0]
+
+
+def test_json_store_journal_replay_and_compaction(tmp_path):
+    path = tmp_path / "transactions.json"
+    store = JsonTransactionStore(path, journal=True, compact_every=4)
+    store.add([make_txn(1), make_txn(2)])
+    store.update([replace(make_txn(1), scope="family")])
+
+    # Snapshot untouched; state lives in the journal until compaction
+    assert json.loads(path.read_text()) == {"version": 0, "schema": 4, "transactions": []}
+    assert len(store.journal_path.read_text().splitlines()) == 3
+    assert [t.scope for t in store.list_all()] == ["family", "unknown"]
+
+    store.delete(["t0002"])
+    assert not store.journal_path.exists()
+    assert [t.id for t in JsonTransactionStore(path).list_all()] == ["t0001"]
+
+
+def _add_in_child(path, journal, start):
+    store = JsonTransactionStore(path, journal=journal, compact_every=7)
+    for n in range(start, start + 20):
+        store.add([make_txn(n)])
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_json_store_versions_and_process_safety(tmp_path, journal):
+    path = tmp_path / "t.json"
+    store = JsonTransactionStore(path, journal=journal, compact_every=7)
+    assert store.version() == 0
+    store.add([make_txn(0)])
+    v = store.version()
+    assert v == 1
+
+    other = JsonTransactionStore(path, journal=journal, compact_every=7)
+    other.update([replace(make_txn(0), scope="family")], expected_version=v)
+    with pytest.raises(VersionConflict):
+        store.update([replace(make_txn(0), scope="shared")], expected_version=v)
+    assert store.get("t0000").scope == "family"
+
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_add_in_child, args=(path, journal, 100 * k)) for k in (1, 2, 3)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    assert len(store.list_all()) == 61
+    assert store.version() == 62
+
+
+def test_binary_snapshot_roundtrip_and_import(tmp_path):
+    src = JsonTransactionStore(tmp_path / "transactions.json")
+    src.add([make_txn(n, category=["food", "swiggy"] if n % 2 else []) for n in range(6)])
+
+    store = JsonTransactionStore(tmp_path / "transactions.fieb", format="binary")
+    assert store.list_all() == src.list_all()
+
+    store.update([replace(make_txn(3), scope="family", reviewed=True)])
+    store.delete(["t0000"])
+    reopened = JsonTransactionStore(tmp_path / "transactions.fieb", format="binary")
+    assert reopened.list_all() == store.list_all()
+    assert reopened.get("t0003").scope == "family"
+
+    cols = binary.read_columns(tmp_path / "transactions.fieb")
+    assert cols["paise"].tolist() == [t.paise for t in reopened.list_all()]
+    assert [cols["strings"][i] for i in cols["id"]] == [t.id for t in reopened.list_all()]
+
+
+def test_json_store_snapshot_cache(tmp_path):
+    path = tmp_path / "transactions.json"
+    store = JsonTransactionStore(path)
+    store.add([make_txn(1), make_txn(2)])
+
+    first = store.snapshot()
+    assert store.snapshot() is first
+
+    store.update([replace(make_txn(2), scope="family")])
+    second = store.snapshot()
+    assert second is not first
+    assert second[0] is first[0]
+    assert second[1].scope == "family"
+
+    # A write from another process is picked up via mtime/size
+    JsonTransactionStore(path).delete(["t0001"])
+    assert [t.id for t in store.list_all()] == ["t0002"]
+
+
+def test_partitioned_store_shards_by_month(tmp_path):
+    legacy = JsonTransactionStore(tmp_path / "transactions.json")
+    legacy.add([make_txn(n, datetime=datetime(2025, 1 + n % 3, 10)) for n in range(9)])
+
+    store = PartitionedTransactionStore(tmp_path / "transactions", legacy_path=legacy.path)
+    assert store.months() == ["2025-01", "2025-02", "2025-03"]
+    assert sorted(t.id for t in store.list_all()) == sorted(t.id for t in legacy.list_all())
+    manifest = json.loads((tmp_path / "transactions" / "manifest.json").read_text())
+    assert manifest["partitions"]["2025-02"]["count"] == 3
+
+    feb = [t.id for t in store.between(datetime(2025, 2, 1), datetime(2025, 2, 28))]
+    assert feb == ["t0001", "t0004", "t0007"]
+    assert store.between(datetime(2025, 2, 1), datetime(2025, 2, 28)) is store.between(
+        datetime(2025, 2, 1), datetime(2025, 2, 28)
+    )
+
+    # An edit rewrites only its own shard.
+    jan = tmp_path / "transactions" / "2025-01.json"
+    before = jan.stat().st_mtime_ns
+    store.update([replace(store.get("t0004"), scope="family")])
+    assert jan.stat().st_mtime_ns == before
+    assert store.get("t0004").scope == "family"
+
+    # Moving a transaction to another month moves it between shards.
+    store.update([replace(store.get("t0003"), datetime=datetime(2025, 4, 1))])
+    assert store.months() == ["2025-01", "2025-02", "2025-03", "2025-04"]
+    assert [t.id for t in store.between(datetime(2025, 4, 1))] == ["t0003"]
+    # ... and a re-import of the original row is still a duplicate.
+    assert store.add_many([t for t in legacy.list_all() if t.id == "t0003"]) == 0
+    assert [t.id for t in store.list_all()].count("t0003") == 1
+
+    store.delete(["t0003"])
+    assert store.months() == ["2025-01", "2025-02", "2025-03"]
+    assert not (tmp_path / "transactions" / "2025-04.json").exists()
+    assert len(PartitionedTransactionStore(tmp_path / "transactions").list_all()) == 8
+
+
+@pytest.mark.parametrize("make_store", [
+    lambda p: JsonTransactionStore(p / "t.json"),
+    lambda p: JsonTransactionStore(p / "t.json", journal=True),
+    lambda p: SqliteTransactionStore(p / "t.db"),
+    lambda p: PartitionedTransactionStore(p / "parts"),
+])
+def test_cold_extras_kept_out_of_hot_rows(tmp_path, make_store):
+    store = make_store(tmp_path)
+    store.add([make_txn(n, extras={"raw": f"UPI/DR/{n}", "balance": 5.0, "notes": "n"}) for n in range(3)])
+    assert {tuple(t.extras) for t in store.list_all()} == {("notes",)}
+
+    # An edit made from a hot row keeps the cold fields; a month move carries them.
+    store.update([store.get("t0001").evolve(scope="family", datetime=datetime(2025, 3, 1))])
+    store = make_store(tmp_path)
+    assert store.detail("t0001").extras == {"raw": "UPI/DR/1", "balance": 5.0, "notes": "n"}
+    assert store.detail("t0001").scope == "family"
+    assert store.detail("missing") is None
+
+    store.delete(["t0002"])
+    assert store.cold(["t0000", "t0002"]) == {"t0000": {"raw": "UPI/DR/0", "balance": 5.0}}
+
+    # Trashed rows keep theirs until purged.
+    store.soft_delete(["t0000"])
+    assert store.cold(["t0000"]) == {"t0000": {"raw": "UPI/DR/0", "balance": 5.0}}
+
+
+@pytest.mark.parametrize("journal", [False, True])
+def test_cold_file_compacts_with_the_journal(tmp_path, journal):
+    store = JsonTransactionStore(tmp_path / "t.json", journal=journal, compact_every=4)
+    store.add([make_txn(n) for n in range(2)])
+    for n in range(9):
+        store.update([store.get("t0001").evolve(scope=f"s{n}")])
+    assert store.cold_rows.superseded() < 4
+    assert len(store.cold_rows.path.read_text().splitlines()) < 6
+    assert store.detail("t0001").extras == make_txn(1).extras
+
+
+def test_cold_reads_survive_a_concurrent_compaction(tmp_path):
+    writer = ColdStore(tmp_path / "t.cold.jsonl")
+    for n in range(4):
+        writer.put({"t0000": {"raw": "a"}, "t0001": {"raw": f"b{n}"}})
+    reader = ColdStore(writer.path)
+    sync = reader._sync
+
+    def sync_then_compact():
+        # Another process compacts between indexing and the offset reads.
+        sync()
+        reader._sync = sync
+        writer.compact()
+
+    reader._sync = sync_then_compact
+    assert reader.get_many(["t0001", "t0000"]) == {"t0001": {"raw": "b3"}, "t0000": {"raw": "a"}}
+
+
+def test_schema_2_file_moves_cold_extras_out(tmp_path):
+    path = tmp_path / "t.json"
+    path.write_text(json.dumps({"version": 1, "schema": 2, "transactions": [make_txn(1).to_dict()]}))
+    store = JsonTransactionStore(path)
+    assert json.loads(path.read_text())["transactions"][0]["extras"] == {}
+    assert store.detail("t0001") == make_txn(1)
+
+
+def test_point_lookups(tmp_path):
+    for store in (JsonTransactionStore(tmp_path / "t.json"), SqliteTransactionStore(tmp_path / "t.db")):
+        store.add([make_txn(n) for n in range(5)])
+        assert store.get("t0003") == make_txn(3, extras={})
+        assert store.detail("t0003") == make_txn(3)
+        assert store.get("missing") is None
+        assert list(store.get_many(["t0004", "missing", "t0001", "t0004"])) == ["t0004", "t0001"]
+
+
+@pytest.mark.parametrize("make_store", [
+    lambda p: JsonTransactionStore(p / "t.json"),
+    lambda p: JsonTransactionStore(p / "t.json", journal=True),
+    lambda p: JsonTransactionStore(p / "t.fieb", format="binary"),
+    lambda p: SqliteTransactionStore(p / "t.db"),
+    lambda p: PartitionedTransactionStore(p / "parts"),
+])
+def test_soft_delete_restore_purge(tmp_path, make_store):
+    store = make_store(tmp_path)
+    store.add([make_txn(n, category=["food"], extras={"raw": f"UPI/DR/{n}", "notes": "x"}) for n in range(4)])
+
+    assert store.soft_delete(["t0001", "t0002", "missing"]) == 2
+    assert store.soft_delete(["t0001"]) == 0
+    assert [t.id for t in store.list_all()] == ["t0000", "t0003"]
+    assert store.get("t0001") is None
+    assert store.query({"category": "food"})[1] == 2
+    assert {t.id for t, _ in store.trash()} == {"t0001", "t0002"}
+
+    # Tombstoned rows still dedupe re-imports.
+    store.add([make_txn(1, category=["food"])])
+    assert store.get("t0001") is None
+
+    store = make_store(tmp_path)
+    assert store.restore(["t0001"]) == 1
+    assert store.get("t0001").extras == {"notes": "x"}
+    assert store.detail("t0001").extras == {"raw": "UPI/DR/1", "notes": "x"}
+
+    assert store.purge(before=datetime(2000, 1, 1)) == 0
+    assert store.purge() == 1
+    assert store.trash() == []
+    assert [t.id for t in store.list_all()] == ["t0000", "t0001", "t0003"]
+
+
+@pytest.mark.parametrize("make_store", [
+    lambda p: JsonTransactionStore(p / "t.json"),
+    lambda p: JsonTransactionStore(p / "t.json", journal=True, compact_every=3),
+    lambda p: JsonTransactionStore(p / "t.json", bloom=True),
+    lambda p: SqliteTransactionStore(p / "t.db"),
+    lambda p: PartitionedTransactionStore(p / "parts", bloom=True),
+])
+def test_add_many_dedupes_batch_and_store(tmp_path, make_store):
+    store = make_store(tmp_path)
+    assert store.add_many([make_txn(1), make_txn(2), make_txn(1, paise=500)]) == 2
+    assert store.get("t0001").paise == 10100
+
+    store.soft_delete(["t0002"])
+    store = make_store(tmp_path)
+    assert store.add_many([make_txn(n) for n in range(4)]) == 2
+    assert store.add_many([make_txn(n) for n in range(4)]) == 0
+    store.delete(["t0003"])
+    assert store.add_many([make_txn(3)]) == 1
+    assert [t.id for t in store.list_all()] == ["t0001", "t0000", "t0003"]
+
+
+def test_engine_ingests_iterables_in_chunks(tmp_path):
+    store = JsonTransactionStore(tmp_path / "t.json")
+    engine = FIEEngine(store)
+    writes = []
+    add_many = store.add_many
+    store.add_many = lambda txns: writes.append(len(txns)) or add_many(txns)
+
+    assert engine.ingest((make_txn(n % 5) for n in range(7)), chunk_size=3) == 5
+    assert writes == [3, 3, 1]
+    assert engine.ingest(iter([]), chunk_size=3) == 0
+    assert [t.id for t in store.list_all()] == [f"t{n:04d}" for n in range(5)]
+    assert engine.merchants.names == ["SHOP0", "SHOP1", "SHOP2"]
+
+
+@pytest.mark.parametrize("backend", ["json", "sqlite"])
+def test_fingerprints_drop_entries_repeated_across_statements(tmp_path, backend):
+    if backend == "json":
+        store = JsonTransactionStore(tmp_path / "t.json")
+    else:
+        store = SqliteTransactionStore(tmp_path / "t.db")
+    path = tmp_path / "t.fingerprints"
+    engine = FIEEngine(store, fingerprints=FingerprintIndex(path))
+
+    # An overlapping statement: same entries under new ids (other source file).
+    assert engine.ingest([make_txn(n) for n in range(4)]) == 4
+    again = [make_txn(n, id=f"u{n:04d}", counterparty="OTHER") for n in range(2, 6)]
+    assert engine.ingest(again + again) == 2
+    assert sorted(t.id for t in store.list_all()) == ["t0000", "t0001", "t0002", "t0003", "u0004", "u0005"]
+    assert FIEEngine(store, fingerprints=FingerprintIndex(path)).ingest(again) == 0
+
+    # Writes made without the index are replayed from the store's id log:
+    # no rescan, and only rows the index has not seen are read.
+    reads = []
+    cold, snapshot = store.cold, store.snapshot
+
+    def read_cold(ids):
+        reads.append(sorted(ids))
+        return cold(reads[-1])
+
+    store.cold = read_cold
+    store.snapshot = lambda: reads.append("snapshot") or snapshot()
+    store.delete(["u0005"])
+    store.update([store.get("t0000").evolve(scope="family")])
+    store.add_many([make_txn(7, id="z0007")])
+    store.soft_delete(["z0007"])
+    assert engine.ingest([make_txn(n, id=f"x{n:04d}") for n in (0, 5, 7)], chunk_size=1) == 1
+    assert reads == [["z0007"]]
+    store.cold, store.snapshot = cold, snapshot
+    store.delete(["z0007"])
+
+    # Repeats stored without the index are collapsed, a reviewed copy kept.
+    store.add_many([make_txn(1, id="v0001", reviewed=True)])
+    index = FingerprintIndex(path)
+    assert [[t.id for t in g] for g in index.collapse(store, dry_run=True)] == [["v0001", "t0001"]]
+    assert len(store.list_all()) == 7
+    index.collapse(store)
+    assert [t.id for t, _ in store.trash()] == ["t0001"]
+    assert index.collapse(store) == []
+    assert engine.ingest([make_txn(1, id="w0001")]) == 0
+
+
+def test_id_index_rebuilds_after_outside_write(tmp_path):
+    path = tmp_path / "t.json"
+    store = JsonTransactionStore(path, bloom=True)
+    store.add([make_txn(n) for n in range(3)])
+    assert store.ids.version() == store.version()
+
+    # A writer that does not maintain the index leaves it stale.
+    data = json.loads(path.read_text())
+    data["version"] += 1
+    data["transactions"].append({**data["transactions"][0], "id": "t9999"})
+    path.write_text(json.dumps(data))
+
+    assert store.add_many([make_txn(9999), make_txn(5)]) == 1
+    assert JsonTransactionStore(path, bloom=True).add_many([make_txn(5)]) == 0
+
+    path.with_suffix(".ids").unlink()
+    assert JsonTransactionStore(path).add_many([make_txn(n) for n in range(6)]) == 2
+
+
+def test_archive_moves_old_years_out(tmp_path):
+    store = JsonTransactionStore(tmp_path / "transactions.json")
+    txns = [make_txn(n, datetime=datetime(2022 + n % 4, 1 + n % 12, 1)) for n in range(12)]
+    txns[1] = txns[1].evolve(direction="credit", category=("salary",))
+    store.add(txns)
+    archive = TransactionArchive(tmp_path / "archive")
+
+    assert archive.archive(store, 2024) == {2022: 3, 2023: 3}
+    assert {t.datetime.year for t in store.list_all()} == {2024, 2025}
+    assert archive.years() == [2022, 2023]
+    assert not archive.path(2022).stat().st_mode & 0o222
+    assert archive.rows(2023)[0].extras["raw"] == "UPI/DR/1"
+
+    old = [t for t in txns if t.datetime.year < 2024]
+    expected = summarize(old)
+    assert archive.summary() == expected
+    assert expected["count"] == 6 and expected["income"] == txns[1].paise
+    assert expected["spent"] == sum(t.paise for t in old if t.direction == "debit")
+    assert expected["scopes"]["unknown"]["categories"]["salary"] == {"count": 1, "spent": 0, "income": txns[1].paise}
+    assert expected["scopes"]["unknown"]["credit_tags"] == {"salary": txns[1].paise}
+
+    assert TransactionArchive(tmp_path / "archive").summary() == expected
+
+    # Re-imported archived rows are recognised; a late 2023 row is merged in.
+    assert archive.known([txns[0], txns[2]]) == {txns[0].id}
+    late = make_txn(99, datetime=datetime(2023, 6, 1))
+    store.add([late])
+    assert archive.archive(store, 2024) == {2023: 1}
+    assert archive.summary()["count"] == 7
+    assert late.id in archive.known([late])
+
+
+@pytest.mark.parametrize("make_store", [
+    lambda p: JsonTransactionStore(p / "t.json"),
+    lambda p: SqliteTransactionStore(p / "t.db"),
+    lambda p: PartitionedTransactionStore(p / "parts"),
+])
+def test_backup_is_incremental_and_restores(tmp_path, make_store):
+    store = make_store(tmp_path)
+    rules = tmp_path / "auto_rules.json"
+    rules.write_text("[]")
+    files = {"auto_rules.json": rules, "settings.json": tmp_path / "settings.json"}
+    backups = BackupSet(tmp_path / "backups")
+
+    store.add([make_txn(n) for n in range(4)])
+    assert backups.backup(store, files) == 1
+    assert backups.backup(store, files) is None
+
+    store.update([store.get("t0001").evolve(scope="family")])
+    store.soft_delete(["t0002"])
+    store.delete(["t0003"])
+    store.add([make_txn(9)])
+    rules.write_text('[{"name": "r"}]')
+    assert backups.backup(store, files) == 2
+    second = backups.points()[1]
+    assert (second["upserts"], second["removed"], second["files"]) == (3, 1, ["auto_rules.json"])
+
+    trashed_at = store.trash()[0][1]
+    files["settings.json"].write_text("{}")
+    assert backups.backup(store, files) == 3
+
+    # Files deleted since the point come back, files created since go.
+    rules.unlink()
+    assert backups.restore(store, files, 1) == 1
+    assert [t.id for t in store.list_all()] == ["t0000", "t0001", "t0002", "t0003"]
+    assert store.trash() == []
+    assert store.get("t0001").scope == "unknown"
+    assert store.detail("t0000").extras == make_txn(0).extras
+    assert rules.read_text() == "[]"
+    assert not files["settings.json"].exists()
+
+    backups.restore(store, files, 2)
+    assert sorted(t.id for t in store.list_all()) == ["t0000", "t0001", "t0009"]
+    assert store.trash() == [(store.trash()[0][0], trashed_at)]
+    assert [t.id for t, _ in store.trash()] == ["t0002"]
+    assert store.get("t0001").scope == "family"
+    assert rules.read_text() == '[{"name": "r"}]'
+
+
+def test_query_matches_naive_filter_sort_slice(tmp_path):
+    txns = [
+        make_txn(n, scope=("personal", "family")[n % 2], category=[("food", "cab")[n % 3 == 0]],
+                 direction=("debit", "credit")[n % 4 == 0], paise=1000 + 100 * (n % 7))
+        for n in range(60)
+    ]
+    stores = [
+        JsonTransactionStore(tmp_path / "t.json"),
+        SqliteTransactionStore(tmp_path / "t.db"),
+        PartitionedTransactionStore(tmp_path / "parts"),
+    ]
+    for store in stores:
+        store.add(txns)
+
+    cases = [
+        ({}, "datetime", "desc", 0, 5),
+        ({"start": datetime(2025, 1, 5), "end": datetime(2025, 1, 20)}, "datetime", "asc", 2, 4),
+        ({"scope": "family", "category": "cab"}, "datetime", "desc", 0, None),
+        ({"direction": "credit", "search": "shop1"}, "amount", "desc", 1, 3),
+        ({"scope": "personal", "start": datetime(2025, 1, 10)}, "counterparty", "asc", 0, 10),
+    ]
+    for filters, sort, order, offset, limit in cases:
+        expected = [
+            t for t in txns
+            if all(getattr(t, k) == v for k, v in filters.items() if k in ("scope", "direction"))
+            and filters.get("category", t.category[0]) in t.category
+            and filters.get("search", "") in t.counterparty.lower()
+            and t.datetime >= filters.get("start", datetime.min)
+            and t.datetime <= filters.get("end", datetime.max)
+        ]
+        expected.sort(key=lambda t: getattr(t, sort), reverse=order == "desc")
+        page = expected[offset:None if limit is None else offset + limit]
+
+        for store in stores:
+            got, total = store.query(filters, sort, order, offset, limit)
+            assert total == len(expected)
+            assert [t.id for t in got] == [t.id for t in page]
+
+
+def test_activity_log_rotation_and_filters(tmp_path):
+    legacy = tmp_path / "activity_logs.json"
+    legacy.write_text(json.dumps([
+        {"id": "log_old2", "timestamp": "2025-01-02T10:00:00", "action": "edit", "details": {"n": 2}, "user": "admin"},
+        {"id": "log_old1", "timestamp": "2025-01-01T10:00:00", "action": "upload", "details": {"n": 1}, "user": "admin"},
+    ]))
+    log = ActivityLog(tmp_path / "logs", segment_bytes=400, max_segments=100, legacy_path=legacy)
+    assert not legacy.exists()
+
+    for n in range(30):
+        log.append(("edit", "delete")[n % 3 == 0], {"transaction_id": f"t{n:04d}"})
+    assert len(list((tmp_path / "logs").glob("log-*.jsonl"))) > 1
+
+    logs, total = log.query(limit=5)
+    assert total == 32
+    assert [l["details"]["transaction_id"] for l in logs] == ["t0029", "t0028", "t0027", "t0026", "t0025"]
+
+    logs, total = log.query(action="delete", limit=3)
+    assert total == 10
+    assert [l["details"]["transaction_id"] for l in logs] == ["t0027", "t0024", "t0021"]
+
+    logs, total = log.query(end="2025-01-01")
+    assert (total, [l["id"] for l in logs]) == (1, ["log_old1"])
+    assert log.query(search="T0013")[1] == 1
+
+    small = ActivityLog(tmp_path / "small", segment_bytes=200, max_segments=2)
+    for n in range(20):
+        small.append("edit", {"n": n})
+    logs, total = small.query(limit=None)
+    assert len(list((tmp_path / "small").glob("log-*.jsonl"))) == 2
+    assert logs[0]["details"] == {"n": 19} and total == len(logs) < 20
+
+    small.clear()
+    assert small.query() == ([], 0)
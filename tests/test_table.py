@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from fie.core.merchants import MerchantDirectory
+from fie.core.table import TransactionTable
+from fie.core.transaction import Transaction
+
+
+def txn(n, day, amount, direction="debit", scope="personal", category=(), counterparty="SHOP"):
+    return Transaction(
+        id=f"t{n}",
+        datetime=datetime(2025, 1, day, 10, 0, 0),
+        paise=round(amount * 100),
+        direction=direction,
+        counterparty=counterparty,
+        mode="UPI",
+        scope=scope,
+        category=list(category),
+    )
+
+
+def test_table_reductions_match_row_loops():
+    txns = (
+        txn(1, 1, 100.0, category=["food"], counterparty="A"),
+        txn(2, 1, 50.0, counterparty="B"),
+        txn(3, 8, 25.0, category=["food"], counterparty="A"),
+        txn(4, 9, 500.0, direction="credit", scope="family"),
+    )
+    table = TransactionTable(txns)
+    debit = table.all() & table.is_debit
+
+    assert table.sum(debit) == 175.0
+    assert table.totals_by("category", debit, default="unknown") == {"food": 125.0, "unknown": 50.0}
+    assert table.totals_by("counterparty", debit) == {"A": 125.0, "B": 50.0}
+    assert table.totals_by_day(table.all(), weights=table.signed) == {
+        "2025-01-01": -150.0, "2025-01-08": -25.0, "2025-01-09": 500.0,
+    }
+    assert table.totals_by_day(debit, "%Y-W%W") == {"2025-W00": 150.0, "2025-W01": 25.0}
+    assert table.in_month(2025, 1).all() and not table.in_year(2024).any()
+    assert table.scope_is("family").tolist() == [False, False, False, True]
+    assert table.argmax(debit) == 0
+
+
+def test_merchant_ids_collapse_spellings_and_aliases(tmp_path):
+    path = tmp_path / "transactions.merchants.json"
+    merchants = MerchantDirectory(path)
+    txns = (
+        txn(1, 1, 100.0, counterparty="Swiggy"),
+        txn(2, 1, 50.0, counterparty="SWIGGY "),
+        txn(3, 2, 25.0, counterparty="AMZN MKTP"),
+        txn(4, 3, 10.0, counterparty="Amazon"),
+    )
+    # Reads never assign: unseen spellings get provisional ids.
+    table = TransactionTable(txns, merchants)
+    assert table.merchant.tolist() == [0, 0, 1, 2]
+    assert not path.exists() and merchants.names == []
+
+    merchants.ids(t.counterparty for t in txns)  # as engine.ingest() does
+    table = TransactionTable(txns, merchants)
+    debit = table.is_debit
+
+    assert table.merchant.tolist() == [0, 0, 1, 2]
+    assert table.totals_by("merchant", debit) == {"Swiggy": 150.0, "AMZN MKTP": 25.0, "Amazon": 10.0}
+
+    # Another process sees the alias; its ids were persisted.
+    assert MerchantDirectory(path).alias("amzn  mktp", "amazon") == 2
+    assert merchants.revision() != table.merchant_revision
+    table = TransactionTable(txns, merchants)
+    assert table.merchant.tolist() == [0, 0, 2, 2]
+    assert table.totals_by("merchant", debit) == {"Swiggy": 150.0, "Amazon": 35.0}
+    assert merchants.find("Amzn Mktp") == merchants.id("Amazon") == 2
+    assert merchants.find("Zomato") is None
+    assert merchants.find_many(["AMZN MKTP", "Zomato"]) == {"AMZN MKTP": 2, "Zomato": None}
+    assert "zomato" not in merchants.keys
+    assert merchants.aliases() == {"Amazon": ["amzn mktp"]}
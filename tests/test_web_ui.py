@@ -16,3 +16,12 @@ def test_summary_endpoint():
     assert rv.status_code == 200
     j = rv.get_json()
     assert 'total_transactions' in j
+
+
+def test_load_missing_path_is_a_client_error(tmp_path):
+    client = app.test_client()
+    with client.session_transaction() as s:
+        s['logged_in'] = True
+    rv = client.post('/api/load', data={'path': str(tmp_path / 'missing.pdf')})
+    assert rv.status_code == 400
+    assert 'missing.pdf' in rv.get_json()['error']